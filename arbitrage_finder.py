@@ -1,92 +1,367 @@
 import asyncio
 import logging
-from typing import Dict, List, Tuple
-from datetime import datetime
+import time
+from typing import Dict, List, Optional, Set, Tuple
 from exchange_manager import ExchangeManager
-from config import MIN_PROFIT_THRESHOLD, TRADING_PAIRS, MAX_TRADE_AMOUNT
+from opportunity_matrix import OpportunityMatrix
+from currency_graph import CurrencyGraph
+from poll_scheduler import PollScheduler
+from trade_sizing import optimal_trade_size
+from metrics import mark
+from models import AnyOpportunity, CycleOpportunity, Opportunity, Quote, symbol_table
+from config import (
+    MIN_PROFIT_THRESHOLD, TRADING_PAIRS, MAX_TRADE_AMOUNT, VECTORIZED_ANALYSIS,
+    TRIANGULAR_ENABLED, CYCLE_START_CURRENCIES, DEPTH_AWARE_SIZING
+)
 
 class ArbitrageFinder:
-    def __init__(self, exchange_manager: ExchangeManager):
+    def __init__(self, exchange_manager: ExchangeManager, symbols: Optional[List[str]] = None):
         """
         Initialize arbitrage finder with exchange manager
         
         Args:
             exchange_manager: Instance of ExchangeManager
+            symbols: Trading pair symbols to scan (defaults to TRADING_PAIRS)
         """
         self.exchange_manager = exchange_manager
+        self.symbols = list(symbols or TRADING_PAIRS)
+        self.matrix: Optional[OpportunityMatrix] = None
+        self.graph: Optional[CurrencyGraph] = None
         self.logger = logging.getLogger(__name__)
+        self._cross_symbols: Optional[List[str]] = None
+        self._cross_set: Set[str] = set()
 
-    async def find_opportunities(self) -> List[Dict]:
+    def set_symbols(self, symbols: List[str]) -> None:
+        """Replace the scanned symbols; the opportunity matrix and cross symbols are rebuilt on next use"""
+        self.symbols = list(symbols)
+        self.matrix = None
+        self._cross_symbols = None
+
+    def cross_symbols(self) -> List[str]:
         """
-        Find arbitrage opportunities across all configured trading pairs and exchanges
+        Markets between currencies of the scanned symbols, such as ETH/BTC, that cycle detection needs
+        
+        They are fetched alongside the scanned symbols but only feed the
+        currency graph. Taken from the market cache on first use after
+        set_symbols(); empty when TRIANGULAR_ENABLED is off or no markets
+        are cached.
         
         Returns:
-            List of dictionaries containing arbitrage opportunities
+            Symbols listed on at least one configured exchange
         """
-        opportunities = []
-        
-        for symbol in TRADING_PAIRS:
-            try:
-                # Get ticker data from all exchanges
-                exchange_prices = {}
-                tasks = []
-                
-                for exchange_id in self.exchange_manager.exchanges.keys():
-                    tasks.append(self.exchange_manager.get_ticker(exchange_id, symbol))
-                
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                for exchange_id, result in zip(self.exchange_manager.exchanges.keys(), results):
-                    if isinstance(result, Exception):
-                        self.logger.error(f"Error getting {symbol} price from {exchange_id}: {str(result)}")
+        if not TRIANGULAR_ENABLED:
+            return []
+        if self._cross_symbols is None:
+            metadata = getattr(self.exchange_manager, 'metadata', None)
+            currencies = {currency for symbol in self.symbols for currency in symbol.split('/')}
+            scanned = set(self.symbols)
+            cross = set()
+            for exchange_id in self.exchange_manager.exchanges:
+                markets = metadata.markets(exchange_id) if metadata else None
+                for symbol, market in (markets or {}).items():
+                    if symbol in scanned or market.get('active') is False or market.get('spot') is False:
                         continue
-                    if result:
-                        exchange_prices[exchange_id] = result
+                    if market.get('base') in currencies and market.get('quote') in currencies:
+                        cross.add(symbol)
+            self._cross_symbols = sorted(cross)
+            self._cross_set = cross
+        return self._cross_symbols
 
-                # Find opportunities
-                if len(exchange_prices) >= 2:
-                    new_opportunities = self._analyze_price_differences(symbol, exchange_prices)
-                    opportunities.extend(new_opportunities)
+    async def find_opportunities(self) -> List[AnyOpportunity]:
+        """
+        Find arbitrage opportunities across the scanned trading pairs and all exchanges
+        
+        Returns:
+            List of arbitrage opportunities
+        """
+        symbols = self.symbols + self.cross_symbols()
+        if self.exchange_manager.market_data:
+            market_data = self.exchange_manager.market_data
+            return self.analyze({symbol: market_data.get_tickers(symbol) for symbol in symbols})
+
+        # Fan out one bulk request per exchange so cycle latency is bounded by the slowest venue
+        unavailable = self.exchange_manager.unavailable_exchanges()
+        exchange_ids = [e for e in self.exchange_manager.exchanges if e not in unavailable]
+        results = await asyncio.gather(
+            *(self.exchange_manager.get_tickers(exchange_id, symbols) for exchange_id in exchange_ids),
+            return_exceptions=True
+        )
+
+        prices_by_symbol = {symbol: {} for symbol in symbols}
+        for exchange_id, result in zip(exchange_ids, results):
+            if isinstance(result, Exception):
+                self.logger.error("Error getting prices from %s: %s", exchange_id, result)
+                continue
+            for symbol, ticker in result.items():
+                prices_by_symbol[symbol][exchange_id] = ticker
+        
+        return self.analyze(prices_by_symbol)
+
+    async def poll_opportunities(self, scheduler: PollScheduler) -> List[AnyOpportunity]:
+        """
+        Refresh the (exchange, symbol) pairs that are due and analyze the symbols that changed
+        
+        Args:
+            scheduler: PollScheduler deciding what is due and holding the latest quotes
             
-            except Exception as e:
-                self.logger.error(f"Error processing {symbol}: {str(e)}")
+        Returns:
+            List of arbitrage opportunities
+        """
+        now = time.monotonic()
+        unavailable = self.exchange_manager.unavailable_exchanges()
+        due = {}
+        for exchange_id in scheduler.bulk:
+            symbols = scheduler.due(exchange_id, now)
+            if not symbols:
                 continue
+            if exchange_id in unavailable:
+                # Skip this round without polling so the pairs are not due again immediately
+                scheduler.record_quotes(exchange_id, symbols, {}, now)
+                continue
+            due[exchange_id] = symbols
+        if not due:
+            return []
+
+        results = await asyncio.gather(
+            *(self.exchange_manager.get_tickers(exchange_id, symbols) for exchange_id, symbols in due.items()),
+            return_exceptions=True
+        )
+        changed = set()
+        for (exchange_id, symbols), result in zip(due.items(), results):
+            if isinstance(result, Exception):
+                self.logger.error("Error getting prices from %s: %s", exchange_id, result)
+                result = {}
+            scheduler.record_quotes(exchange_id, symbols, result, now)
+            changed.update(result)
+
+        opportunities = self.analyze({symbol: scheduler.quotes[symbol] for symbol in changed})
+        scheduler.record_opportunities(opportunities)
+        return opportunities
+
+    def analyze(self, prices_by_symbol: Dict[str, Dict[str, Quote]]) -> List[AnyOpportunity]:
+        """
+        Find opportunities in a set of tickers for every symbol
         
+        Args:
+            prices_by_symbol: Quotes keyed by symbol, then exchange ID; cross
+                symbols only feed cycle detection
+            
+        Returns:
+            List of arbitrage opportunities
+        """
+        unavailable = self.exchange_manager.unavailable_exchanges()
+        if unavailable:
+            prices_by_symbol = {
+                symbol: {e: ticker for e, ticker in exchange_prices.items() if e not in unavailable}
+                for symbol, exchange_prices in prices_by_symbol.items()
+            }
+        all_prices = prices_by_symbol
+        if self.cross_symbols():
+            prices_by_symbol = {
+                symbol: exchange_prices for symbol, exchange_prices in prices_by_symbol.items()
+                if symbol not in self._cross_set
+            }
+
+        if VECTORIZED_ANALYSIS:
+            matrix = self._get_matrix()
+            matrix.load(prices_by_symbol)
+            opportunities = matrix.compute()
+        else:
+            opportunities = []
+            for symbol, exchange_prices in prices_by_symbol.items():
+                if len(exchange_prices) >= 2:
+                    opportunities.extend(self._analyze_price_differences(symbol, exchange_prices))
+
+        if DEPTH_AWARE_SIZING and self.exchange_manager.order_books:
+            opportunities = self._size_with_local_books(opportunities)
+        self._mark_evaluated(opportunities, prices_by_symbol)
+
+        if TRIANGULAR_ENABLED:
+            opportunities.extend(self.find_cycles(all_prices))
         return opportunities
 
-    def _analyze_price_differences(self, symbol: str, exchange_prices: Dict) -> List[Dict]:
+    def analyze_symbol(self, symbol: str, exchange_prices: Dict[str, Quote]) -> List[Opportunity]:
+        """
+        Evaluate only the routes for one symbol, e.g. after a price update
+        
+        Args:
+            symbol: Trading pair symbol
+            exchange_prices: Quotes keyed by exchange ID
+            
+        Returns:
+            List of arbitrage opportunities for the symbol (none for cross symbols)
+        """
+        if self.cross_symbols() and symbol in self._cross_set:
+            return []
+        unavailable = self.exchange_manager.unavailable_exchanges()
+        if unavailable:
+            exchange_prices = {e: ticker for e, ticker in exchange_prices.items() if e not in unavailable}
+            if len(exchange_prices) < 2:
+                return []
+        opportunities = self._analyze_price_differences(symbol, exchange_prices)
+        if opportunities and DEPTH_AWARE_SIZING and self.exchange_manager.order_books:
+            opportunities = self._size_with_local_books(opportunities)
+        self._mark_evaluated(opportunities, {symbol: exchange_prices})
+        return opportunities
+
+    def _mark_evaluated(self, opportunities: List[Opportunity],
+                        prices_by_symbol: Dict[str, Dict[str, Quote]]) -> None:
+        """Stamp each opportunity with the receipt time of its older quote and its evaluation time"""
+        for opportunity in opportunities:
+            exchange_prices = prices_by_symbol.get(opportunity.symbol, {})
+            received = [
+                exchange_prices[exchange_id].received_ns
+                for exchange_id in (opportunity.buy_exchange, opportunity.sell_exchange)
+                if exchange_id in exchange_prices
+            ]
+            received = [received_ns for received_ns in received if received_ns is not None]
+            if received:
+                opportunity.received_ns = min(received)
+            mark(opportunity, 'evaluated', 'received')
+
+    def update_graph(self, exchange_id: str, symbol: str, bid: float, ask: float) -> None:
+        """
+        Apply one top-of-book update to the currency graph
+        
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+            bid: Best bid price
+            ask: Best ask price
+        """
+        self._get_graph().update_market(exchange_id, symbol, bid, ask)
+
+    def size_opportunity(self, opportunity: Opportunity, asks, bids) -> bool:
+        """
+        Resize an opportunity to the profit-maximizing executable depth
+        
+        The book is walked while each step still adds fee-adjusted profit;
+        MIN_PROFIT_THRESHOLD then applies to the resulting average profit.
+        Updates trade_amount, VWAP buy/sell prices, expected profit and
+        marginal spread in place.
+        
+        Args:
+            opportunity: Opportunity to resize
+            asks: Ask levels on the buy exchange, best first
+            bids: Bid levels on the sell exchange, best first
+            
+        Returns:
+            True if a profitable size above the minimum threshold exists
+        """
+        sizing = optimal_trade_size(
+            asks,
+            bids,
+            self.exchange_manager.get_trading_fee(opportunity.buy_exchange, opportunity.symbol),
+            self.exchange_manager.get_trading_fee(opportunity.sell_exchange, opportunity.symbol),
+            MAX_TRADE_AMOUNT
+        )
+        if sizing is None or sizing['profit_percentage'] < MIN_PROFIT_THRESHOLD:
+            return False
+        opportunity.apply_sizing(sizing)
+        return True
+
+    def _size_with_local_books(self, opportunities: List[Opportunity]) -> List[Opportunity]:
+        """Resize pairwise opportunities against local books, dropping routes with no profitable depth"""
+        order_books = self.exchange_manager.order_books
+        sized = []
+        for opportunity in opportunities:
+            buy_book = order_books.get_book(opportunity.buy_exchange, opportunity.symbol)
+            sell_book = order_books.get_book(opportunity.sell_exchange, opportunity.symbol)
+            if buy_book is None or sell_book is None:
+                sized.append(opportunity)
+            elif self.size_opportunity(opportunity, buy_book.asks.iter_levels(), sell_book.bids.iter_levels()):
+                sized.append(opportunity)
+        return sized
+
+    def find_cycles(self, prices_by_symbol: Dict[str, Dict[str, Quote]]) -> List[CycleOpportunity]:
+        """
+        Update the currency graph with fresh tickers and find profitable multi-leg cycles
+        
+        Args:
+            prices_by_symbol: Quotes keyed by symbol, then exchange ID
+            
+        Returns:
+            List of cycle opportunities whose legs can be executed by Trader
+        """
+        graph = self._get_graph()
+        for symbol, exchange_prices in prices_by_symbol.items():
+            for exchange_id, ticker in exchange_prices.items():
+                graph.update_market(exchange_id, symbol, ticker.bid, ticker.ask)
+
+        cycles = graph.find_cycles()
+        unavailable = self.exchange_manager.unavailable_exchanges()
+        if unavailable:
+            # The graph keeps the last quotes of a venue taken out by its circuit breaker
+            cycles = [
+                cycle for cycle in cycles
+                if not any(leg.exchange in unavailable or leg.from_exchange in unavailable
+                           for leg in cycle.legs)
+            ]
+        # Only cycles starting in a stable currency can be sized from MAX_TRADE_AMOUNT
+        cycles = [cycle for cycle in cycles if cycle.start_currency in CYCLE_START_CURRENCIES]
+        for cycle in cycles:
+            cycle.start_amount = MAX_TRADE_AMOUNT
+            cycle.expected_profit_usdt = MAX_TRADE_AMOUNT * cycle.profit_percentage / 100
+            mark(cycle, 'evaluated', 'received')
+        return cycles
+
+    def _get_graph(self) -> CurrencyGraph:
+        """Build the currency graph over every loaded market on first use"""
+        if self.graph is None:
+            exchange_ids = list(self.exchange_manager.exchanges.keys())
+            fees = {e: self.exchange_manager.get_trading_fee(e) for e in exchange_ids}
+            self.graph = CurrencyGraph(fees)
+            self.graph.add_markets({
+                exchange_id: getattr(exchange, 'markets', None) or self.symbols
+                for exchange_id, exchange in self.exchange_manager.exchanges.items()
+            })
+        return self.graph
+
+    def _get_matrix(self) -> OpportunityMatrix:
+        """Build the opportunity matrix on first use"""
+        if self.matrix is None:
+            exchange_ids = list(self.exchange_manager.exchanges.keys())
+            fees = {
+                e: {symbol: self.exchange_manager.get_trading_fee(e, symbol) for symbol in self.symbols}
+                for e in exchange_ids
+            }
+            self.matrix = OpportunityMatrix(self.symbols, exchange_ids, fees)
+        return self.matrix
+
+    def _analyze_price_differences(self, symbol: str, exchange_prices: Dict[str, Quote]) -> List[Opportunity]:
         """
         Analyze price differences between exchanges for arbitrage opportunities
         
         Args:
             symbol: Trading pair symbol
-            exchange_prices: Dictionary of prices from different exchanges
+            exchange_prices: Quotes from different exchanges keyed by exchange ID
             
         Returns:
             List of arbitrage opportunities
         """
         opportunities = []
+        symbol_idx = symbol_table.id(symbol)
         
-        for buy_exchange in exchange_prices:
-            for sell_exchange in exchange_prices:
+        for buy_exchange, buy_quote in exchange_prices.items():
+            for sell_exchange, sell_quote in exchange_prices.items():
                 if buy_exchange != sell_exchange:
-                    buy_price = exchange_prices[buy_exchange]['ask']
-                    sell_price = exchange_prices[sell_exchange]['bid']
+                    buy_price = buy_quote.ask
+                    sell_price = sell_quote.bid
                     
                     # Calculate profit percentage
                     profit_percentage = ((sell_price - buy_price) / buy_price) * 100
                     
                     # Account for trading fees
-                    buy_fee = self.exchange_manager.get_trading_fee(buy_exchange)
-                    sell_fee = self.exchange_manager.get_trading_fee(sell_exchange)
+                    buy_fee = self.exchange_manager.get_trading_fee(buy_exchange, symbol)
+                    sell_fee = self.exchange_manager.get_trading_fee(sell_exchange, symbol)
                     total_fee_percentage = buy_fee + sell_fee
                     net_profit_percentage = profit_percentage - total_fee_percentage
                     
                     # Check if profit meets minimum threshold
                     if net_profit_percentage >= MIN_PROFIT_THRESHOLD:
                         # Calculate optimal trade amount (respecting MAX_TRADE_AMOUNT)
-                        buy_volume = exchange_prices[buy_exchange]['volume']
-                        sell_volume = exchange_prices[sell_exchange]['volume']
+                        buy_volume = buy_quote.volume
+                        sell_volume = sell_quote.volume
                         max_possible_volume = min(buy_volume, sell_volume)
                         trade_amount = min(MAX_TRADE_AMOUNT / buy_price, max_possible_volume)
                         
@@ -97,71 +372,149 @@ class ArbitrageFinder:
                             (trade_amount * sell_price * sell_fee / 100)
                         )
                         
-                        opportunity = {
-                            'symbol': symbol,
-                            'buy_exchange': buy_exchange,
-                            'sell_exchange': sell_exchange,
-                            'buy_price': buy_price,
-                            'sell_price': sell_price,
-                            'trade_amount': trade_amount,
-                            'profit_percentage': net_profit_percentage,
-                            'expected_profit_usdt': expected_profit_after_fees,
-                            'timestamp': datetime.utcnow().isoformat(),
-                            'buy_volume': buy_volume,
-                            'sell_volume': sell_volume,
-                            'total_fees_percentage': total_fee_percentage
-                        }
-                        
-                        opportunities.append(opportunity)
+                        opportunities.append(Opportunity(
+                            symbol_idx,
+                            buy_quote.exchange_idx,
+                            sell_quote.exchange_idx,
+                            buy_price,
+                            sell_price,
+                            trade_amount,
+                            net_profit_percentage,
+                            expected_profit_after_fees,
+                            buy_volume,
+                            sell_volume,
+                            total_fee_percentage
+                        ))
         
         return opportunities
 
-    async def verify_opportunity(self, opportunity: Dict) -> Tuple[bool, str]:
+    async def verify_opportunity(self, opportunity: Opportunity) -> Tuple[bool, str]:
         """
         Verify if an arbitrage opportunity is still valid by checking order books
         
         Args:
-            opportunity: Dictionary containing opportunity details
+            opportunity: Opportunity to verify
             
         Returns:
             Tuple of (is_valid, reason)
         """
         try:
+            local_result = self._verify_with_local_books(opportunity)
+            if local_result is not None:
+                return local_result
+
             # Get order books
-            buy_order_book = await self.exchange_manager.get_order_book(
-                opportunity['buy_exchange'],
-                opportunity['symbol']
-            )
-            sell_order_book = await self.exchange_manager.get_order_book(
-                opportunity['sell_exchange'],
-                opportunity['symbol']
+            buy_order_book, sell_order_book = await asyncio.gather(
+                self.exchange_manager.get_order_book(
+                    opportunity.buy_exchange,
+                    opportunity.symbol
+                ),
+                self.exchange_manager.get_order_book(
+                    opportunity.sell_exchange,
+                    opportunity.symbol
+                )
             )
             
             if not buy_order_book or not sell_order_book:
                 return False, "Failed to fetch order books"
             
+            if DEPTH_AWARE_SIZING:
+                return self._check_sized(opportunity, buy_order_book['asks'], sell_order_book['bids'])
+            
             # Check if the required volume is available at the expected prices
             buy_volume_available = sum(amount for price, amount in buy_order_book['asks']
-                                     if price <= opportunity['buy_price'] * 1.001)  # 0.1% price slippage tolerance
+                                     if price <= opportunity.buy_price * 1.001)  # 0.1% price slippage tolerance
             sell_volume_available = sum(amount for price, amount in sell_order_book['bids']
-                                      if price >= opportunity['sell_price'] * 0.999)  # 0.1% price slippage tolerance
+                                      if price >= opportunity.sell_price * 0.999)  # 0.1% price slippage tolerance
             
-            if buy_volume_available < opportunity['trade_amount']:
-                return False, f"Insufficient buy volume: {buy_volume_available} < {opportunity['trade_amount']}"
-            
-            if sell_volume_available < opportunity['trade_amount']:
-                return False, f"Insufficient sell volume: {sell_volume_available} < {opportunity['trade_amount']}"
+            return self._check_verification(
+                opportunity,
+                buy_volume_available,
+                sell_volume_available,
+                buy_order_book['asks'][0][0],
+                sell_order_book['bids'][0][0]
+            )
             
-            # Check if price spread still exists
-            best_ask = buy_order_book['asks'][0][0]
-            best_bid = sell_order_book['bids'][0][0]
+        except Exception as e:
+            self.logger.error("Error verifying opportunity: %s", e)
+            return False, f"Verification error: {str(e)}"
+
+    def _verify_with_local_books(self, opportunity: Opportunity) -> Optional[Tuple[bool, str]]:
+        """
+        Verify an opportunity against in-memory order book replicas
+        
+        Args:
+            opportunity: Opportunity to verify
             
-            current_spread = ((best_bid - best_ask) / best_ask) * 100
-            if current_spread < MIN_PROFIT_THRESHOLD:
-                return False, f"Spread no longer profitable: {current_spread}% < {MIN_PROFIT_THRESHOLD}%"
+        Returns:
+            Tuple of (is_valid, reason), or None if either book is not available locally
+        """
+        order_books = self.exchange_manager.order_books
+        if not order_books:
+            return None
+        
+        buy_book = order_books.get_book(opportunity.buy_exchange, opportunity.symbol)
+        sell_book = order_books.get_book(opportunity.sell_exchange, opportunity.symbol)
+        if buy_book is None or sell_book is None:
+            return None
+        
+        best_ask = buy_book.asks.best()
+        best_bid = sell_book.bids.best()
+        if best_ask is None or best_bid is None:
+            return None
+        
+        if DEPTH_AWARE_SIZING:
+            return self._check_sized(opportunity, buy_book.asks.iter_levels(), sell_book.bids.iter_levels())
+        
+        return self._check_verification(
+            opportunity,
+            buy_book.asks.volume_to(opportunity.buy_price * 1.001),  # 0.1% price slippage tolerance
+            sell_book.bids.volume_to(opportunity.sell_price * 0.999),
+            best_ask,
+            best_bid
+        )
+
+    def _check_sized(self, opportunity: Opportunity, asks, bids) -> Tuple[bool, str]:
+        """
+        Verify an opportunity by resizing it against current depth
+        
+        Args:
+            opportunity: Opportunity to verify
+            asks: Ask levels on the buy exchange, best first
+            bids: Bid levels on the sell exchange, best first
             
-            return True, "Opportunity verified"
+        Returns:
+            Tuple of (is_valid, reason)
+        """
+        if not self.size_opportunity(opportunity, asks, bids):
+            return False, "No profitable executable depth"
+        return True, "Opportunity verified"
+
+    def _check_verification(self, opportunity: Opportunity, buy_volume_available: float,
+                            sell_volume_available: float, best_ask: float,
+                            best_bid: float) -> Tuple[bool, str]:
+        """
+        Apply volume and spread checks to order book figures
+        
+        Args:
+            opportunity: Opportunity to verify
+            buy_volume_available: Ask volume within tolerance on the buy exchange
+            sell_volume_available: Bid volume within tolerance on the sell exchange
+            best_ask: Best ask on the buy exchange
+            best_bid: Best bid on the sell exchange
             
-        except Exception as e:
-            self.logger.error(f"Error verifying opportunity: {str(e)}")
-            return False, f"Verification error: {str(e)}"
+        Returns:
+            Tuple of (is_valid, reason)
+        """
+        if buy_volume_available < opportunity.trade_amount:
+            return False, f"Insufficient buy volume: {buy_volume_available} < {opportunity.trade_amount}"
+        
+        if sell_volume_available < opportunity.trade_amount:
+            return False, f"Insufficient sell volume: {sell_volume_available} < {opportunity.trade_amount}"
+        
+        # Check if price spread still exists
+        current_spread = ((best_bid - best_ask) / best_ask) * 100
+        if current_spread < MIN_PROFIT_THRESHOLD:
+            return False, f"Spread no longer profitable: {current_spread}% < {MIN_PROFIT_THRESHOLD}%"
+        
+        return True, "Opportunity verified"
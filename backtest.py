@@ -0,0 +1,368 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+from operator import attrgetter
+from typing import Dict, List, Optional, Set, Tuple
+import numpy as np
+from arbitrage_finder import ArbitrageFinder
+from models import Fill, Quote, exchange_table, symbol_table
+from trader import Trader
+from tick_recorder import TickReader, TICK_DTYPE
+from config import CHECK_INTERVAL, EXCHANGE_FEES
+
+
+class SimulatedClock:
+    def __init__(self, start_ns: int = 0):
+        """Simulated wall clock advanced by the replay engine"""
+        self.now_ns = start_ns
+
+    def now_ms(self) -> int:
+        return self.now_ns // 1_000_000
+
+
+class SimulatedExchange:
+    """Stand-in for a ccxt client exposing only what the bot inspects"""
+
+    def __init__(self, exchange_id: str):
+        self.id = exchange_id
+        self.has = {'fetchTickers': True}
+        self.markets = None
+
+    async def close(self):
+        pass
+
+
+class SimulatedExchangeManager:
+    def __init__(self, exchange_ids: List[str], initial_balances: Dict[str, float],
+                 clock: SimulatedClock, fees: Dict[str, float] = None):
+        """
+        ExchangeManager replacement serving recorded market data and filling orders against recorded books
+
+        Market orders walk the latest recorded book for the symbol. When only
+        tickers were recorded, the top of book is used with the recorded size,
+        or treated as unlimited when the size is unknown.
+
+        Args:
+            exchange_ids: Exchanges present in the recording
+            initial_balances: Starting free balance per currency on every exchange
+            clock: Simulated clock used for timestamps
+            fees: Trading fee percentage per exchange (defaults to EXCHANGE_FEES)
+        """
+        self.exchanges = {exchange_id: SimulatedExchange(exchange_id) for exchange_id in exchange_ids}
+        self.clock = clock
+        self.fees = fees or EXCHANGE_FEES
+        self.market_data = None
+        self.order_books = None
+        self.recorder = None
+        self.scheduler = None
+        self.logger = logging.getLogger(__name__)
+
+        self.tickers: Dict[Tuple[str, str], Quote] = {}
+        self.books: Dict[Tuple[str, str], Dict] = {}
+        self.balances: Dict[Tuple[str, str], float] = {
+            (exchange_id, currency): amount
+            for exchange_id in exchange_ids for currency, amount in initial_balances.items()
+        }
+        self.fills: List[Dict] = []
+        self._order_ids = itertools.count(1)
+
+    async def get_ticker(self, exchange_id: str, symbol: str) -> Optional[Quote]:
+        return self.tickers.get((exchange_id, symbol))
+
+    async def get_tickers(self, exchange_id: str, symbols: List[str]) -> Dict[str, Quote]:
+        return {
+            symbol: self.tickers[(exchange_id, symbol)]
+            for symbol in symbols if (exchange_id, symbol) in self.tickers
+        }
+
+    async def get_order_book(self, exchange_id: str, symbol: str, limit: int = 20) -> Optional[Dict]:
+        return self._book(exchange_id, symbol)
+
+    def _book(self, exchange_id: str, symbol: str) -> Optional[Dict]:
+        book = self.books.get((exchange_id, symbol))
+        if book is not None:
+            return book
+        ticker = self.tickers.get((exchange_id, symbol))
+        if ticker is None:
+            return None
+        bid_size = ticker.bid_size
+        ask_size = ticker.ask_size
+        return {
+            'bids': [[ticker.bid, bid_size if bid_size and math.isfinite(bid_size) else math.inf]],
+            'asks': [[ticker.ask, ask_size if ask_size and math.isfinite(ask_size) else math.inf]],
+            'timestamp': ticker.timestamp
+        }
+
+    async def get_balance(self, exchange_id: str, currency: str) -> Optional[float]:
+        return self.balances.get((exchange_id, currency), 0.0)
+
+    async def get_balances(self, exchange_id: str) -> Optional[Dict[str, float]]:
+        return {currency: amount for (e, currency), amount in self.balances.items() if e == exchange_id}
+
+    async def place_order(self, exchange_id: str, symbol: str, order_type: str, side: str,
+                          amount: float, price: Optional[float] = None,
+                          client_order_id: Optional[str] = None) -> Optional[Fill]:
+        """Fill a market order against the latest recorded book"""
+        book = self._book(exchange_id, symbol)
+        if book is None:
+            return None
+
+        levels = book['asks'] if side == 'buy' else book['bids']
+        filled = 0.0
+        notional = 0.0
+        for level_price, level_size, *_ in levels:
+            if level_size <= 0:
+                break
+            if price is not None and ((side == 'buy' and level_price > price) or
+                                      (side == 'sell' and level_price < price)):
+                break
+            quantity = min(amount - filled, level_size)
+            filled += quantity
+            notional += quantity * level_price
+            if filled >= amount:
+                break
+        if filled <= 0:
+            return None
+
+        base, quote = symbol.split('/')
+        fee = notional * self.fees.get(exchange_id, 0.0) / 100
+        sign = 1 if side == 'buy' else -1
+        self.balances[(exchange_id, base)] = self.balances.get((exchange_id, base), 0.0) + sign * filled
+        self.balances[(exchange_id, quote)] = self.balances.get((exchange_id, quote), 0.0) - sign * notional - fee
+
+        order = Fill(
+            str(next(self._order_ids)),
+            exchange_table.id(exchange_id),
+            symbol_table.id(symbol),
+            order_type,
+            side,
+            filled,
+            notional / filled,
+            'closed' if filled >= amount else 'partial',
+            self.clock.now_ms()
+        )
+        self.fills.append(dict(order.to_dict(), fee=fee, requested=amount))
+        return order
+
+    def new_client_order_id(self, exchange_id: str) -> Optional[str]:
+        return None
+
+    async def resolve_order(self, exchange_id: str, symbol: str, side: str, client_order_id: Optional[str],
+                            since: int) -> Optional[Fill]:
+        # Simulated orders fill synchronously, so an abandoned order never reached the book
+        return None
+
+    def get_trading_fee(self, exchange_id: str, symbol: Optional[str] = None) -> float:
+        return self.fees.get(exchange_id, 0.0)
+
+    def unavailable_exchanges(self) -> Set[str]:
+        return set()
+
+    async def close_connections(self):
+        pass
+
+
+class ReplayEngine:
+    def __init__(self, data_directory: str, initial_balances: Dict[str, float],
+                 step_seconds: float = CHECK_INTERVAL, quote_currency: str = 'USDT'):
+        """
+        Replay recorded market data through the real ArbitrageFinder and Trader on a simulated clock
+
+        Base currencies without a starting balance are seeded on every
+        exchange to the value of the quote balance at their first recorded
+        mid price: both legs of a trade run at once, so the sell leg needs
+        the base already on its venue and a quote-only start never trades.
+
+        Args:
+            data_directory: Directory written by TickRecorder
+            initial_balances: Starting free balance per currency on every exchange
+            step_seconds: Simulated seconds between evaluation cycles
+            quote_currency: Currency equity and PnL are measured in
+        """
+        self.reader = TickReader(data_directory)
+        self.step_ns = int(step_seconds * 1e9)
+        self.quote_currency = quote_currency
+        self.initial_balances = initial_balances
+        self.clock = SimulatedClock()
+        self.exchange_manager = SimulatedExchangeManager(self.reader.exchanges, initial_balances, self.clock)
+        # Scan the recorded universe, which is what the live bot scanned while recording
+        self.arbitrage_finder = ArbitrageFinder(self.exchange_manager, self.reader.symbols)
+        self.trader = Trader(self.exchange_manager, self.arbitrage_finder)
+        self.logger = logging.getLogger(__name__)
+        self.equity_curve: List[Tuple[int, float]] = []
+        self.stats = {'cycles': 0, 'opportunities': 0, 'trades_attempted': 0, 'trades_completed': 0}
+
+    def _load(self, kind: str) -> np.ndarray:
+        segments = list(self.reader.segments(kind))
+        if not segments:
+            return np.empty(0, dtype=self.reader.book_dtype if kind == 'book' else TICK_DTYPE)
+        records = np.concatenate(segments) if len(segments) > 1 else segments[0]
+        if np.all(records['ts'][1:] >= records['ts'][:-1]):
+            # Already in capture order, keep the memory-mapped view
+            return records
+        return records[np.argsort(records['ts'], kind='stable')]
+
+    @staticmethod
+    def _latest_rows(records: np.ndarray) -> np.ndarray:
+        """Indices of the last record per (exchange, symbol) within a slice"""
+        keys = records['exchange'].astype(np.int64) << 32 | records['symbol'].astype(np.int64)
+        _, reversed_index = np.unique(keys[::-1], return_index=True)
+        return len(keys) - 1 - reversed_index
+
+    def _apply_ticks(self, records: np.ndarray) -> None:
+        exchanges, symbols = self.reader.exchanges, self.reader.symbols
+        for row in self._latest_rows(records):
+            record = records[row]
+            exchange_id, symbol = exchanges[record['exchange']], symbols[record['symbol']]
+            self.exchange_manager.tickers[(exchange_id, symbol)] = Quote(
+                exchange_table.id(exchange_id),
+                symbol_table.id(symbol),
+                float(record['bid']),
+                float(record['ask']),
+                float(record['last']),
+                float(record['volume']),
+                float(record['bid_size']),
+                float(record['ask_size']),
+                int(record['exchange_ts']) or int(record['ts']) // 1_000_000
+            )
+
+    def _apply_books(self, records: np.ndarray) -> None:
+        exchanges, symbols = self.reader.exchanges, self.reader.symbols
+        for row in self._latest_rows(records):
+            record = records[row]
+            self.exchange_manager.books[(exchanges[record['exchange']], symbols[record['symbol']])] = {
+                'bids': [level for level in record['bids'].tolist() if level[1] > 0],
+                'asks': [level for level in record['asks'].tolist() if level[1] > 0],
+                'timestamp': int(record['exchange_ts'])
+            }
+
+    def equity(self) -> float:
+        """Mark all balances to the quote currency at the latest recorded mid prices"""
+        mids = {}
+        for (exchange_id, symbol), ticker in self.exchange_manager.tickers.items():
+            base, quote = symbol.split('/')
+            if quote == self.quote_currency and math.isfinite(ticker.bid) and math.isfinite(ticker.ask):
+                mids.setdefault(base, (ticker.bid + ticker.ask) / 2)
+        total = 0.0
+        for (_, currency), amount in self.exchange_manager.balances.items():
+            if currency == self.quote_currency:
+                total += amount
+            elif currency in mids:
+                total += amount * mids[currency]
+        return total
+
+    async def run(self) -> Dict:
+        """
+        Replay the whole recording
+
+        Returns:
+            Report with PnL, drawdown and fill statistics
+        """
+        ticks = self._load('tick')
+        books = self._load('book')
+        if len(ticks) == 0 and len(books) == 0:
+            raise ValueError("Recording contains no data")
+
+        self._seed_base_balances(ticks)
+        start = min(int(a['ts'][0]) for a in (ticks, books) if len(a))
+        end = max(int(a['ts'][-1]) for a in (ticks, books) if len(a))
+        tick_position = book_position = 0
+        self.clock.now_ns = start
+
+        while self.clock.now_ns <= end:
+            self.clock.now_ns += self.step_ns
+            tick_end = int(np.searchsorted(ticks['ts'], self.clock.now_ns, side='right')) if len(ticks) else 0
+            book_end = int(np.searchsorted(books['ts'], self.clock.now_ns, side='right')) if len(books) else 0
+            if tick_end > tick_position:
+                self._apply_ticks(ticks[tick_position:tick_end])
+                tick_position = tick_end
+            if book_end > book_position:
+                self._apply_books(books[book_position:book_end])
+                book_position = book_end
+
+            await self._cycle()
+            self.equity_curve.append((self.clock.now_ns, self.equity()))
+
+        return self.report()
+
+    def _seed_base_balances(self, ticks: np.ndarray) -> None:
+        """Give every exchange the quote balance's worth of each recorded base currency not set explicitly"""
+        quote_balance = self.initial_balances.get(self.quote_currency, 0.0)
+        if quote_balance <= 0 or len(ticks) == 0:
+            return
+        mids = {}
+        earliest = ticks[::-1]
+        for row in self._latest_rows(earliest):
+            record = earliest[row]
+            base, quote = self.reader.symbols[record['symbol']].split('/')
+            bid, ask = float(record['bid']), float(record['ask'])
+            if quote == self.quote_currency and bid > 0 and ask > 0 and math.isfinite(bid) and math.isfinite(ask):
+                mids.setdefault(base, (bid + ask) / 2)
+        balances = self.exchange_manager.balances
+        for base, mid in mids.items():
+            if base in self.initial_balances:
+                continue
+            for exchange_id in self.reader.exchanges:
+                balances[(exchange_id, base)] = quote_balance / mid
+            self.logger.info("Seeded %s %s per exchange", quote_balance / mid, base)
+
+    async def _cycle(self) -> None:
+        """One evaluation cycle, mirroring ArbitrageBot's polling loop"""
+        self.stats['cycles'] += 1
+        opportunities = await self.arbitrage_finder.find_opportunities()
+        self.stats['opportunities'] += len(opportunities)
+        if not opportunities:
+            return
+        best = max(opportunities, key=attrgetter('expected_profit_usdt'))
+        self.stats['trades_attempted'] += 1
+        if await self.trader.execute_arbitrage(best):
+            self.stats['trades_completed'] += 1
+
+    def report(self) -> Dict:
+        """Summarize PnL, drawdown and fills"""
+        equity = np.array([value for _, value in self.equity_curve]) if self.equity_curve else np.zeros(1)
+        peaks = np.maximum.accumulate(equity)
+        drawdowns = peaks - equity
+        fills = self.exchange_manager.fills
+        return {
+            **self.stats,
+            'start_equity': float(equity[0]),
+            'end_equity': float(equity[-1]),
+            'pnl': float(equity[-1] - equity[0]),
+            'max_drawdown': float(drawdowns.max()),
+            'max_drawdown_pct': float((drawdowns / np.where(peaks == 0, 1, peaks)).max() * 100),
+            'fills': len(fills),
+            'partial_fills': sum(1 for f in fills if f['status'] == 'partial'),
+            'fill_notional': sum(f['amount'] * f['price'] for f in fills),
+            'fees_paid': sum(f['fee'] for f in fills)
+        }
+
+
+def _parse_balances(values: List[str]) -> Dict[str, float]:
+    balances = {}
+    for value in values:
+        currency, amount = value.split('=')
+        balances[currency.upper()] = float(amount)
+    return balances
+
+
+async def main():
+    """Command line entry point for replaying a recording"""
+    parser = argparse.ArgumentParser(description="Replay recorded market data through the arbitrage bot")
+    parser.add_argument('--data', required=True, help="Directory written by TickRecorder")
+    parser.add_argument('--balance', action='append', default=[],
+                        help="Starting balance per exchange, e.g. USDT=10000 (repeatable); base currencies "
+                             "left unset start with the USDT balance's worth at the first recorded price")
+    parser.add_argument('--step', type=float, default=CHECK_INTERVAL, help="Simulated seconds per cycle")
+    args = parser.parse_args()
+
+    engine = ReplayEngine(args.data, _parse_balances(args.balance), args.step)
+    print(json.dumps(await engine.run(), indent=2))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.WARNING)
+    asyncio.run(main())
@@ -0,0 +1,385 @@
+import argparse
+import asyncio
+import copy
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from operator import attrgetter
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+import numpy as np
+from arbitrage_finder import ArbitrageFinder
+from backtest import SimulatedClock, SimulatedExchangeManager
+from currency_graph import CurrencyGraph
+from models import Fill, Opportunity, Quote, exchange_table, symbol_table
+from opportunity_matrix import OpportunityMatrix
+from trade_sizing import optimal_trade_size
+from trader import Trader
+from config import EXCHANGE_FEES, TRADING_PAIRS
+
+ANALYSIS_GRID = [(3, 5), (5, 20), (10, 100), (20, 500)]
+CYCLE_GRID = [(3, 5), (5, 20), (10, 100)]
+BOOK_DEPTHS = [5, 20, 100, 1000]
+LATENCIES_MS = [0, 5, 20]
+
+
+def synthetic_market(exchange_count: int, symbol_count: int, seed: int = 0,
+                     spread_bps: float = 5.0, dispersion_bps: float = 30.0) -> Tuple[List[str], List[str], Dict]:
+    """
+    Generate consistent tickers for a synthetic set of exchanges and symbols
+
+    Every base currency has a hidden USDT value; each venue quotes it with
+    independent noise, and roughly one symbol in four is quoted against BTC
+    so the currency graph has triangles to search.
+
+    Args:
+        exchange_count: Number of exchanges
+        symbol_count: Number of symbols
+        seed: Random seed
+        spread_bps: Bid/ask spread in basis points
+        dispersion_bps: Standard deviation of cross-venue mid noise in basis points
+
+    Returns:
+        Tuple of (exchange_ids, symbols, quotes keyed by symbol then exchange ID)
+    """
+    rng = random.Random(seed)
+    exchange_ids = [f"ex{i}" for i in range(exchange_count)]
+    values = {'USDT': 1.0, 'BTC': 60000.0}
+    symbols = []
+    for i in range(symbol_count):
+        base = 'BTC' if i == 0 else f"C{i}"
+        values.setdefault(base, rng.uniform(0.1, 5000.0))
+        quote = 'BTC' if i % 4 == 3 else 'USDT'
+        symbols.append(f"{base}/{quote}")
+
+    now = int(time.time() * 1000)
+    prices_by_symbol = {}
+    for symbol in symbols:
+        base, quote = symbol.split('/')
+        fair = values[base] / values[quote]
+        prices_by_symbol[symbol] = {}
+        for exchange_id in exchange_ids:
+            mid = fair * (1 + rng.gauss(0, dispersion_bps / 10000))
+            half_spread = mid * spread_bps / 20000
+            prices_by_symbol[symbol][exchange_id] = Quote(
+                exchange_table.id(exchange_id),
+                symbol_table.id(symbol),
+                mid - half_spread,
+                mid + half_spread,
+                mid,
+                rng.uniform(1e3, 1e6),
+                rng.uniform(0.1, 10.0),
+                rng.uniform(0.1, 10.0),
+                now
+            )
+    return exchange_ids, symbols, prices_by_symbol
+
+
+def synthetic_book(mid: float, depth: int, seed: int = 0, tick_bps: float = 1.0) -> Dict:
+    """
+    Generate an L2 order book around a mid price
+
+    Args:
+        mid: Mid price
+        depth: Levels per side
+        seed: Random seed for level sizes
+        tick_bps: Distance between levels in basis points
+
+    Returns:
+        Order book dictionary with 'bids' and 'asks' as [price, size], best first
+    """
+    rng = random.Random(seed)
+    tick = mid * tick_bps / 10000
+    return {
+        'bids': [[mid - tick * (i + 1), rng.uniform(0.01, 1.0)] for i in range(depth)],
+        'asks': [[mid + tick * (i + 1), rng.uniform(0.01, 1.0)] for i in range(depth)],
+        'timestamp': int(time.time() * 1000)
+    }
+
+
+class LatencyExchangeManager(SimulatedExchangeManager):
+    def __init__(self, exchange_ids: List[str], initial_balances: Dict[str, float],
+                 latency_ms: float, jitter_ms: float = 0.0, seed: int = 0, fees: Dict[str, float] = None):
+        """
+        Simulated exchange manager that waits a configurable round trip before every call
+
+        Args:
+            exchange_ids: Exchanges to simulate
+            initial_balances: Starting free balance per currency on every exchange
+            latency_ms: Base round trip per request in milliseconds
+            jitter_ms: Maximum additional random latency in milliseconds
+            seed: Random seed for jitter
+            fees: Trading fee percentage per exchange
+        """
+        super().__init__(exchange_ids, initial_balances, SimulatedClock(time.time_ns()), fees)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.random = random.Random(seed)
+
+    async def _round_trip(self) -> None:
+        delay = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+        await asyncio.sleep(delay / 1000)
+
+    async def get_ticker(self, exchange_id: str, symbol: str) -> Optional[Quote]:
+        await self._round_trip()
+        return await super().get_ticker(exchange_id, symbol)
+
+    async def get_tickers(self, exchange_id: str, symbols: List[str]) -> Dict[str, Quote]:
+        await self._round_trip()
+        return await super().get_tickers(exchange_id, symbols)
+
+    async def get_order_book(self, exchange_id: str, symbol: str, limit: int = 20) -> Optional[Dict]:
+        await self._round_trip()
+        return await super().get_order_book(exchange_id, symbol, limit)
+
+    async def get_balance(self, exchange_id: str, currency: str) -> Optional[float]:
+        await self._round_trip()
+        return await super().get_balance(exchange_id, currency)
+
+    async def place_order(self, exchange_id: str, symbol: str, order_type: str, side: str,
+                          amount: float, price: Optional[float] = None,
+                          client_order_id: Optional[str] = None) -> Optional[Fill]:
+        await self._round_trip()
+        return await super().place_order(exchange_id, symbol, order_type, side, amount, price, client_order_id)
+
+
+def _summarize(name: str, params: Dict, samples_ns: List[int]) -> Dict:
+    samples_us = sorted(sample / 1000 for sample in samples_ns)
+    return {
+        'name': name,
+        'params': params,
+        'runs': len(samples_us),
+        'mean_us': statistics.fmean(samples_us),
+        'p50_us': samples_us[len(samples_us) // 2],
+        'p99_us': samples_us[min(len(samples_us) - 1, int(len(samples_us) * 0.99))],
+        'min_us': samples_us[0],
+        'max_us': samples_us[-1]
+    }
+
+
+def measure(name: str, params: Dict, fn: Callable[[], object], repeat: int, max_seconds: float) -> Dict:
+    """
+    Time a synchronous callable after one warm-up call
+
+    Stops early once max_seconds is spent, but always takes at least three samples.
+    """
+    fn()
+    samples = []
+    deadline = time.perf_counter() + max_seconds
+    while len(samples) < repeat and (len(samples) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter_ns()
+        fn()
+        samples.append(time.perf_counter_ns() - start)
+    return _summarize(name, params, samples)
+
+
+async def measure_async(name: str, params: Dict, fn: Callable[[], Awaitable], repeat: int,
+                        max_seconds: float) -> Dict:
+    """Time a coroutine function after one warm-up call, with the same stopping rule as measure"""
+    await fn()
+    samples = []
+    deadline = time.perf_counter() + max_seconds
+    while len(samples) < repeat and (len(samples) < 3 or time.perf_counter() < deadline):
+        start = time.perf_counter_ns()
+        await fn()
+        samples.append(time.perf_counter_ns() - start)
+    return _summarize(name, params, samples)
+
+
+def bench_analysis(repeat: int, max_seconds: float) -> List[Dict]:
+    """Route analysis cost as exchanges x symbols grows, for the scalar, vectorized and cycle paths"""
+    results = []
+    for exchange_count, symbol_count in ANALYSIS_GRID:
+        exchange_ids, symbols, prices_by_symbol = synthetic_market(exchange_count, symbol_count)
+        fees = {exchange_id: 0.1 for exchange_id in exchange_ids}
+        manager = SimulatedExchangeManager(exchange_ids, {}, SimulatedClock(), fees)
+        finder = ArbitrageFinder(manager)
+        finder.matrix = OpportunityMatrix(symbols, exchange_ids, fees)
+        params = {'exchanges': exchange_count, 'symbols': symbol_count}
+
+        def scalar():
+            for symbol, exchange_prices in prices_by_symbol.items():
+                finder._analyze_price_differences(symbol, exchange_prices)
+
+        def vectorized():
+            finder.matrix.load(prices_by_symbol)
+            finder.matrix.compute()
+
+        results.append(measure('analysis.scalar', params, scalar, repeat, max_seconds))
+        results.append(measure('analysis.vectorized', params, vectorized, repeat, max_seconds))
+
+        if (exchange_count, symbol_count) in CYCLE_GRID:
+            finder.graph = CurrencyGraph(fees)
+            finder.graph.add_markets({exchange_id: symbols for exchange_id in exchange_ids})
+            results.append(measure('analysis.cycles', params,
+                                   lambda: finder.find_cycles(prices_by_symbol), repeat, max_seconds))
+    return results
+
+
+async def bench_books(repeat: int, max_seconds: float) -> List[Dict]:
+    """Depth-aware sizing and REST-path verification at various book depths"""
+    results = []
+    exchange_ids = ['buy', 'sell']
+    fees = {exchange_id: 0.1 for exchange_id in exchange_ids}
+    for depth in BOOK_DEPTHS:
+        # Offset the sell venue by more than both ladders span so sizing walks every level
+        buy_book = synthetic_book(100.0, depth, seed=1)
+        sell_book = synthetic_book(100.0 * (1 + depth * 2 / 10000 + 0.005), depth, seed=2)
+        params = {'depth': depth}
+
+        results.append(measure(
+            'books.sizing', params,
+            lambda: optimal_trade_size(buy_book['asks'], sell_book['bids'], 0.1, 0.1, float('inf')),
+            repeat, max_seconds
+        ))
+
+        manager = SimulatedExchangeManager(exchange_ids, {}, SimulatedClock(), fees)
+        manager.books[('buy', 'BTC/USDT')] = buy_book
+        manager.books[('sell', 'BTC/USDT')] = sell_book
+        finder = ArbitrageFinder(manager)
+        opportunity = Opportunity(
+            symbol_table.id('BTC/USDT'), exchange_table.id('buy'), exchange_table.id('sell'),
+            buy_book['asks'][0][0], sell_book['bids'][0][0], 1.0, 0.0, 1.0, 0.0, 0.0, 0.2
+        )
+        results.append(await measure_async(
+            'books.verify', params,
+            lambda: finder.verify_opportunity(copy.copy(opportunity)),
+            repeat, max_seconds
+        ))
+    return results
+
+
+async def bench_cycle(repeat: int, max_seconds: float) -> List[Dict]:
+    """Full detect, verify and execute cycle against mocked exchanges with injected latency"""
+    results = []
+    exchange_ids = list(EXCHANGE_FEES.keys())
+    for latency_ms in LATENCIES_MS:
+        manager = LatencyExchangeManager(exchange_ids, {'USDT': 1e9, **{s.split('/')[0]: 1e6 for s in TRADING_PAIRS}},
+                                         latency_ms, jitter_ms=latency_ms / 2)
+        _, _, prices_by_symbol = synthetic_market(len(exchange_ids), len(TRADING_PAIRS), dispersion_bps=0)
+        for symbol, synthetic_prices in zip(TRADING_PAIRS, prices_by_symbol.values()):
+            for exchange_id, ticker in zip(exchange_ids, synthetic_prices.values()):
+                ticker.exchange_idx = exchange_table.id(exchange_id)
+                ticker.symbol_idx = symbol_table.id(symbol)
+                manager.tickers[(exchange_id, symbol)] = ticker
+                manager.books[(exchange_id, symbol)] = synthetic_book(ticker.last, 20, seed=len(manager.books))
+
+        # One route wide enough to clear fees on every venue pair
+        symbol = TRADING_PAIRS[0]
+        ticker = manager.tickers[(exchange_ids[-1], symbol)]
+        ticker.bid *= 1.02
+        ticker.ask *= 1.02
+        manager.books[(exchange_ids[-1], symbol)] = synthetic_book(ticker.last * 1.02, 20, seed=99)
+
+        finder = ArbitrageFinder(manager)
+        trader = Trader(manager, finder)
+
+        async def cycle():
+            opportunities = await finder.find_opportunities()
+            if opportunities:
+                best = max(opportunities, key=attrgetter('expected_profit_usdt'))
+                await trader.execute_arbitrage(best)
+
+        results.append(await measure_async('cycle.end_to_end', {'latency_ms': latency_ms}, cycle,
+                                           repeat, max_seconds))
+    return results
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _key(result: Dict) -> str:
+    return result['name'] + json.dumps(result['params'], sort_keys=True)
+
+
+def compare(current: Dict, baseline: Dict) -> List[str]:
+    """
+    Format p50 changes against a baseline results file
+
+    Args:
+        current: Results from this run
+        baseline: Results loaded from an earlier run
+
+    Returns:
+        One line per benchmark present in both runs
+    """
+    previous = {_key(result): result for result in baseline['results']}
+    lines = []
+    for result in current['results']:
+        before = previous.get(_key(result))
+        if before is None:
+            continue
+        ratio = result['p50_us'] / before['p50_us'] if before['p50_us'] else float('inf')
+        lines.append(f"{result['name']:<22} {json.dumps(result['params']):<36} "
+                     f"{before['p50_us']:>12.1f}us -> {result['p50_us']:>12.1f}us  x{ratio:.2f}")
+    return lines
+
+
+async def run(suites: List[str], repeat: int, max_seconds: float) -> Dict:
+    """
+    Run the selected benchmark suites
+
+    Args:
+        suites: Any of 'analysis', 'books' and 'cycle'
+        repeat: Maximum samples per benchmark
+        max_seconds: Time budget per benchmark once three samples are taken
+
+    Returns:
+        Results with run metadata, ready to be written as JSON
+    """
+    results = []
+    if 'analysis' in suites:
+        results.extend(bench_analysis(repeat, max_seconds))
+    if 'books' in suites:
+        results.extend(await bench_books(repeat, max_seconds))
+    if 'cycle' in suites:
+        results.extend(await bench_cycle(repeat, max_seconds))
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'timestamp': datetime.utcnow().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'machine': platform.machine()
+        },
+        'results': results
+    }
+
+
+async def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Benchmark the detection and execution hot paths")
+    parser.add_argument('--suite', action='append', choices=['analysis', 'books', 'cycle'],
+                        help="Suite to run (repeatable, default all)")
+    parser.add_argument('--repeat', type=int, default=200, help="Maximum samples per benchmark")
+    parser.add_argument('--max-seconds', type=float, default=2.0, help="Time budget per benchmark")
+    parser.add_argument('--output', default='bench_results.json', help="JSON results file")
+    parser.add_argument('--compare', help="Earlier results file to compare p50 timings against")
+    args = parser.parse_args()
+
+    report = await run(args.suite or ['analysis', 'books', 'cycle'], args.repeat, args.max_seconds)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for result in report['results']:
+        print(f"{result['name']:<22} {json.dumps(result['params']):<36} "
+              f"p50 {result['p50_us']:>12.1f}us  p99 {result['p99_us']:>12.1f}us  ({result['runs']} runs)")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"\nAgainst {baseline['meta'].get('commit')}:")
+        print('\n'.join(compare(report, baseline)))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.CRITICAL)
+    asyncio.run(main())
@@ -27,22 +27,119 @@ EXCHANGES = [
     'kraken'
 ]
 
+# Scan every symbol listed on at least UNIVERSE_MIN_EXCHANGES configured exchanges
+# (from the market cache) in these quote currencies, instead of only TRADING_PAIRS
+UNIVERSE_DISCOVERY = True
+UNIVERSE_MIN_EXCHANGES = 2
+UNIVERSE_QUOTE_CURRENCIES = ['USDT', 'USD', 'USDC']
+UNIVERSE_MAX_SYMBOLS = 500
+
 # Minimum profit threshold for arbitrage (in percentage)
 MIN_PROFIT_THRESHOLD = 0.5
 
 # Maximum trade amount in USDT
 MAX_TRADE_AMOUNT = 1000
 
-# Trading fees for each exchange (in percentage)
+# Evaluate all routes in one batched NumPy pass instead of per-symbol loops
+VECTORIZED_ANALYSIS = True
+
+# Size trades by walking both order books instead of using 24h volume
+DEPTH_AWARE_SIZING = True
+
+# Triangular / multi-leg cycle detection
+TRIANGULAR_ENABLED = True
+CYCLE_CROSS_VENUE = True
+CYCLE_MAX_LEGS = 4
+CYCLE_START_CURRENCIES = ['USDT', 'USD', 'USDC']
+
+# Trading fees for each exchange (in percentage), used until market metadata is loaded
 EXCHANGE_FEES = {
     'binance': 0.1,
     'coinbase': 0.5,
     'kraken': 0.26
 }
 
+# On-disk cache of markets, fee tiers, precision and limits; entries older than
+# the TTL (in seconds) are served while being refreshed in the background
+MARKET_CACHE_PATH = os.getenv('MARKET_CACHE_PATH', '.cache/markets.json')
+MARKET_CACHE_TTL = 24 * 3600
+
 # Time interval for price checks (in seconds)
 CHECK_INTERVAL = 5
 
+# REST polling: refresh each (exchange, symbol) between POLL_MIN_INTERVAL and
+# POLL_MAX_INTERVAL seconds by priority instead of everything every CHECK_INTERVAL
+PRIORITY_POLLING = True
+POLL_MIN_INTERVAL = 0.25
+POLL_MAX_INTERVAL = 60.0
+
+# Priority score weights (summing to 1), the mid-price move per poll (in basis
+# points) and quote volume counted as fully hot/liquid, and the moving-average weight
+POLL_SCORE_WEIGHTS = {'volatility': 0.4, 'hit_rate': 0.4, 'liquidity': 0.2}
+POLL_HOT_VOLATILITY_BPS = 5.0
+POLL_LIQUID_VOLUME = 10_000_000
+POLL_EWMA_ALPHA = 0.2
+
+# Share of each exchange's rate limit (EXCHANGE_RATE_LIMITS refill rate) that polling may use
+POLL_BUDGET_SHARE = 0.5
+
+# Market data source: 'rest' polls tickers, 'stream' reads a WebSocket-fed cache
+MARKET_DATA_MODE = os.getenv('MARKET_DATA_MODE', 'rest')
+
+# WebSocket endpoints for streaming market data
+STREAM_URLS = {
+    'binance': 'wss://stream.binance.com:9443/stream',
+    'coinbase': 'wss://advanced-trade-ws.coinbase.com',
+    'kraken': 'wss://ws.kraken.com/v2'
+}
+
+# Cached quotes older than this (in seconds) are ignored
+STREAM_MAX_AGE = 2.0
+
+# Delay before reconnecting a dropped stream (in seconds)
+STREAM_RECONNECT_DELAY = 1.0
+
+# Maintain local L2 order books from streamed depth updates
+LOCAL_ORDER_BOOKS = True
+
+# In stream mode, evaluate routes on each price update instead of every CHECK_INTERVAL
+EVENT_DRIVEN = True
+
+# Maximum candidates waiting for execution; the stalest is dropped when full
+EVENT_QUEUE_SIZE = 32
+
+# Shard symbol scanning across worker processes when above 1; this process then
+# only coordinates inventory, risk limits and order placement
+SHARD_COUNT = int(os.getenv('SHARD_COUNT', '0'))
+SHARD_SOCKET_PATH = os.getenv('SHARD_SOCKET_PATH', 'arbitrage-shards.sock')
+
+# Market data capture for replay and backtesting
+RECORDER_ENABLED = False
+RECORDER_DIR = 'market_data'
+RECORDER_SEGMENT_BYTES = 64 * 1024 * 1024
+RECORDER_FLUSH_INTERVAL = 1.0
+RECORDER_BOOK_DEPTH = 20
+# Minimum seconds between captures of one locally maintained (streamed) order book
+RECORDER_BOOK_INTERVAL = 0.1
+
+# Run against local simulated venues (see sim_exchange.py) instead of the real exchanges, e.g.
+# SIM_EXCHANGES="sim0=http://127.0.0.1:8800,sim1=http://127.0.0.1:8801". Each entry registers
+# its own venue, served by SimExchangeClient with dummy API keys, and replaces EXCHANGES
+SIM_EXCHANGE_URLS = dict(
+    entry.split('=', 1) for entry in os.getenv('SIM_EXCHANGES', '').split(',') if entry
+)
+if SIM_EXCHANGE_URLS:
+    EXCHANGES = list(SIM_EXCHANGE_URLS)
+
+# Local Prometheus metrics endpoint (http://METRICS_HOST:METRICS_PORT/metrics)
+METRICS_ENABLED = True
+METRICS_HOST = '127.0.0.1'
+METRICS_PORT = 9108
+
+# Latency histogram bucket upper bounds (in seconds)
+METRICS_BUCKETS = [0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+
 # Database configuration
 DB_CONFIG = {
     'host': 'localhost',
@@ -51,6 +148,17 @@ DB_CONFIG = {
     'password': os.getenv('DB_PASSWORD')
 }
 
+# Write-behind persistence of opportunities, orders, trades and stats snapshots
+PERSISTENCE_ENABLED = True
+DB_BACKEND = os.getenv('DB_BACKEND', 'sqlite')  # 'sqlite' (SQLITE_PATH) or 'postgres' (DB_CONFIG)
+SQLITE_PATH = os.getenv('SQLITE_PATH', 'arbitrage.db')
+
+# Rows pending before an early flush, maximum seconds between flushes, and
+# rows held in memory before new ones are dropped
+PERSIST_BATCH_SIZE = 500
+PERSIST_FLUSH_INTERVAL = 1.0
+PERSIST_BUFFER_SIZE = 100000
+
 # Logging configuration
 LOG_CONFIG = {
     'filename': 'arbitrage_bot.log',
@@ -58,16 +166,102 @@ LOG_CONFIG = {
     'format': '%(asctime)s - %(levelname)s - %(message)s'
 }
 
+# Records waiting for the background log writer before new ones are dropped
+LOG_QUEUE_SIZE = 10000
+
+# Minimum seconds between log records for one high-frequency event (per ticker, per route)
+LOG_SAMPLE_INTERVAL = 10.0
+
 # Telegram notification settings
 TELEGRAM_BOT_TOKEN = os.getenv('TELEGRAM_BOT_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
 
+# Execution: send both legs at once from inventory held on both venues
+CONCURRENT_LEGS = True
+LEG_TIMEOUT = 5
+
+# Seconds between background balance reconciliations of the inventory ledger
+INVENTORY_RECONCILE_INTERVAL = 30
+
 # Risk management
 MAX_CONCURRENT_TRADES = 3
 STOP_LOSS_PERCENTAGE = 1.0
 TAKE_PROFIT_PERCENTAGE = 2.0
 
+# Seconds between price checks for open positions
+MONITOR_INTERVAL = 1.0
+
+# Request scheduling (replaces ccxt's built-in throttle when enabled)
+USE_REQUEST_SCHEDULER = True
+
+# Token bucket per exchange: capacity and refill rate in request weight per second
+EXCHANGE_RATE_LIMITS = {
+    'binance': {'capacity': 1200, 'refill_rate': 100},   # 6000 weight / minute
+    'coinbase': {'capacity': 30, 'refill_rate': 10},     # 10 public requests / second
+    'kraken': {'capacity': 15, 'refill_rate': 1},        # counter decays ~1 / second
+    'default': {'capacity': 10, 'refill_rate': 5}
+}
+
+# Request weight per call where the exchange publishes one (default 1)
+REQUEST_WEIGHTS = {
+    'binance': {
+        'fetch_ticker': 2,
+        'fetch_tickers': 40,
+        'fetch_order_book': 5,
+        'fetch_balance': 20,
+        'load_markets': 20,
+        'create_order': 1
+    }
+}
+
+# Share of each bucket that only orders and cancels may consume
+ORDER_RESERVE_RATIO = 0.2
+
 # Network settings
 REQUEST_TIMEOUT = 30
 MAX_RETRIES = 3
-RETRY_DELAY = 5
+
+# Shared keep-alive HTTP session per venue: pool size (overall and per host), seconds an
+# idle connection stays open and seconds a DNS lookup is cached
+HTTP_POOL_SIZE = 20
+HTTP_POOL_PER_HOST = 10
+HTTP_KEEPALIVE = 30
+HTTP_DNS_CACHE_TTL = 300
+
+# Every HTTP_WARMUP_INTERVAL seconds (below HTTP_KEEPALIVE), send HTTP_WARMUP_CONNECTIONS
+# concurrent requests to a cheap public endpoint so pooled connections stay open;
+# simulated venues use their /ping route
+HTTP_WARMUP_INTERVAL = 10
+HTTP_WARMUP_CONNECTIONS = 2
+HTTP_WARMUP_URLS = {
+    'binance': 'https://api.binance.com/api/v3/ping',
+    'coinbase': 'https://api.exchange.coinbase.com/time',
+    'kraken': 'https://api.kraken.com/0/public/Time'
+}
+
+# Retries wait a random delay up to RETRY_BASE_DELAY * 2^attempt, capped at RETRY_MAX_DELAY (in seconds)
+RETRY_BASE_DELAY = 0.1
+RETRY_MAX_DELAY = 2.0
+
+# Per-request timeout is the observed p99 latency times this multiplier, within
+# [MIN_REQUEST_TIMEOUT, REQUEST_TIMEOUT]; REQUEST_TIMEOUT applies until enough samples exist
+TIMEOUT_P99_MULTIPLIER = 3.0
+MIN_REQUEST_TIMEOUT = 0.5
+LATENCY_WINDOW = 200
+LATENCY_MIN_SAMPLES = 20
+
+# Send a duplicate idempotent read when the first is slower than this latency quantile
+HEDGE_READS = False
+HEDGE_QUANTILE = 0.95
+
+# Consecutive transient failures that take an exchange out of evaluation, and seconds before probing it again
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_COOLDOWN = 30
+
+# Exchanges whose orders can be looked up by client order ID, making order retries safe
+CLIENT_ORDER_ID_EXCHANGES = ['binance']
+
+# An order whose outcome is unknown (abandoned after a timeout) is looked up this many
+# times, this many seconds apart, before it is assumed never to have reached the exchange
+ORDER_RESOLVE_ATTEMPTS = 3
+ORDER_RESOLVE_DELAY = 1.0
@@ -0,0 +1,273 @@
+import logging
+import math
+from collections import deque
+from operator import attrgetter
+from typing import Dict, Iterable, List, Optional, Tuple
+from models import CycleOpportunity, Leg, exchange_table, symbol_table
+from config import CYCLE_CROSS_VENUE, CYCLE_MAX_LEGS, CYCLE_START_CURRENCIES, MIN_PROFIT_THRESHOLD
+
+
+class CurrencyGraph:
+    def __init__(self, fees: Dict[str, float], cross_venue: bool = CYCLE_CROSS_VENUE,
+                 max_legs: int = CYCLE_MAX_LEGS, min_profit: float = MIN_PROFIT_THRESHOLD):
+        """
+        Currency graph for triangular and multi-leg arbitrage detection
+
+        Nodes are (exchange, currency) pairs. Each market contributes a sell
+        edge BASE->QUOTE at the bid and a buy edge QUOTE->BASE at 1/ask, with
+        weight -log(rate * (1 - fee)). A negative cycle is a profitable loop.
+        With cross_venue enabled, the same currency on different exchanges is
+        linked by zero-weight edges, modelling pre-positioned inventory.
+        Loops through only two currencies are ignored: across venues they are
+        the pairwise spreads the route scan already reports.
+
+        Args:
+            fees: Trading fee percentage per exchange
+            cross_venue: Link identical currencies across exchanges
+            max_legs: Maximum number of order legs in a reported cycle
+            min_profit: Minimum cycle profit percentage to report
+        """
+        self.fees = fees
+        self.cross_venue = cross_venue
+        self.max_legs = max_legs
+        self.min_profit = min_profit
+        self.logger = logging.getLogger(__name__)
+
+        self.nodes: List[Tuple[str, str]] = []
+        self.node_index: Dict[Tuple[str, str], int] = {}
+        self.adjacency: List[List[int]] = []
+
+        # Edge storage as parallel lists indexed by edge ID
+        self.edge_from: List[int] = []
+        self.edge_to: List[int] = []
+        self.edge_weight: List[float] = []
+        self.edge_rate: List[float] = []
+        self.edge_leg: List[Optional[Tuple[str, str, str]]] = []
+        self.market_edges: Dict[Tuple[str, str], Tuple[int, int]] = {}
+
+        self.distance: List[float] = []
+        self.predecessor: List[int] = []
+        self._touched: set = set()
+        self._stale = True
+
+    def _node(self, exchange_id: str, currency: str) -> int:
+        key = (exchange_id, currency)
+        index = self.node_index.get(key)
+        if index is not None:
+            return index
+
+        index = len(self.nodes)
+        self.nodes.append(key)
+        self.node_index[key] = index
+        self.adjacency.append([])
+        self.distance.append(0.0)
+        self.predecessor.append(-1)
+
+        if self.cross_venue:
+            for other_exchange, other_currency in self.nodes[:-1]:
+                if other_currency == currency and other_exchange != exchange_id:
+                    other = self.node_index[(other_exchange, other_currency)]
+                    self._add_edge(index, other, 1.0, None)
+                    self._add_edge(other, index, 1.0, None)
+        return index
+
+    def _add_edge(self, source: int, target: int, rate: float, leg: Optional[Tuple[str, str, str]]) -> int:
+        edge = len(self.edge_from)
+        self.edge_from.append(source)
+        self.edge_to.append(target)
+        self.edge_rate.append(rate)
+        self.edge_weight.append(-math.log(rate) if rate > 0 else math.inf)
+        self.edge_leg.append(leg)
+        self.adjacency[source].append(edge)
+        return edge
+
+    def add_market(self, exchange_id: str, symbol: str) -> None:
+        """
+        Register a market so its prices can be updated later
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol ('BASE/QUOTE')
+        """
+        if (exchange_id, symbol) in self.market_edges:
+            return
+        base, quote = symbol.split('/')
+        base_node = self._node(exchange_id, base)
+        quote_node = self._node(exchange_id, quote)
+        sell_edge = self._add_edge(base_node, quote_node, 0.0, (exchange_id, symbol, 'sell'))
+        buy_edge = self._add_edge(quote_node, base_node, 0.0, (exchange_id, symbol, 'buy'))
+        self.market_edges[(exchange_id, symbol)] = (sell_edge, buy_edge)
+        self._stale = True
+
+    def add_markets(self, markets: Dict[str, Iterable[str]]) -> None:
+        """
+        Register every market listed per exchange
+
+        Args:
+            markets: Iterable of symbols keyed by exchange ID
+        """
+        for exchange_id, symbols in markets.items():
+            for symbol in symbols:
+                if '/' in symbol:
+                    self.add_market(exchange_id, symbol.split(':')[0])
+
+    def update_market(self, exchange_id: str, symbol: str, bid: Optional[float], ask: Optional[float]) -> None:
+        """
+        Update edge weights for a market from its current top of book
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+            bid: Best bid price
+            ask: Best ask price
+        """
+        if (exchange_id, symbol) not in self.market_edges:
+            self.add_market(exchange_id, symbol)
+        sell_edge, buy_edge = self.market_edges[(exchange_id, symbol)]
+        fee_factor = 1 - self.fees.get(exchange_id, 0.0) / 100
+
+        self._set_rate(sell_edge, bid * fee_factor if bid else 0.0)
+        self._set_rate(buy_edge, fee_factor / ask if ask else 0.0)
+
+    def _set_rate(self, edge: int, rate: float) -> None:
+        weight = -math.log(rate) if rate > 0 else math.inf
+        previous = self.edge_weight[edge]
+        if weight == previous:
+            return
+        self.edge_rate[edge] = rate
+        self.edge_weight[edge] = weight
+
+        target = self.edge_to[edge]
+        if weight > previous and self.predecessor[target] == edge:
+            # A shortest-path tree edge got worse, distances below it are no longer valid
+            self._stale = True
+        self._touched.add(self.edge_from[edge])
+
+    def find_cycles(self) -> List[CycleOpportunity]:
+        """
+        Run SPFA from the nodes touched since the last call and extract negative cycles
+
+        Returns:
+            List of cycle opportunities with executable legs, most profitable first
+        """
+        node_count = len(self.nodes)
+        if node_count == 0:
+            return []
+
+        if self._stale:
+            self.distance = [0.0] * node_count
+            self.predecessor = [-1] * node_count
+            queue = deque(range(node_count))
+            self._stale = False
+        else:
+            queue = deque(self._touched)
+        self._touched = set()
+
+        in_queue = [False] * node_count
+        for node in queue:
+            in_queue[node] = True
+        path_length = [0] * node_count
+        distance = self.distance
+        predecessor = self.predecessor
+        cycle_nodes = set()
+        cycles = []
+
+        while queue:
+            node = queue.popleft()
+            in_queue[node] = False
+            if node in cycle_nodes:
+                continue
+            base_distance = distance[node]
+            for edge in self.adjacency[node]:
+                target = self.edge_to[edge]
+                candidate = base_distance + self.edge_weight[edge]
+                if candidate < distance[target] - 1e-12:
+                    distance[target] = candidate
+                    predecessor[target] = edge
+                    path_length[target] = path_length[node] + 1
+                    if path_length[target] >= node_count:
+                        cycle = self._extract_cycle(target)
+                        if cycle is not None and not self._is_round_trip(cycle):
+                            nodes = {self.edge_from[cycle_edge] for cycle_edge in cycle}
+                            if not cycle_nodes.intersection(nodes):
+                                cycle_nodes.update(nodes)
+                                cycles.append(cycle)
+                        continue
+                    if not in_queue[target]:
+                        in_queue[target] = True
+                        queue.append(target)
+
+        if cycle_nodes:
+            # Distances around a negative cycle are unbounded, start over next time
+            self._stale = True
+
+        opportunities = []
+        for cycle in cycles:
+            opportunity = self._build_opportunity(cycle)
+            if opportunity is not None:
+                opportunities.append(opportunity)
+        opportunities.sort(key=attrgetter('profit_percentage'), reverse=True)
+        return opportunities
+
+    def _extract_cycle(self, node: int) -> Optional[List[int]]:
+        """Walk predecessor edges back from a node and return the cycle's edge IDs"""
+        for _ in range(len(self.nodes)):
+            edge = self.predecessor[node]
+            if edge < 0:
+                return None
+            node = self.edge_from[edge]
+
+        cycle = []
+        start = node
+        while True:
+            edge = self.predecessor[node]
+            if edge < 0:
+                return None
+            cycle.append(edge)
+            node = self.edge_from[edge]
+            if node == start:
+                break
+            if len(cycle) > len(self.nodes):
+                return None
+        cycle.reverse()
+        return cycle
+
+    def _is_round_trip(self, cycle: List[int]) -> bool:
+        """True if a cycle only passes through two currencies, e.g. buy on one venue and sell on another"""
+        return len({self.nodes[self.edge_from[edge]][1] for edge in cycle}) < 3
+
+    def _build_opportunity(self, cycle: List[int]) -> Optional[CycleOpportunity]:
+        """Turn a cycle of edge IDs into an ordered list of executable legs"""
+        total_weight = sum(self.edge_weight[edge] for edge in cycle)
+        if total_weight >= 0:
+            return None
+        profit_percentage = (math.exp(-total_weight) - 1) * 100
+        if profit_percentage < self.min_profit:
+            return None
+
+        # Rotate so the loop starts and ends in a currency we hold for sizing
+        for offset, edge in enumerate(cycle):
+            if self.nodes[self.edge_from[edge]][1] in CYCLE_START_CURRENCIES:
+                cycle = cycle[offset:] + cycle[:offset]
+                break
+
+        legs = []
+        for edge in cycle:
+            source_exchange, source_currency = self.nodes[self.edge_from[edge]]
+            target_exchange, target_currency = self.nodes[self.edge_to[edge]]
+            leg = self.edge_leg[edge]
+            legs.append(Leg(
+                exchange_table.id(leg[0] if leg else target_exchange),
+                symbol_table.id(leg[1]) if leg else -1,
+                leg[2] if leg else 'transfer',
+                exchange_table.id(source_exchange),
+                source_currency,
+                target_currency,
+                self.edge_rate[edge]
+            ))
+
+        order_legs = sum(1 for leg in legs if leg.side != 'transfer')
+        if not order_legs or order_legs > self.max_legs:
+            return None
+
+        return CycleOpportunity(legs, profit_percentage)
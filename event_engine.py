@@ -0,0 +1,112 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Tuple
+from models import AnyOpportunity, Quote
+from execution_dispatcher import route_key
+from config import EVENT_QUEUE_SIZE, TRIANGULAR_ENABLED
+
+
+class EvaluationEngine:
+    def __init__(self, arbitrage_finder, market_data, queue_size: int = EVENT_QUEUE_SIZE):
+        """
+        Event-driven route evaluation fed by streaming market data
+
+        A price update marks its symbol dirty; dirty symbols are re-evaluated
+        once per event loop iteration and qualifying opportunities are pushed
+        onto a bounded queue for the execution stage. Each route holds at most
+        one queue slot: a fresh evaluation of a route that is still waiting
+        replaces its pending candidate in place. When the queue is full the
+        stalest route is dropped, since it is the least likely to still be
+        executable.
+
+        Args:
+            arbitrage_finder: ArbitrageFinder providing route analysis
+            market_data: MarketDataStream whose updates drive evaluation
+            queue_size: Maximum number of routes waiting for execution
+        """
+        self.arbitrage_finder = arbitrage_finder
+        self.market_data = market_data
+        # Route keys in arrival order; the latest candidate per route waits in _pending
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._pending: Dict[Tuple, AnyOpportunity] = {}
+        self.logger = logging.getLogger(__name__)
+
+        self._dirty: Dict[str, int] = {}
+        self._scheduled = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.stats = {
+            'updates': 0,
+            'evaluations': 0,
+            'candidates': 0,
+            'replaced': 0,
+            'dropped': 0,
+            'last_decision_us': 0.0,
+            'max_decision_us': 0.0
+        }
+
+    def start(self) -> None:
+        """Subscribe to market data updates"""
+        self._loop = asyncio.get_running_loop()
+        self.market_data.add_listener(self.on_update)
+
+    def on_update(self, exchange_id: str, symbol: str, quote: Quote) -> None:
+        """
+        Mark a symbol dirty after a price update and schedule evaluation
+
+        Args:
+            exchange_id: ID of the exchange that updated
+            symbol: Trading pair symbol
+            quote: Updated top-of-book quote
+        """
+        self.stats['updates'] += 1
+        # Keep the oldest pending update time so decision latency is not understated
+        self._dirty.setdefault(symbol, quote.received_ns or time.monotonic_ns())
+        if TRIANGULAR_ENABLED:
+            self.arbitrage_finder.update_graph(exchange_id, symbol, quote.bid, quote.ask)
+        if not self._scheduled:
+            self._scheduled = True
+            self._loop.call_soon(self._evaluate_dirty)
+
+    def _evaluate_dirty(self) -> None:
+        """Re-evaluate routes for every symbol updated since the last pass"""
+        self._scheduled = False
+        dirty, self._dirty = self._dirty, {}
+        finder = self.arbitrage_finder
+
+        for symbol, received_ns in dirty.items():
+            exchange_prices = self.market_data.get_tickers(symbol)
+            if len(exchange_prices) < 2:
+                continue
+            self.stats['evaluations'] += 1
+            for opportunity in finder.analyze_symbol(symbol, exchange_prices):
+                self._push(opportunity)
+            self._record_latency(received_ns)
+
+        if TRIANGULAR_ENABLED and dirty:
+            for cycle in finder.find_cycles({}):
+                self._push(cycle)
+
+    def _push(self, opportunity: AnyOpportunity) -> None:
+        """Queue a candidate, replacing its route's pending one or dropping the stalest route if full"""
+        self.stats['candidates'] += 1
+        key = route_key(opportunity)
+        if key in self._pending:
+            self._pending[key] = opportunity
+            self.stats['replaced'] += 1
+            return
+        if self.queue.full():
+            del self._pending[self.queue.get_nowait()]
+            self.stats['dropped'] += 1
+        self.queue.put_nowait(key)
+        self._pending[key] = opportunity
+
+    def _record_latency(self, received_ns: int) -> None:
+        elapsed = (time.monotonic_ns() - received_ns) / 1e3
+        self.stats['last_decision_us'] = elapsed
+        if elapsed > self.stats['max_decision_us']:
+            self.stats['max_decision_us'] = elapsed
+
+    async def next_opportunity(self) -> AnyOpportunity:
+        """Wait for the next candidate to execute"""
+        return self._pending.pop(await self.queue.get())
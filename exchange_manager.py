@@ -1,37 +1,398 @@
-import ccxt
 import asyncio
 import logging
-from typing import Dict, List, Optional
-from config import EXCHANGE_FEES, REQUEST_TIMEOUT, MAX_RETRIES, RETRY_DELAY
+import sys
+import time
+import uuid
+from collections.abc import Mapping
+from contextlib import asynccontextmanager
+from typing import Awaitable, Callable, Dict, List, Optional, Set
+from aiohttp import ClientError
+from config import (
+    REQUEST_TIMEOUT, MAX_RETRIES,
+    USE_REQUEST_SCHEDULER, REQUEST_WEIGHTS, SIM_EXCHANGE_URLS,
+    HEDGE_READS, HEDGE_QUANTILE, CLIENT_ORDER_ID_EXCHANGES, ORDER_RESOLVE_ATTEMPTS, ORDER_RESOLVE_DELAY,
+    HTTP_WARMUP_INTERVAL, HTTP_WARMUP_CONNECTIONS, HTTP_WARMUP_URLS
+)
+from request_scheduler import (
+    RequestScheduler, PRIORITY_ORDER, PRIORITY_VERIFY, PRIORITY_MARKET_DATA
+)
+from market_data import MarketDataStream, BinanceFeedAdapter
+from order_book import OrderBookManager
+from tick_recorder import TickRecorder
+from sim_exchange import SimExchangeClient
+from metrics import metrics
+from models import Fill, Quote, exchange_table, symbol_table
+from persistence import TradeStore
+from http_pool import HttpPool
+from market_metadata import MarketMetadata, floor_to_step, round_to_step
+from log_pipeline import LogSampler
+from resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, backoff_delay, hedged
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    True for failures that say nothing about the request itself (network errors,
+    timeouts, outages), which are worth retrying and count against venue health
+    
+    Exchange errors such as insufficient funds or invalid orders are final,
+    and so is anything else, such as a programming error.
+    """
+    if isinstance(error, (asyncio.TimeoutError, OSError, ClientError)):
+        return True
+    # ccxt is imported with the first real client; without it the error cannot be a ccxt network error
+    ccxt = sys.modules.get('ccxt')
+    return ccxt is not None and isinstance(error, ccxt.NetworkError)
+
+
+class ClientPool(Mapping):
+    def __init__(self, exchange_ids: List[str], factory: Callable[[str], object]):
+        """
+        Exchange clients keyed by exchange ID, each constructed on first access
+        
+        Iterating and membership tests only use the configured IDs, so
+        listing exchanges never builds a client.
+        
+        Args:
+            exchange_ids: Configured exchange IDs
+            factory: Callable building the client for an exchange ID
+        """
+        self.exchange_ids = list(exchange_ids)
+        self.factory = factory
+        self.built: Dict[str, object] = {}
+
+    def __getitem__(self, exchange_id: str):
+        client = self.built.get(exchange_id)
+        if client is None:
+            if exchange_id not in self.exchange_ids:
+                raise KeyError(exchange_id)
+            client = self.built[exchange_id] = self.factory(exchange_id)
+        return client
+
+    def __contains__(self, exchange_id) -> bool:
+        return exchange_id in self.exchange_ids
+
+    def __iter__(self):
+        return iter(self.exchange_ids)
+
+    def __len__(self) -> int:
+        return len(self.exchange_ids)
+
 
 class ExchangeManager:
-    def __init__(self, exchange_ids: List[str], api_keys: Dict[str, Dict[str, str]]):
+    def __init__(self, exchange_ids: List[str], api_keys: Dict[str, Dict[str, str]], rate_share: float = 1.0):
         """
         Initialize exchange connections with API keys
         
+        Clients are built on first use, and seeded from the on-disk market
+        cache so they never call load_markets() on the startup path. Each
+        venue's client sends its requests through a keep-alive session owned
+        here, which start_warmup() keeps connected between requests.
+        
         Args:
             exchange_ids: List of exchange IDs to connect to
             api_keys: Dictionary of API keys for each exchange
+            rate_share: Fraction of each venue's rate limit this process may
+                use, below 1 when shard processes share the venues
         """
-        self.exchanges = {}
+        self.api_keys = api_keys
+        self.rate_share = rate_share
+        warmup_urls = dict(HTTP_WARMUP_URLS)
+        warmup_urls.update({exchange_id: url.rstrip('/') + '/ping' for exchange_id, url in SIM_EXCHANGE_URLS.items()})
+        self.http = HttpPool(exchange_ids, warmup_urls)
+        self._warmup_task: Optional[asyncio.Task] = None
+        self.exchanges = ClientPool(exchange_ids, self._build_client)
+        self.metadata = MarketMetadata()
+        self.metadata.load()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.market_data: Optional[MarketDataStream] = None
+        self.order_books: Optional[OrderBookManager] = None
+        self.scheduler = RequestScheduler(exchange_ids, share=rate_share) if USE_REQUEST_SCHEDULER else None
+        self.recorder: Optional[TickRecorder] = None
+        self.store: Optional[TradeStore] = None
         self.logger = logging.getLogger(__name__)
+        # Per-request failures can repeat every cycle; log each (exchange, method) at most once per interval
+        self.sampled = LogSampler(self.logger)
+        self.breakers = {exchange_id: CircuitBreaker(exchange_id) for exchange_id in exchange_ids}
+        self.latency: Dict[tuple, LatencyTracker] = {}
+
+    def _build_client(self, exchange_id: str):
+        """Construct the client for an exchange, importing ccxt on first use"""
+        try:
+            if exchange_id in SIM_EXCHANGE_URLS:
+                self.logger.info("Using simulated %s at %s", exchange_id, SIM_EXCHANGE_URLS[exchange_id])
+                return SimExchangeClient({
+                    'id': exchange_id,
+                    'url': SIM_EXCHANGE_URLS[exchange_id],
+                    'timeout': REQUEST_TIMEOUT * 1000,
+                    'session': self.http.session(exchange_id)
+                })
+            import ccxt.async_support as ccxt
+            exchange_class = getattr(ccxt, exchange_id)
+            config = {
+                'apiKey': self.api_keys[exchange_id]['api_key'],
+                'secret': self.api_keys[exchange_id]['secret_key'],
+                'timeout': REQUEST_TIMEOUT * 1000,  # Convert to milliseconds
+                'enableRateLimit': not USE_REQUEST_SCHEDULER
+            }
+            session = self.http.session(exchange_id)
+            if session is not None:
+                # ccxt leaves a session it was given open on close()
+                config['session'] = session
+            exchange = exchange_class(config)
+            # ccxt's own throttle spaces requests rateLimit milliseconds apart
+            exchange.rateLimit /= self.rate_share
+            markets = self.metadata.markets(exchange_id)
+            if markets:
+                exchange.set_markets(list(markets.values()))
+            self.logger.info("Successfully connected to %s", exchange_id)
+            return exchange
+        except Exception as e:
+            self.logger.error("Failed to connect to %s: %s", exchange_id, e)
+            raise
+
+    async def prepare_markets(self) -> None:
+        """
+        Make market metadata available before the first evaluation
+        
+        Exchanges missing from the cache are loaded now; exchanges whose
+        cache entry is past its TTL keep serving it while a background task
+        refreshes them.
+        """
+        stale = self.metadata.stale(list(self.exchanges))
+        missing = [exchange_id for exchange_id in stale if self.metadata.markets(exchange_id) is None]
+        if missing:
+            await self.refresh_markets(missing)
+        expired = [exchange_id for exchange_id in stale if exchange_id not in missing]
+        if expired:
+            self._refresh_task = asyncio.create_task(self.refresh_markets(expired))
+
+    def listed_symbols(self) -> Dict[str, List[str]]:
+        """Symbols each exchange lists according to the market cache (empty when not cached)"""
+        return {exchange_id: self.metadata.symbols(exchange_id) for exchange_id in self.exchanges}
+
+    async def refresh_markets(self, exchange_ids: List[str]) -> None:
+        """
+        Load markets, precision, limits and fee tiers from the exchanges and rewrite the cache
         
+        Args:
+            exchange_ids: Exchanges to refresh
+        """
+        updated = False
         for exchange_id in exchange_ids:
+            exchange = self.exchanges[exchange_id]
+            if not hasattr(exchange, 'load_markets'):
+                continue
             try:
-                exchange_class = getattr(ccxt, exchange_id)
-                exchange = exchange_class({
-                    'apiKey': api_keys[exchange_id]['api_key'],
-                    'secret': api_keys[exchange_id]['secret_key'],
-                    'timeout': REQUEST_TIMEOUT * 1000,  # Convert to milliseconds
-                    'enableRateLimit': True
-                })
-                self.exchanges[exchange_id] = exchange
-                self.logger.info(f"Successfully connected to {exchange_id}")
+                markets = await self._request(exchange_id, 'load_markets', PRIORITY_VERIFY,
+                                              lambda: exchange.load_markets(True))
+                trading_fees = None
+                if exchange.has.get('fetchTradingFees') and self.api_keys.get(exchange_id, {}).get('api_key'):
+                    trading_fees = await self._request(exchange_id, 'fetch_trading_fees', PRIORITY_VERIFY,
+                                                       exchange.fetch_trading_fees)
             except Exception as e:
-                self.logger.error(f"Failed to connect to {exchange_id}: {str(e)}")
+                self.logger.error("Failed to load markets for %s: %s", exchange_id, e)
+                continue
+            self.metadata.update(exchange_id, markets, exchange.precisionMode,
+                                 exchange.fees.get('trading', {}), trading_fees)
+            self.logger.info("Loaded %s markets for %s", len(markets), exchange_id)
+            updated = True
+        if updated:
+            await asyncio.get_running_loop().run_in_executor(None, self.metadata.save)
+
+    async def start_warmup(self) -> None:
+        """
+        Open every venue's connections now and keep them open in the background
+        
+        Without this the first request after startup, or after the pool's
+        keep-alive expires, pays DNS, TCP and TLS setup, typically just as
+        an opportunity needs its orders sent.
+        """
+        await self.warm_connections()
+        if self._warmup_task is None:
+            self._warmup_task = asyncio.create_task(self._run_warmup())
+
+    async def warm_connections(self) -> None:
+        """Ping every available venue that has a warm-up URL"""
+        unavailable = self.unavailable_exchanges()
+        await asyncio.gather(*(
+            self._warm(exchange_id) for exchange_id, venue in self.http.venues.items()
+            if venue.warmup_url and exchange_id not in unavailable
+        ))
+
+    async def _run_warmup(self) -> None:
+        while True:
+            await asyncio.sleep(HTTP_WARMUP_INTERVAL)
+            await self.warm_connections()
+
+    async def _warm(self, exchange_id: str) -> None:
+        """Concurrent pings, so that HTTP_WARMUP_CONNECTIONS pooled connections are opened or refreshed"""
+        venue = self.http.venues[exchange_id]
+
+        async def ping() -> None:
+            async with self._slot(exchange_id, PRIORITY_MARKET_DATA, 'ping'):
+                await venue.ping()
+
+        results = await asyncio.gather(*(ping() for _ in range(HTTP_WARMUP_CONNECTIONS)), return_exceptions=True)
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            self.sampled.log(logging.WARNING, (exchange_id, 'ping', 'failed'),
+                             "Connection warm-up failed on %s: %s", exchange_id, errors[0])
+
+    @asynccontextmanager
+    async def _slot(self, exchange_id: str, priority: int, method: str):
+        """
+        Admission context for one request through the exchange's scheduler
+        
+        Records the scheduler wait and the request latency, and counts
+        requests that raise.
+        
+        Args:
+            exchange_id: ID of the exchange
+            priority: Scheduler lane (PRIORITY_* constant)
+            method: ccxt method name used to look up the request weight
+        """
+        if self.scheduler is not None:
+            weight = REQUEST_WEIGHTS.get(exchange_id, {}).get(method, 1)
+            waited = await self.scheduler.acquire(exchange_id, priority, weight)
+            metrics.observe('rate_limit_wait_seconds', waited, exchange=exchange_id)
+        started = time.monotonic()
+        try:
+            yield
+        except Exception:
+            metrics.inc('exchange_request_errors_total', exchange=exchange_id, method=method)
+            raise
+        finally:
+            metrics.observe('exchange_request_seconds', time.monotonic() - started,
+                            exchange=exchange_id, method=method)
+
+    async def _request(self, exchange_id: str, method: str, priority: int,
+                       call: Callable[[], Awaitable], hedge: bool = False, retries: int = MAX_RETRIES,
+                       adaptive_timeout: bool = True):
+        """
+        Call an exchange with adaptive timeouts, jittered backoff and its circuit breaker
+        
+        Each attempt times out at a multiple of the observed p99 for the
+        (exchange, method). Transient failures are retried and count against
+        the exchange's breaker; exchange errors are raised immediately.
+        
+        Args:
+            exchange_id: ID of the exchange
+            method: ccxt method name, for weights, latency tracking and metrics
+            priority: Scheduler lane (PRIORITY_* constant)
+            call: Coroutine function performing the request
+            hedge: Send a duplicate when the first attempt is slow (idempotent reads only)
+            retries: Maximum number of attempts
+            adaptive_timeout: Bound each attempt by the adaptive timeout; when
+                False only the client's own REQUEST_TIMEOUT applies
+            
+        Returns:
+            Result of the call
+            
+        Raises:
+            CircuitOpenError: If the exchange's breaker is open
+        """
+        breaker = self.breakers[exchange_id]
+        tracker = self.latency.get((exchange_id, method))
+        if tracker is None:
+            tracker = self.latency[(exchange_id, method)] = LatencyTracker()
+
+        for attempt in range(retries):
+            if not breaker.allow():
+                raise CircuitOpenError(f"Circuit breaker open for {exchange_id}")
+            try:
+                hedge_delay = tracker.quantile(HEDGE_QUANTILE) if hedge and HEDGE_READS else None
+                if hedge_delay is None:
+                    result = await self._attempt(exchange_id, method, priority, call, tracker, adaptive_timeout)
+                else:
+                    result = await hedged(
+                        lambda: self._attempt(exchange_id, method, priority, call, tracker, adaptive_timeout),
+                        hedge_delay
+                    )
+                self._record_health(breaker, True)
+                return result
+            except asyncio.CancelledError:
+                # Says nothing about the venue, but must not keep holding a half-open probe
+                breaker.release()
                 raise
+            except Exception as e:
+                # The venue answered, so a non-transient error still proves it is reachable
+                self._record_health(breaker, not is_transient(e))
+                if not is_transient(e) or attempt == retries - 1:
+                    raise
+                self.sampled.warning((exchange_id, method), "Attempt %s of %s failed on %s: %s",
+                                     attempt + 1, method, exchange_id, e)
+                metrics.inc('exchange_retries_total', exchange=exchange_id, method=method)
+                await asyncio.sleep(backoff_delay(attempt))
+
+    async def _attempt(self, exchange_id: str, method: str, priority: int,
+                       call: Callable[[], Awaitable], tracker: LatencyTracker, adaptive_timeout: bool = True):
+        """One scheduled request, bounded by the tracker's adaptive timeout unless disabled"""
+        async with self._slot(exchange_id, priority, method):
+            started = time.monotonic()
+            result = await asyncio.wait_for(call(), tracker.timeout() if adaptive_timeout else None)
+        tracker.record(time.monotonic() - started)
+        return result
 
-    async def get_ticker(self, exchange_id: str, symbol: str) -> Optional[Dict]:
+    def _record_health(self, breaker: CircuitBreaker, healthy: bool) -> None:
+        """Update a breaker and log when it opens or closes"""
+        was_available = breaker.available
+        if healthy:
+            breaker.record_success()
+        else:
+            breaker.record_failure()
+        if was_available != breaker.available:
+            if breaker.available:
+                self.logger.info("Circuit breaker closed for %s", breaker.exchange_id)
+            else:
+                self.logger.error("Circuit breaker opened for %s after %s failures, removing it from evaluation",
+                                  breaker.exchange_id, breaker.failures)
+            metrics.set_gauge('circuit_open', 0 if breaker.available else 1, exchange=breaker.exchange_id)
+
+    def start_recording(self, directory: str) -> TickRecorder:
+        """
+        Capture every ticker and order book the bot sees into binary segments
+        
+        Call before start_streaming so streamed quotes are captured as well.
+        
+        Args:
+            directory: Directory for segment files and their index
+            
+        Returns:
+            The running TickRecorder
+        """
+        self.recorder = TickRecorder(directory)
+        return self.recorder
+
+    async def start_streaming(self, symbols: List[str], transport_factory=None,
+                              local_books: bool = False) -> MarketDataStream:
+        """
+        Start push-based market data for all connected exchanges
+        
+        Args:
+            symbols: Trading pair symbols to subscribe to
+            transport_factory: Optional callable returning a FeedTransport per exchange
+            local_books: Also maintain local L2 order books from depth diffs
+            
+        Returns:
+            The running MarketDataStream
+        """
+        adapters = {'binance': BinanceFeedAdapter(depth=local_books)}
+        urls = {}
+        # Simulated venues publish Binance-style bookTicker frames without depth diffs
+        for exchange_id, url in SIM_EXCHANGE_URLS.items():
+            adapters[exchange_id] = BinanceFeedAdapter()
+            urls[exchange_id] = url.replace('http', 'ws', 1).rstrip('/') + '/ws'
+        self.market_data = MarketDataStream(list(self.exchanges.keys()), symbols,
+                                            transport_factory, urls=urls, adapters=adapters)
+        if local_books:
+            self.order_books = OrderBookManager(self)
+            self.market_data.add_depth_listener(self.order_books.handle_diff)
+        if self.recorder:
+            self.market_data.add_listener(self.recorder.record_ticker)
+        await self.market_data.start()
+        return self.market_data
+
+    async def get_ticker(self, exchange_id: str, symbol: str) -> Optional[Quote]:
         """
         Get current ticker data for a symbol from an exchange
         
@@ -40,30 +401,86 @@ class ExchangeManager:
             symbol: Trading pair symbol
             
         Returns:
-            Dictionary containing ticker data or None if failed
+            Quote or None if failed
         """
         exchange = self.exchanges.get(exchange_id)
         if not exchange:
-            self.logger.error(f"Exchange {exchange_id} not found")
+            self.logger.error("Exchange %s not found", exchange_id)
             return None
 
-        for attempt in range(MAX_RETRIES):
-            try:
-                ticker = await exchange.fetch_ticker(symbol)
-                return {
-                    'bid': ticker['bid'],
-                    'ask': ticker['ask'],
-                    'last': ticker['last'],
-                    'volume': ticker['baseVolume'],
-                    'timestamp': ticker['timestamp']
-                }
-            except Exception as e:
-                self.logger.warning(f"Attempt {attempt + 1} failed for {exchange_id} {symbol}: {str(e)}")
-                if attempt < MAX_RETRIES - 1:
-                    await asyncio.sleep(RETRY_DELAY)
-                else:
-                    self.logger.error(f"Failed to get ticker for {exchange_id} {symbol} after {MAX_RETRIES} attempts")
-                    return None
+        try:
+            ticker = await self._request(exchange_id, 'fetch_ticker', PRIORITY_MARKET_DATA,
+                                         lambda: exchange.fetch_ticker(symbol), hedge=True)
+        except Exception as e:
+            self.sampled.log(logging.ERROR, (exchange_id, 'fetch_ticker', 'failed'),
+                             "Failed to get ticker for %s %s: %s", exchange_id, symbol, e)
+            return None
+
+        result = self._format_ticker(exchange_id, symbol, ticker)
+        if self.recorder:
+            self.recorder.record_ticker(exchange_id, symbol, result)
+        return result
+
+    async def get_tickers(self, exchange_id: str, symbols: List[str]) -> Dict[str, Quote]:
+        """
+        Get ticker data for several symbols from an exchange in as few requests as possible
+        
+        Uses a single bulk fetch_tickers call where the exchange supports it and
+        falls back to concurrent per-symbol requests otherwise. Symbols the
+        exchange does not list are skipped, since one unknown symbol fails a
+        whole bulk call.
+        
+        Args:
+            exchange_id: ID of the exchange
+            symbols: Trading pair symbols
+            
+        Returns:
+            Quotes keyed by symbol (missing symbols are omitted)
+        """
+        exchange = self.exchanges.get(exchange_id)
+        if not exchange:
+            self.logger.error("Exchange %s not found", exchange_id)
+            return {}
+        if exchange.markets:
+            symbols = [symbol for symbol in symbols if symbol in exchange.markets]
+            if not symbols:
+                return {}
+
+        if not exchange.has.get('fetchTickers'):
+            results = await asyncio.gather(*(self.get_ticker(exchange_id, symbol) for symbol in symbols))
+            return {symbol: ticker for symbol, ticker in zip(symbols, results) if ticker}
+
+        try:
+            tickers = await self._request(exchange_id, 'fetch_tickers', PRIORITY_MARKET_DATA,
+                                          lambda: exchange.fetch_tickers(symbols), hedge=True)
+        except Exception as e:
+            self.sampled.log(logging.ERROR, (exchange_id, 'fetch_tickers', 'failed'),
+                             "Failed to get tickers for %s: %s", exchange_id, e)
+            return {}
+
+        result = {
+            symbol: self._format_ticker(exchange_id, symbol, tickers[symbol])
+            for symbol in symbols if symbol in tickers
+        }
+        if self.recorder:
+            for symbol, ticker in result.items():
+                self.recorder.record_ticker(exchange_id, symbol, ticker)
+        return result
+
+    def _format_ticker(self, exchange_id: str, symbol: str, ticker: Dict) -> Quote:
+        """Reduce a ccxt ticker to the fields used by the bot"""
+        return Quote(
+            exchange_table.id(exchange_id),
+            symbol_table.id(symbol),
+            ticker['bid'],
+            ticker['ask'],
+            ticker['last'],
+            ticker['baseVolume'],
+            ticker.get('bidVolume'),
+            ticker.get('askVolume'),
+            ticker['timestamp'],
+            time.monotonic_ns()
+        )
 
     async def get_order_book(self, exchange_id: str, symbol: str, limit: int = 20) -> Optional[Dict]:
         """
@@ -79,24 +496,49 @@ class ExchangeManager:
         """
         exchange = self.exchanges.get(exchange_id)
         if not exchange:
-            self.logger.error(f"Exchange {exchange_id} not found")
+            self.logger.error("Exchange %s not found", exchange_id)
             return None
 
-        for attempt in range(MAX_RETRIES):
-            try:
-                order_book = await exchange.fetch_order_book(symbol, limit)
-                return {
-                    'bids': order_book['bids'],
-                    'asks': order_book['asks'],
-                    'timestamp': order_book['timestamp']
-                }
-            except Exception as e:
-                self.logger.warning(f"Attempt {attempt + 1} failed for {exchange_id} {symbol} order book: {str(e)}")
-                if attempt < MAX_RETRIES - 1:
-                    await asyncio.sleep(RETRY_DELAY)
-                else:
-                    self.logger.error(f"Failed to get order book for {exchange_id} {symbol} after {MAX_RETRIES} attempts")
-                    return None
+        try:
+            order_book = await self._request(exchange_id, 'fetch_order_book', PRIORITY_VERIFY,
+                                             lambda: exchange.fetch_order_book(symbol, limit), hedge=True)
+        except Exception as e:
+            self.sampled.log(logging.ERROR, (exchange_id, 'fetch_order_book', 'failed'),
+                             "Failed to get order book for %s %s: %s", exchange_id, symbol, e)
+            return None
+
+        result = {
+            'bids': order_book['bids'],
+            'asks': order_book['asks'],
+            'timestamp': order_book['timestamp'],
+            'nonce': order_book.get('nonce')
+        }
+        if self.recorder:
+            self.recorder.record_order_book(exchange_id, symbol, result)
+        return result
+
+    async def get_balances(self, exchange_id: str) -> Optional[Dict[str, float]]:
+        """
+        Get free balances for every currency on an exchange
+        
+        Args:
+            exchange_id: ID of the exchange
+            
+        Returns:
+            Dictionary of free balance keyed by currency or None if failed
+        """
+        exchange = self.exchanges.get(exchange_id)
+        if not exchange:
+            self.logger.error("Exchange %s not found", exchange_id)
+            return None
+
+        try:
+            balance = await self._request(exchange_id, 'fetch_balance', PRIORITY_VERIFY, exchange.fetch_balance)
+        except Exception as e:
+            self.sampled.log(logging.ERROR, (exchange_id, 'fetch_balance', 'failed'),
+                             "Failed to get balances for %s: %s", exchange_id, e)
+            return None
+        return {currency: amount or 0.0 for currency, amount in balance.get('free', {}).items()}
 
     async def get_balance(self, exchange_id: str, currency: str) -> Optional[float]:
         """
@@ -111,25 +553,31 @@ class ExchangeManager:
         """
         exchange = self.exchanges.get(exchange_id)
         if not exchange:
-            self.logger.error(f"Exchange {exchange_id} not found")
+            self.logger.error("Exchange %s not found", exchange_id)
             return None
 
-        for attempt in range(MAX_RETRIES):
-            try:
-                balance = await exchange.fetch_balance()
-                return balance.get(currency, {}).get('free', 0.0)
-            except Exception as e:
-                self.logger.warning(f"Attempt {attempt + 1} failed to get {currency} balance on {exchange_id}: {str(e)}")
-                if attempt < MAX_RETRIES - 1:
-                    await asyncio.sleep(RETRY_DELAY)
-                else:
-                    self.logger.error(f"Failed to get balance for {exchange_id} {currency} after {MAX_RETRIES} attempts")
-                    return None
+        try:
+            balance = await self._request(exchange_id, 'fetch_balance', PRIORITY_VERIFY, exchange.fetch_balance)
+        except Exception as e:
+            self.sampled.log(logging.ERROR, (exchange_id, 'fetch_balance', 'failed'),
+                             "Failed to get balance for %s %s: %s", exchange_id, currency, e)
+            return None
+        return balance.get(currency, {}).get('free', 0.0)
 
-    async def place_order(self, exchange_id: str, symbol: str, order_type: str, side: str, amount: float, price: Optional[float] = None) -> Optional[Dict]:
+    def new_client_order_id(self, exchange_id: str) -> Optional[str]:
+        """Fresh client order ID for an exchange in CLIENT_ORDER_ID_EXCHANGES, otherwise None"""
+        return f"arb{uuid.uuid4().hex}" if exchange_id in CLIENT_ORDER_ID_EXCHANGES else None
+
+    async def place_order(self, exchange_id: str, symbol: str, order_type: str, side: str, amount: float,
+                          price: Optional[float] = None, client_order_id: Optional[str] = None) -> Optional[Fill]:
         """
         Place an order on an exchange
         
+        The order is retried only on exchanges in CLIENT_ORDER_ID_EXCHANGES:
+        every attempt carries the same client order ID, and before resending
+        the exchange is asked for that ID, so a retry happens only once the
+        exchange confirms the earlier attempt never arrived.
+        
         Args:
             exchange_id: ID of the exchange
             symbol: Trading pair symbol
@@ -137,59 +585,222 @@ class ExchangeManager:
             side: Order side ('buy' or 'sell')
             amount: Order amount
             price: Order price (required for limit orders)
+            client_order_id: ID from new_client_order_id(), so the caller can
+                resolve the order if it stops waiting; generated when None
             
         Returns:
-            Dictionary containing order details or None if failed
+            Fill or None if failed
         """
         exchange = self.exchanges.get(exchange_id)
         if not exchange:
-            self.logger.error(f"Exchange {exchange_id} not found")
+            self.logger.error("Exchange %s not found", exchange_id)
+            return None
+        if order_type == 'limit' and price is None:
+            self.logger.error("Price is required for limit orders")
             return None
 
-        for attempt in range(MAX_RETRIES):
+        info = self.metadata.get(exchange_id, symbol)
+        if info is not None:
+            amount = floor_to_step(amount, info.amount_step)
+            if price is not None:
+                price = round_to_step(price, info.price_step)
+            reason = self.metadata.check_order(exchange_id, symbol, amount, price)
+            if reason:
+                self.logger.error("Order for %s on %s rejected locally: %s", symbol, exchange_id, reason)
+                return None
+
+        if client_order_id is None:
+            client_order_id = self.new_client_order_id(exchange_id)
+        params = {'clientOrderId': client_order_id} if client_order_id else {}
+
+        def create():
+            if order_type == 'limit':
+                return exchange.create_limit_order(symbol, side, amount, price, params=params)
+            return exchange.create_market_order(symbol, side, amount, params=params)
+
+        attempts = MAX_RETRIES if client_order_id else 1
+        since = int(time.time() * 1000)
+        sent = time.monotonic_ns()
+        fill = None
+        for attempt in range(attempts):
             try:
-                if order_type == 'limit':
-                    if price is None:
-                        raise ValueError("Price is required for limit orders")
-                    order = await exchange.create_limit_order(symbol, side, amount, price)
-                else:
-                    order = await exchange.create_market_order(symbol, side, amount)
-                
-                return {
-                    'id': order['id'],
-                    'symbol': order['symbol'],
-                    'type': order['type'],
-                    'side': order['side'],
-                    'amount': order['amount'],
-                    'price': order.get('price'),
-                    'status': order['status'],
-                    'timestamp': order['timestamp']
-                }
+                order = None
+                if attempt > 0:
+                    order = await self._lookup_order(exchange_id, symbol, client_order_id)
+                if order is None:
+                    # No adaptive timeout: abandoning an accepted order would leave it live but reported as failed
+                    order = await self._request(exchange_id, 'create_order', PRIORITY_ORDER, create, retries=1,
+                                                adaptive_timeout=False)
+                fill = self._to_fill(exchange_id, order, client_order_id)
+                break
             except Exception as e:
-                self.logger.warning(f"Attempt {attempt + 1} failed to place order on {exchange_id}: {str(e)}")
-                if attempt < MAX_RETRIES - 1:
-                    await asyncio.sleep(RETRY_DELAY)
-                else:
-                    self.logger.error(f"Failed to place order on {exchange_id} after {MAX_RETRIES} attempts")
+                if attempt < attempts - 1 and is_transient(e):
+                    self.logger.warning("Attempt %s failed to place order %s on %s: %s",
+                                        attempt + 1, client_order_id, exchange_id, e)
+                    metrics.inc('exchange_retries_total', exchange=exchange_id, method='create_order')
+                    await asyncio.sleep(backoff_delay(attempt))
+                    continue
+                if is_transient(e):
+                    # The request may have reached the exchange before the connection failed or timed out
+                    try:
+                        fill = await self.resolve_order(exchange_id, symbol, side, client_order_id, since)
+                    except Exception as lookup_error:
+                        self.logger.error("Order on %s may be live, lookup failed: %s", exchange_id, lookup_error)
+                if fill is None:
+                    self.logger.error("Failed to place order on %s after %s attempts: %s", exchange_id, attempt + 1, e)
+                    if self.store:
+                        self.store.record_order(exchange_id, symbol, order_type, side, amount, price, None,
+                                                (time.monotonic_ns() - sent) / 1e6)
                     return None
+                break
 
-    def get_trading_fee(self, exchange_id: str) -> float:
+        if self.store:
+            self.store.record_order(exchange_id, symbol, order_type, side, amount, price, fill,
+                                    (time.monotonic_ns() - sent) / 1e6)
+        return fill
+
+    def _to_fill(self, exchange_id: str, order: Dict, client_order_id: Optional[str] = None) -> Fill:
+        """Convert a ccxt order to a Fill priced at its average fill price where reported"""
+        # Market orders carry no limit price; the average, or cost over filled amount, is what was paid
+        price = order.get('average') or order.get('price')
+        if price is None and order.get('cost') and order.get('filled'):
+            price = order['cost'] / order['filled']
+        return Fill(
+            order['id'],
+            exchange_table.id(exchange_id),
+            symbol_table.id(order['symbol']),
+            order['type'],
+            order['side'],
+            order['amount'],
+            price,
+            order['status'],
+            order['timestamp'],
+            client_order_id
+        )
+
+    async def resolve_order(self, exchange_id: str, symbol: str, side: str, client_order_id: Optional[str],
+                            since: int) -> Optional[Fill]:
         """
-        Get trading fee for an exchange
+        Find an order whose placement outcome is unknown, such as one abandoned after a timeout
+        
+        The order is looked up by client order ID where the exchange supports
+        it, otherwise matched by symbol and side among open orders and own
+        trades since it was sent; the dispatcher never runs two trades
+        spending the same inventory, so at most one such order is ours. A
+        request already on the wire can still arrive after it was abandoned,
+        so the exchange is checked ORDER_RESOLVE_ATTEMPTS times,
+        ORDER_RESOLVE_DELAY seconds apart, before the order counts as absent.
         
         Args:
             exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+            side: Order side ('buy' or 'sell')
+            client_order_id: Client order ID sent with the order, if any
+            since: Epoch milliseconds shortly before the order was sent
+            
+        Returns:
+            Fill for the order, or None if the exchange shows no such order
+            
+        Raises:
+            Exception: If the exchange cannot be queried, so the state is still unknown
+        """
+        for attempt in range(ORDER_RESOLVE_ATTEMPTS):
+            if attempt > 0:
+                await asyncio.sleep(ORDER_RESOLVE_DELAY)
+            if client_order_id:
+                order = await self._lookup_order(exchange_id, symbol, client_order_id)
+            else:
+                order = await self._match_recent_order(exchange_id, symbol, side, since)
+            if order is not None:
+                self.logger.warning("Resolved %s order on %s: %s %s of %s", side, exchange_id, order['status'],
+                                    order.get('filled'), order['amount'])
+                return self._to_fill(exchange_id, order, client_order_id)
+        return None
+
+    async def _match_recent_order(self, exchange_id: str, symbol: str, side: str, since: int) -> Optional[Dict]:
+        """Our open order, or an order assembled from our trades, on symbol and side since a time"""
+        exchange = self.exchanges[exchange_id]
+        if exchange.has.get('fetchOpenOrders'):
+            orders = await self._request(exchange_id, 'fetch_open_orders', PRIORITY_ORDER,
+                                         lambda: exchange.fetch_open_orders(symbol, since), retries=1)
+            for order in orders:
+                if order['side'] == side and (order.get('timestamp') or 0) >= since:
+                    return order
+        if exchange.has.get('fetchMyTrades'):
+            trades = await self._request(exchange_id, 'fetch_my_trades', PRIORITY_ORDER,
+                                         lambda: exchange.fetch_my_trades(symbol, since), retries=1)
+            trades = [trade for trade in trades if trade['side'] == side and (trade.get('timestamp') or 0) >= since]
+            if trades:
+                order_id = trades[-1]['order']
+                trades = [trade for trade in trades if trade['order'] == order_id]
+                filled = sum(trade['amount'] for trade in trades)
+                cost = sum(trade['cost'] for trade in trades)
+                return {
+                    'id': order_id, 'symbol': symbol, 'type': 'market', 'side': side, 'amount': filled,
+                    'filled': filled, 'cost': cost, 'average': cost / filled if filled else None, 'price': None,
+                    'status': 'closed', 'timestamp': trades[0]['timestamp']
+                }
+        return None
+
+    async def _lookup_order(self, exchange_id: str, symbol: str, client_order_id: str) -> Optional[Dict]:
+        """
+        Find an order sent by an earlier attempt by its client order ID
+        
+        Returns:
+            The order, or None only when the exchange reports that it does not exist
+        """
+        exchange = self.exchanges[exchange_id]
+        try:
+            return await self._request(
+                exchange_id, 'fetch_order', PRIORITY_ORDER,
+                lambda: exchange.fetch_order(client_order_id, symbol, {'clientOrderId': client_order_id}),
+                retries=1
+            )
+        except Exception as e:
+            ccxt = sys.modules.get('ccxt')
+            if ccxt is not None and isinstance(e, ccxt.OrderNotFound):
+                return None
+            raise
+
+    def unavailable_exchanges(self) -> Set[str]:
+        """Exchanges whose circuit breaker is open and should be left out of route evaluation"""
+        return {exchange_id for exchange_id, breaker in self.breakers.items() if not breaker.available}
+
+    def get_trading_fee(self, exchange_id: str, symbol: Optional[str] = None) -> float:
+        """
+        Get the taker fee for an exchange, or for one of its markets
+        
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol, or None for the exchange-wide fee
             
         Returns:
             Trading fee as a percentage
         """
-        return EXCHANGE_FEES.get(exchange_id, 0.0)
+        return self.metadata.fee(exchange_id, symbol)
 
     async def close_connections(self):
         """Close all exchange connections"""
-        for exchange_id, exchange in self.exchanges.items():
+        if self.market_data:
+            await self.market_data.stop()
+            self.market_data = None
+        if self.order_books:
+            await self.order_books.close()
+            self.order_books = None
+        if self.recorder:
+            await asyncio.get_running_loop().run_in_executor(None, self.recorder.close)
+            self.recorder = None
+        if self._refresh_task:
+            self._refresh_task.cancel()
+            self._refresh_task = None
+        if self._warmup_task:
+            self._warmup_task.cancel()
+            self._warmup_task = None
+
+        for exchange_id, exchange in self.exchanges.built.items():
             try:
                 await exchange.close()
-                self.logger.info(f"Closed connection to {exchange_id}")
+                self.logger.info("Closed connection to %s", exchange_id)
             except Exception as e:
-                self.logger.error(f"Error closing connection to {exchange_id}: {str(e)}")
+                self.logger.error("Error closing connection to %s: %s", exchange_id, e)
+        await self.http.close()
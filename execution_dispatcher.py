@@ -0,0 +1,134 @@
+import asyncio
+import logging
+from operator import attrgetter
+from typing import Awaitable, Callable, List, Set, Tuple
+from models import AnyOpportunity
+from config import MAX_CONCURRENT_TRADES
+
+
+def opportunity_resources(opportunity: AnyOpportunity) -> Set[Tuple[str, str]]:
+    """
+    Inventory an opportunity would spend, as (exchange, currency) pairs
+
+    Currencies a route only receives are left out: receiving never conflicts
+    with another trade, and locking them would serialize every pair of
+    routes that share a quote currency on a venue.
+
+    Args:
+        opportunity: Pairwise or cycle opportunity
+
+    Returns:
+        Set of (exchange_id, currency) pairs
+    """
+    if opportunity.type == 'cycle':
+        return {(leg.from_exchange, leg.from_currency) for leg in opportunity.legs}
+
+    base, quote = opportunity.symbol.split('/')
+    return {(opportunity.buy_exchange, quote), (opportunity.sell_exchange, base)}
+
+
+def route_key(opportunity: AnyOpportunity) -> Tuple:
+    """Identify the route an opportunity trades, by exchange and symbol IDs"""
+    if opportunity.type == 'cycle':
+        return tuple((leg.exchange_idx, leg.symbol_idx, leg.side) for leg in opportunity.legs)
+    return (opportunity.symbol_idx, opportunity.buy_exchange_idx, opportunity.sell_exchange_idx)
+
+
+class ExecutionDispatcher:
+    def __init__(self, execute: Callable[[AnyOpportunity], Awaitable], max_concurrent: int = MAX_CONCURRENT_TRADES):
+        """
+        Run non-conflicting opportunities concurrently up to a limit
+
+        An opportunity holds a lock on its route and on every (exchange, currency)
+        it spends until it finishes, so concurrent trades never draw on the
+        same inventory. Quantities themselves are reserved against the
+        inventory ledger by the Trader.
+
+        Args:
+            execute: Coroutine function executing one opportunity
+            max_concurrent: Maximum number of trades in flight
+        """
+        self.execute = execute
+        self.max_concurrent = max_concurrent
+        self.logger = logging.getLogger(__name__)
+        self._held_resources: Set[Tuple[str, str]] = set()
+        self._active_routes: Set[Tuple] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._capacity = asyncio.Event()
+        self._capacity.set()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    def can_run(self, opportunity: AnyOpportunity) -> bool:
+        """True if the opportunity's route and inventory are free and a slot is available"""
+        if self.in_flight >= self.max_concurrent:
+            return False
+        if route_key(opportunity) in self._active_routes:
+            return False
+        return not (opportunity_resources(opportunity) & self._held_resources)
+
+    def submit(self, opportunity: AnyOpportunity) -> bool:
+        """
+        Start executing an opportunity in the background if it does not conflict
+
+        Args:
+            opportunity: Opportunity to execute
+
+        Returns:
+            True if execution was started
+        """
+        if not self.can_run(opportunity):
+            return False
+
+        resources = opportunity_resources(opportunity)
+        route = route_key(opportunity)
+        self._held_resources |= resources
+        self._active_routes.add(route)
+
+        task = asyncio.create_task(self._run(opportunity, resources, route))
+        self._tasks.add(task)
+        if self.in_flight >= self.max_concurrent:
+            self._capacity.clear()
+        return True
+
+    def submit_batch(self, opportunities: List[AnyOpportunity]) -> int:
+        """
+        Greedily start the most profitable set of mutually independent opportunities
+
+        Args:
+            opportunities: Candidate opportunities
+
+        Returns:
+            Number of opportunities started
+        """
+        started = 0
+        for opportunity in sorted(opportunities, key=attrgetter('expected_profit_usdt'), reverse=True):
+            if self.in_flight >= self.max_concurrent:
+                break
+            if self.submit(opportunity):
+                started += 1
+        return started
+
+    async def _run(self, opportunity: AnyOpportunity, resources: Set[Tuple[str, str]], route: Tuple) -> None:
+        try:
+            await self.execute(opportunity)
+        except Exception as e:
+            self.logger.error("Error executing opportunity: %s", e)
+        finally:
+            self._held_resources -= resources
+            self._active_routes.discard(route)
+            self._tasks.discard(asyncio.current_task())
+            self._capacity.set()
+
+    async def wait_for_capacity(self) -> None:
+        """Wait until at least one execution slot is free"""
+        while self.in_flight >= self.max_concurrent:
+            self._capacity.clear()
+            await self._capacity.wait()
+
+    async def close(self) -> None:
+        """Wait for all in-flight trades to finish"""
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
@@ -0,0 +1,129 @@
+import asyncio
+from typing import Dict, List, Optional
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, TraceConfig
+from metrics import metrics
+from config import (
+    REQUEST_TIMEOUT, HTTP_POOL_SIZE, HTTP_POOL_PER_HOST, HTTP_KEEPALIVE, HTTP_DNS_CACHE_TTL
+)
+
+
+class VenueSession:
+    def __init__(self, exchange_id: str, warmup_url: Optional[str] = None,
+                 pool_size: int = HTTP_POOL_SIZE, per_host: int = HTTP_POOL_PER_HOST,
+                 keepalive: float = HTTP_KEEPALIVE, dns_ttl: int = HTTP_DNS_CACHE_TTL,
+                 timeout: float = REQUEST_TIMEOUT):
+        """
+        Keep-alive HTTP session for one venue, shared by everything that talks to it
+
+        Connections are pooled and kept open for keepalive seconds after
+        their last request, and resolved addresses are cached for dns_ttl
+        seconds, so a request on a warm session skips DNS, TCP and TLS setup.
+        A trace hook counts new and reused connections.
+
+        Args:
+            exchange_id: ID of the exchange
+            warmup_url: Cheap public endpoint requested by ping(), or None to never ping
+            pool_size: Maximum open connections
+            per_host: Maximum open connections to one host
+            keepalive: Seconds an idle connection stays open
+            dns_ttl: Seconds a resolved address is reused
+            timeout: Total request timeout in seconds
+        """
+        self.exchange_id = exchange_id
+        self.warmup_url = warmup_url
+        self.pool_size = pool_size
+        self.per_host = per_host
+        self.keepalive = keepalive
+        self.dns_ttl = dns_ttl
+        self.timeout = timeout
+        self.session: Optional[ClientSession] = None
+        self.stats = {'new': 0, 'reused': 0, 'dns_hits': 0, 'dns_misses': 0, 'pings': 0, 'ping_errors': 0}
+
+    def open(self) -> ClientSession:
+        """The venue's session, created on first use (must be called inside the event loop)"""
+        if self.session is None or self.session.closed:
+            trace = TraceConfig()
+            trace.on_connection_create_end.append(self._on_new)
+            trace.on_connection_reuseconn.append(self._on_reused)
+            trace.on_dns_cache_hit.append(self._on_dns_hit)
+            trace.on_dns_cache_miss.append(self._on_dns_miss)
+            connector = TCPConnector(
+                limit=self.pool_size,
+                limit_per_host=self.per_host,
+                keepalive_timeout=self.keepalive,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_ttl,
+                enable_cleanup_closed=True
+            )
+            self.session = ClientSession(connector=connector, timeout=ClientTimeout(total=self.timeout),
+                                         trace_configs=[trace])
+        return self.session
+
+    async def _on_new(self, session, context, params) -> None:
+        self.stats['new'] += 1
+        metrics.inc('http_connections_total', exchange=self.exchange_id, kind='new')
+
+    async def _on_reused(self, session, context, params) -> None:
+        self.stats['reused'] += 1
+        metrics.inc('http_connections_total', exchange=self.exchange_id, kind='reused')
+
+    async def _on_dns_hit(self, session, context, params) -> None:
+        self.stats['dns_hits'] += 1
+
+    async def _on_dns_miss(self, session, context, params) -> None:
+        self.stats['dns_misses'] += 1
+
+    async def ping(self) -> None:
+        """Request the warm-up URL, opening a connection if none is idle in the pool"""
+        if not self.warmup_url:
+            return
+        self.stats['pings'] += 1
+        try:
+            async with self.open().get(self.warmup_url) as response:
+                await response.read()
+                response.raise_for_status()
+        except Exception:
+            self.stats['ping_errors'] += 1
+            raise
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class HttpPool:
+    def __init__(self, exchange_ids: List[str], warmup_urls: Dict[str, str]):
+        """
+        One VenueSession per exchange
+
+        Args:
+            exchange_ids: Configured exchange IDs
+            warmup_urls: Warm-up endpoint per exchange ID
+        """
+        self.venues = {
+            exchange_id: VenueSession(exchange_id, warmup_urls.get(exchange_id)) for exchange_id in exchange_ids
+        }
+
+    def session(self, exchange_id: str) -> Optional[ClientSession]:
+        """
+        Shared session for an exchange
+
+        Returns:
+            The session, or None outside a running event loop, where clients keep their own
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return None
+        return self.venues[exchange_id].open()
+
+    def summary(self) -> Dict[str, Dict[str, int]]:
+        """Connection counters per exchange with an open session, for logging"""
+        return {
+            exchange_id: dict(venue.stats) for exchange_id, venue in self.venues.items() if venue.session is not None
+        }
+
+    async def close(self) -> None:
+        for venue in self.venues.values():
+            await venue.close()
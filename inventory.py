@@ -0,0 +1,194 @@
+import asyncio
+import logging
+from typing import Dict, List, Optional, Set, Tuple
+from config import INVENTORY_RECONCILE_INTERVAL
+
+
+class InventoryLedger:
+    def __init__(self, exchange_manager, exchange_ids: Optional[List[str]] = None):
+        """
+        In-process balance ledger per (exchange, currency)
+
+        Balances are seeded from the exchanges once, updated optimistically
+        from our own fills and periodically reconciled against the venues.
+        Fills applied while a venue's balances are being fetched are kept in
+        a pending log and replayed on top of the fetched snapshot. Funds can
+        be reserved for in-flight trades so concurrent trades do not spend
+        the same inventory.
+
+        Args:
+            exchange_manager: ExchangeManager used to fetch balances
+            exchange_ids: Exchanges to track (defaults to all connected exchanges)
+        """
+        self.exchange_manager = exchange_manager
+        self.exchange_ids = exchange_ids or list(exchange_manager.exchanges.keys())
+        self.logger = logging.getLogger(__name__)
+        self.free: Dict[Tuple[str, str], float] = {}
+        self.reserved: Dict[Tuple[str, str], float] = {}
+        self.seeded_exchanges: Set[str] = set()
+        self._reconcile_task: Optional[asyncio.Task] = None
+        # Per exchange with a balance fetch in flight: fill deltas per currency since
+        # the fetch started, and currencies set by authoritative updates meanwhile
+        self._pending: Dict[str, Tuple[Dict[str, float], Set[str]]] = {}
+
+    @property
+    def seeded(self) -> bool:
+        """True once every tracked exchange's balances have been loaded"""
+        return len(self.seeded_exchanges) == len(self.exchange_ids)
+
+    def is_seeded(self, exchange_id: str) -> bool:
+        """True once an exchange's balances have been loaded successfully"""
+        return exchange_id in self.seeded_exchanges
+
+    async def seed(self) -> None:
+        """Load balances for every tracked exchange"""
+        await self.reconcile()
+        missing = [exchange_id for exchange_id in self.exchange_ids if exchange_id not in self.seeded_exchanges]
+        if missing:
+            self.logger.warning("Balances not loaded for %s, fetching them per trade until reconciled",
+                                ', '.join(missing))
+
+    async def reconcile(self) -> None:
+        """
+        Replace free balances with the exchanges' view, keeping reservations
+
+        Fills applied while the fetch was in flight are added on top of the
+        snapshot, and currencies missing from it are zeroed.
+        """
+        exchange_ids = [exchange_id for exchange_id in self.exchange_ids if exchange_id not in self._pending]
+        for exchange_id in exchange_ids:
+            self._pending[exchange_id] = ({}, set())
+        try:
+            results = await asyncio.gather(
+                *(self.exchange_manager.get_balances(exchange_id) for exchange_id in exchange_ids),
+                return_exceptions=True
+            )
+        finally:
+            pending = {exchange_id: self._pending.pop(exchange_id) for exchange_id in exchange_ids}
+
+        for exchange_id, balances in zip(exchange_ids, results):
+            if isinstance(balances, Exception) or balances is None:
+                self.logger.warning("Could not reconcile balances on %s", exchange_id)
+                continue
+            deltas, updated = pending[exchange_id]
+            snapshot = dict(balances)
+            for currency, delta in deltas.items():
+                snapshot[currency] = snapshot.get(currency, 0.0) + delta
+            for key in [key for key in self.free if key[0] == exchange_id and key[1] not in snapshot]:
+                if key[1] not in updated:
+                    self.free[key] = 0.0
+            for currency, amount in snapshot.items():
+                if currency not in updated:
+                    self.free[(exchange_id, currency)] = amount
+            self.seeded_exchanges.add(exchange_id)
+
+    def start_reconciliation(self, interval: float = INVENTORY_RECONCILE_INTERVAL) -> None:
+        """Start the background reconciliation timer"""
+        if self._reconcile_task is None or self._reconcile_task.done():
+            self._reconcile_task = asyncio.create_task(self._reconcile_loop(interval))
+
+    async def _reconcile_loop(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reconcile()
+            except Exception as e:
+                self.logger.error("Error reconciling inventory: %s", e)
+
+    async def stop(self) -> None:
+        """Stop background reconciliation"""
+        if self._reconcile_task:
+            self._reconcile_task.cancel()
+            await asyncio.gather(self._reconcile_task, return_exceptions=True)
+            self._reconcile_task = None
+
+    def apply_balance_update(self, exchange_id: str, currency: str, free: float) -> None:
+        """
+        Apply an authoritative balance update, e.g. from a private account stream
+
+        Args:
+            exchange_id: ID of the exchange
+            currency: Currency code
+            free: Free balance reported by the exchange
+        """
+        self.free[(exchange_id, currency)] = free
+        pending = self._pending.get(exchange_id)
+        if pending is not None:
+            # Newer than any snapshot still in flight
+            pending[0].pop(currency, None)
+            pending[1].add(currency)
+
+    def available(self, exchange_id: str, currency: str) -> float:
+        """
+        Free balance not reserved by in-flight trades
+
+        Args:
+            exchange_id: ID of the exchange
+            currency: Currency code
+
+        Returns:
+            Amount available for new trades
+        """
+        key = (exchange_id, currency)
+        return self.free.get(key, 0.0) - self.reserved.get(key, 0.0)
+
+    def reserve(self, exchange_id: str, currency: str, amount: float) -> bool:
+        """
+        Reserve funds for a trade if enough are available
+
+        Args:
+            exchange_id: ID of the exchange
+            currency: Currency code
+            amount: Amount to reserve
+
+        Returns:
+            True if the reservation was made
+        """
+        if self.available(exchange_id, currency) < amount:
+            return False
+        key = (exchange_id, currency)
+        self.reserved[key] = self.reserved.get(key, 0.0) + amount
+        return True
+
+    def release(self, exchange_id: str, currency: str, amount: float) -> None:
+        """
+        Release a previous reservation
+
+        Args:
+            exchange_id: ID of the exchange
+            currency: Currency code
+            amount: Amount to release
+        """
+        key = (exchange_id, currency)
+        self.reserved[key] = max(0.0, self.reserved.get(key, 0.0) - amount)
+
+    def apply_fill(self, exchange_id: str, symbol: str, side: str, amount: float, price: float,
+                   fee_percentage: float = 0.0) -> None:
+        """
+        Optimistically update balances from one of our own fills
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+            side: Order side ('buy' or 'sell')
+            amount: Filled base amount
+            price: Average fill price
+            fee_percentage: Fee charged in quote currency, as a percentage
+        """
+        base, quote = symbol.split('/')
+        notional = amount * price
+        fee = notional * fee_percentage / 100
+        if side == 'buy':
+            self._adjust(exchange_id, base, amount)
+            self._adjust(exchange_id, quote, -notional - fee)
+        else:
+            self._adjust(exchange_id, base, -amount)
+            self._adjust(exchange_id, quote, notional - fee)
+
+    def _adjust(self, exchange_id: str, currency: str, delta: float) -> None:
+        """Change a free balance, logging the change if a balance fetch is in flight"""
+        key = (exchange_id, currency)
+        self.free[key] = self.free.get(key, 0.0) + delta
+        pending = self._pending.get(exchange_id)
+        if pending is not None and currency not in pending[1]:
+            pending[0][currency] = pending[0].get(currency, 0.0) + delta
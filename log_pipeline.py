@@ -0,0 +1,155 @@
+import logging
+import queue
+import time
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Hashable
+from models import Model
+from config import LOG_CONFIG, LOG_QUEUE_SIZE, LOG_SAMPLE_INTERVAL
+
+
+def _snapshot(arg):
+    if isinstance(arg, (dict, list)):
+        return arg.copy()
+    if isinstance(arg, Model):
+        return arg.to_dict()
+    return arg
+
+
+class DeferredQueueHandler(QueueHandler):
+    def __init__(self, log_queue: queue.Queue):
+        """
+        Queue handler that leaves message formatting to the listener thread
+
+        Dict and list arguments are shallow-copied, and model records such as
+        opportunities converted with to_dict(), so later mutation by the
+        caller does not change what gets logged. Records are dropped and
+        counted rather than blocking when the queue is full.
+
+        Args:
+            log_queue: Bounded queue drained by a QueueListener
+        """
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        if isinstance(record.args, tuple):
+            record.args = tuple(_snapshot(arg) for arg in record.args)
+        elif isinstance(record.args, dict):
+            # A lone mapping argument is stored unwrapped by LogRecord
+            record.args = record.args.copy()
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class StructuredFormatter(logging.Formatter):
+    """Formatter appending key=value pairs passed as extra={'fields': {...}}"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            message += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+        return message
+
+
+class LogSampler:
+    def __init__(self, logger: logging.Logger, interval: float = LOG_SAMPLE_INTERVAL):
+        """
+        Rate-limited logging for high-frequency events
+
+        The first event for a key is logged, then at most one per interval;
+        the number suppressed in between is attached as a 'suppressed' field.
+        Keys idle for longer than the interval are evicted once per interval,
+        so per-route keys do not accumulate for the life of the process.
+
+        Args:
+            logger: Logger to emit through
+            interval: Minimum seconds between records for the same key
+        """
+        self.logger = logger
+        self.interval = interval
+        self._last: Dict[Hashable, float] = {}
+        self._suppressed: Dict[Hashable, int] = {}
+        self._evicted = time.monotonic()
+
+    def log(self, level: int, key: Hashable, msg: str, *args, **fields) -> None:
+        """
+        Log a record for a key unless one was logged within the interval
+
+        Args:
+            level: Logging level
+            key: Identity of the event stream, e.g. (exchange_id, method)
+            msg: Lazy %-style message
+            *args: Message arguments
+            **fields: Structured fields appended to the message
+        """
+        if not self.logger.isEnabledFor(level):
+            return
+        now = time.monotonic()
+        if now - self._evicted >= self.interval:
+            self._evict(now)
+        last = self._last.get(key)
+        if last is not None and now - last < self.interval:
+            self._suppressed[key] = self._suppressed.get(key, 0) + 1
+            return
+        self._last[key] = now
+        suppressed = self._suppressed.pop(key, 0)
+        if suppressed:
+            fields['suppressed'] = suppressed
+        self.logger.log(level, msg, *args, extra={'fields': fields} if fields else None)
+
+    def _evict(self, now: float) -> None:
+        """Forget keys last logged over an interval ago; their next event would be logged anyway"""
+        self._evicted = now
+        for key in [key for key, last in self._last.items() if now - last >= self.interval]:
+            del self._last[key]
+            self._suppressed.pop(key, None)
+
+    def warning(self, key: Hashable, msg: str, *args, **fields) -> None:
+        self.log(logging.WARNING, key, msg, *args, **fields)
+
+    def info(self, key: Hashable, msg: str, *args, **fields) -> None:
+        self.log(logging.INFO, key, msg, *args, **fields)
+
+
+def configure_logging(config: Dict = LOG_CONFIG, queue_size: int = LOG_QUEUE_SIZE,
+                      console_logger: str = '__main__') -> QueueListener:
+    """
+    Route all logging through a queue to file and console handlers on a background thread
+
+    The calling thread only enqueues the record; formatting and I/O happen
+    on the listener thread, so a slow disk or terminal never blocks the
+    event loop.
+
+    Args:
+        config: Dictionary with 'filename', 'level' and 'format'
+        queue_size: Maximum records waiting to be written before new ones are dropped
+        console_logger: Logger whose records are also echoed to the console
+
+    Returns:
+        The started QueueListener; call stop() on shutdown to flush
+    """
+    log_queue = queue.Queue(queue_size)
+
+    file_handler = logging.FileHandler(config['filename'])
+    file_handler.setFormatter(StructuredFormatter(config['format']))
+
+    console_handler = logging.StreamHandler()
+    console_handler.setLevel(logging.INFO)
+    console_handler.addFilter(logging.Filter(console_logger))
+    console_handler.setFormatter(StructuredFormatter('%(asctime)s - %(levelname)s - %(message)s'))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(DeferredQueueHandler(log_queue))
+    root.setLevel(getattr(logging, config['level']))
+
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    return listener
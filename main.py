@@ -1,33 +1,34 @@
 import asyncio
 import logging
 import os
-from datetime import datetime
-from typing import Dict, List
+import time
+from datetime import datetime, timedelta
+from typing import List, Optional
+from models import AnyOpportunity
 from exchange_manager import ExchangeManager
 from arbitrage_finder import ArbitrageFinder
 from trader import Trader
+from inventory import InventoryLedger
+from event_engine import EvaluationEngine
+from execution_dispatcher import ExecutionDispatcher
+from metrics import metrics, MetricsServer
+from log_pipeline import configure_logging
+from persistence import TradeStore
+from sharding import ShardCoordinator, shard_rate_share
+from poll_scheduler import PollScheduler
 from config import (
     EXCHANGES, BINANCE_API_KEY, BINANCE_SECRET_KEY,
     COINBASE_API_KEY, COINBASE_SECRET_KEY,
     KRAKEN_API_KEY, KRAKEN_SECRET_KEY,
-    CHECK_INTERVAL, LOG_CONFIG
+    CHECK_INTERVAL, LOG_CONFIG, MARKET_DATA_MODE, TRADING_PAIRS,
+    LOCAL_ORDER_BOOKS, EVENT_DRIVEN, RECORDER_ENABLED, RECORDER_DIR,
+    METRICS_ENABLED, METRICS_HOST, METRICS_PORT, PERSISTENCE_ENABLED, SHARD_COUNT,
+    UNIVERSE_DISCOVERY, UNIVERSE_MIN_EXCHANGES, UNIVERSE_QUOTE_CURRENCIES, UNIVERSE_MAX_SYMBOLS, PRIORITY_POLLING,
+    SIM_EXCHANGE_URLS
 )
 
-# Configure logging
-logging.basicConfig(
-    filename=LOG_CONFIG['filename'],
-    level=getattr(logging, LOG_CONFIG['level']),
-    format=LOG_CONFIG['format']
-)
 logger = logging.getLogger(__name__)
 
-# Configure console logging
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.INFO)
-formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-logger.addHandler(console_handler)
-
 class ArbitrageBot:
     def __init__(self):
         """Initialize the arbitrage bot with necessary components"""
@@ -46,11 +47,22 @@ class ArbitrageBot:
                 'secret_key': KRAKEN_SECRET_KEY
             }
         }
+        # Simulated venues accept any credentials
+        for exchange_id in SIM_EXCHANGE_URLS:
+            self.api_keys[exchange_id] = {'api_key': 'sim', 'secret_key': 'sim'}
         
         # Initialize components
-        self.exchange_manager = ExchangeManager(EXCHANGES, self.api_keys)
+        # With sharding, the workers and this process split each venue's rate limit
+        rate_share = shard_rate_share(SHARD_COUNT) if SHARD_COUNT > 1 else 1.0
+        self.exchange_manager = ExchangeManager(EXCHANGES, self.api_keys, rate_share=rate_share)
         self.arbitrage_finder = ArbitrageFinder(self.exchange_manager)
-        self.trader = Trader(self.exchange_manager, self.arbitrage_finder)
+        self.inventory = InventoryLedger(self.exchange_manager)
+        self.trader = Trader(self.exchange_manager, self.arbitrage_finder, self.inventory)
+        self.dispatcher = ExecutionDispatcher(self._execute_opportunity)
+        self.metrics_server = MetricsServer(metrics, METRICS_HOST, METRICS_PORT) if METRICS_ENABLED else None
+        self.store = TradeStore() if PERSISTENCE_ENABLED else None
+        self.coordinator: Optional[ShardCoordinator] = None
+        self.poller: Optional[PollScheduler] = None
         
         # Statistics
         self.stats = {
@@ -66,95 +78,231 @@ class ArbitrageBot:
         """Main loop for the arbitrage bot"""
         logger.info("Starting arbitrage bot...")
         
+        if self.metrics_server:
+            await self.metrics_server.start()
+        
+        if self.store:
+            await self._start_store()
+        
+        await self.exchange_manager.prepare_markets()
+        await self.exchange_manager.start_warmup()
+        symbols = self._discover_symbols()
+        self.arbitrage_finder.set_symbols(symbols)
+        # Cross pairs such as ETH/BTC are fetched too, for cycle detection only
+        market_symbols = symbols + self.arbitrage_finder.cross_symbols()
+        
+        if SHARD_COUNT > 1:
+            self.coordinator = ShardCoordinator(symbols, SHARD_COUNT)
+        elif MARKET_DATA_MODE != 'stream' and PRIORITY_POLLING:
+            self.poller = PollScheduler(market_symbols, {
+                exchange_id: bool(exchange.has.get('fetchTickers'))
+                for exchange_id, exchange in self.exchange_manager.exchanges.items()
+            }, self.exchange_manager.listed_symbols())
+        
+        if RECORDER_ENABLED:
+            self.exchange_manager.start_recording(RECORDER_DIR)
+        
+        await self.inventory.seed()
+        self.inventory.start_reconciliation()
+        
+        if MARKET_DATA_MODE == 'stream' and not self.coordinator:
+            await self.exchange_manager.start_streaming(market_symbols, local_books=LOCAL_ORDER_BOOKS)
+        
         try:
+            if self.coordinator:
+                await self.coordinator.start()
+                await self._execute_candidates(self.coordinator)
+            
+            if MARKET_DATA_MODE == 'stream' and EVENT_DRIVEN:
+                await self._run_event_driven()
+            
+            last_stats = 0.0
             while True:
                 try:
                     # Find arbitrage opportunities
-                    opportunities = await self.arbitrage_finder.find_opportunities()
+                    if self.poller:
+                        opportunities = await self.arbitrage_finder.poll_opportunities(self.poller)
+                    else:
+                        opportunities = await self.arbitrage_finder.find_opportunities()
                     self.stats['opportunities_found'] += len(opportunities)
+                    metrics.inc('opportunities_found_total', len(opportunities))
+                    if self.store:
+                        self.store.record_opportunities(opportunities)
                     
                     if opportunities:
-                        logger.info(f"Found {len(opportunities)} potential arbitrage opportunities")
-                        
-                        # Sort opportunities by expected profit
-                        opportunities.sort(key=lambda x: x['expected_profit_usdt'], reverse=True)
+                        logger.info("Found %s potential arbitrage opportunities", len(opportunities))
                         
-                        # Execute the most profitable opportunity
-                        best_opportunity = opportunities[0]
-                        logger.info(f"Attempting to execute best opportunity: {best_opportunity}")
-                        
-                        self.stats['trades_executed'] += 1
-                        trade_result = await self.trader.execute_arbitrage(best_opportunity)
-                        
-                        if trade_result:
-                            self.stats['successful_trades'] += 1
-                            self.stats['total_profit'] += trade_result['actual_profit']
-                            logger.info(f"Trade successful! Profit: {trade_result['actual_profit']} USDT")
-                            
-                            # Start monitoring the trade
-                            self.trader.start_trade_monitor(trade_result)
-                        else:
-                            self.stats['failed_trades'] += 1
-                            logger.warning("Trade execution failed")
+                        # Start the most profitable set of opportunities that don't share inventory
+                        started = self.dispatcher.submit_batch(opportunities)
+                        logger.info("Started %s trades, %s in flight", started, self.dispatcher.in_flight)
                     
                     # Log current statistics
-                    self._log_statistics()
+                    now = time.monotonic()
+                    if now - last_stats >= CHECK_INTERVAL:
+                        last_stats = now
+                        self._log_statistics()
+                        if self.poller:
+                            logger.info("Poll intervals: %s", self.poller.summary())
+                        logger.info("HTTP connections: %s", self.exchange_manager.http.summary())
                     
-                    # Wait for next check interval
-                    await asyncio.sleep(CHECK_INTERVAL)
+                    # Wait for the next due refresh, or the next check interval
+                    if self.poller:
+                        await asyncio.sleep(max(0.0, self.poller.next_wakeup() - time.monotonic()))
+                    else:
+                        await asyncio.sleep(CHECK_INTERVAL)
                     
                 except Exception as e:
-                    logger.error(f"Error in main loop: {str(e)}")
+                    logger.error("Error in main loop: %s", e)
                     await asyncio.sleep(CHECK_INTERVAL)
                     
         except KeyboardInterrupt:
             logger.info("Shutting down arbitrage bot...")
             await self.shutdown()
     
+    async def _run_event_driven(self):
+        """Execute candidates as the evaluation engine produces them from price updates"""
+        engine = EvaluationEngine(self.arbitrage_finder, self.exchange_manager.market_data)
+        engine.start()
+        await self._execute_candidates(engine)
+    
+    async def _execute_candidates(self, source):
+        """
+        Execute candidates as a source produces them
+        
+        Args:
+            source: EvaluationEngine or ShardCoordinator providing next_opportunity() and stats
+        """
+        last_stats = asyncio.get_running_loop().time()
+        
+        while True:
+            try:
+                await self.dispatcher.wait_for_capacity()
+                opportunity = await source.next_opportunity()
+                self.stats['opportunities_found'] += 1
+                metrics.inc('opportunities_found_total')
+                if self.store:
+                    self.store.record_opportunity(opportunity)
+                self.dispatcher.submit(opportunity)
+                
+                now = asyncio.get_running_loop().time()
+                if now - last_stats >= CHECK_INTERVAL:
+                    last_stats = now
+                    self._log_statistics()
+                    logger.info("%s: %s", type(source).__name__, source.stats)
+                    logger.info("HTTP connections: %s", self.exchange_manager.http.summary())
+                    
+            except Exception as e:
+                logger.error("Error in event loop: %s", e)
+    
+    async def _execute_opportunity(self, opportunity: AnyOpportunity):
+        """Execute one opportunity and update statistics"""
+        logger.info("Attempting to execute opportunity: %s", opportunity)
+        
+        self.stats['trades_executed'] += 1
+        metrics.set_gauge('trades_in_flight', self.dispatcher.in_flight)
+        trade_result = await self.trader.execute_arbitrage(opportunity)
+        metrics.inc('trades_total', result='success' if trade_result else 'failed')
+        if self.store:
+            self.store.record_trade(opportunity, trade_result)
+        
+        if trade_result:
+            self.stats['successful_trades'] += 1
+            self.stats['total_profit'] += trade_result['actual_profit']
+            metrics.set_gauge('profit_usdt', self.stats['total_profit'])
+            logger.info("Trade successful! Profit: %s USDT", trade_result['actual_profit'])
+            
+            # Start monitoring the trade
+            if trade_result.get('type') != 'cycle':
+                self.trader.start_trade_monitor(trade_result)
+        else:
+            self.stats['failed_trades'] += 1
+            logger.warning("Trade execution failed")
+    
+    def _discover_symbols(self) -> List[str]:
+        """Symbols listed on enough configured exchanges, or TRADING_PAIRS without discovery or market data"""
+        if UNIVERSE_DISCOVERY:
+            symbols = self.exchange_manager.metadata.common_symbols(
+                EXCHANGES, UNIVERSE_MIN_EXCHANGES, UNIVERSE_QUOTE_CURRENCIES
+            )[:UNIVERSE_MAX_SYMBOLS]
+            if symbols:
+                logger.info("Scanning %s symbols listed on at least %s exchanges", len(symbols), UNIVERSE_MIN_EXCHANGES)
+                return symbols
+            logger.warning("No market metadata for symbol discovery, scanning TRADING_PAIRS")
+        return TRADING_PAIRS
+    
+    async def _start_store(self):
+        """Open the trade store off the event loop and resume statistics from its last snapshot"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.store.start)
+        snapshot = await loop.run_in_executor(None, self.store.latest_stats)
+        if snapshot:
+            runtime = snapshot.pop('runtime')
+            self.stats.update(snapshot)
+            # Shift the start forward past the downtime, so runtime and USDT/h only count time spent running
+            self.stats['start_time'] = (datetime.utcnow() - timedelta(seconds=runtime)).isoformat()
+            logger.info("Resumed statistics covering %.2fh of runtime since %s", runtime / 3600, snapshot['start_time'])
+        self.exchange_manager.store = self.store
+    
     def _log_statistics(self):
         """Log current bot statistics"""
         runtime = (datetime.utcnow() - datetime.fromisoformat(self.stats['start_time'])).total_seconds()
         hours = runtime / 3600
         
-        stats_message = f"""
-        === Arbitrage Bot Statistics ===
-        Runtime: {hours:.2f} hours
-        Opportunities Found: {self.stats['opportunities_found']}
-        Trades Executed: {self.stats['trades_executed']}
-        Successful Trades: {self.stats['successful_trades']}
-        Failed Trades: {self.stats['failed_trades']}
-        Total Profit: {self.stats['total_profit']:.2f} USDT
-        Success Rate: {(self.stats['successful_trades'] / max(1, self.stats['trades_executed']) * 100):.2f}%
-        Profit per Hour: {(self.stats['total_profit'] / max(1, hours)):.2f} USDT
-        ==============================
-        """
-        logger.info(stats_message)
+        logger.info(
+            "Statistics: runtime %.2fh, %s opportunities, %s trades (%s ok, %s failed), "
+            "success %.2f%%, profit %.2f USDT (%.2f USDT/h)",
+            hours,
+            self.stats['opportunities_found'],
+            self.stats['trades_executed'],
+            self.stats['successful_trades'],
+            self.stats['failed_trades'],
+            self.stats['successful_trades'] / max(1, self.stats['trades_executed']) * 100,
+            self.stats['total_profit'],
+            self.stats['total_profit'] / max(1, hours)
+        )
+        if self.store:
+            self.store.record_stats(self.stats)
     
     async def shutdown(self):
         """Gracefully shutdown the bot"""
+        if self.coordinator:
+            await self.coordinator.stop()
+        logger.info("Waiting for in-flight trades...")
+        await self.dispatcher.close()
+        await self.trader.monitor.close()
         logger.info("Closing exchange connections...")
+        await self.inventory.stop()
         await self.exchange_manager.close_connections()
+        if self.metrics_server:
+            await self.metrics_server.stop()
+        if self.store:
+            await asyncio.get_running_loop().run_in_executor(None, self.store.close)
         logger.info("Bot shutdown complete")
 
 async def main():
     """Entry point for the arbitrage bot"""
-    # Check if required API keys are set
-    if not all([
+    # Create log directory if it doesn't exist
+    log_dir = os.path.dirname(LOG_CONFIG['filename'])
+    if log_dir and not os.path.exists(log_dir):
+        os.makedirs(log_dir)
+    log_listener = configure_logging()
+
+    # Check if required API keys are set (simulated venues need none)
+    if not SIM_EXCHANGE_URLS and not all([
         BINANCE_API_KEY, BINANCE_SECRET_KEY,
         COINBASE_API_KEY, COINBASE_SECRET_KEY,
         KRAKEN_API_KEY, KRAKEN_SECRET_KEY
     ]):
         logger.error("Missing required API keys. Please check your configuration.")
+        log_listener.stop()
         return
 
-    # Create log directory if it doesn't exist
-    log_dir = os.path.dirname(LOG_CONFIG['filename'])
-    if log_dir and not os.path.exists(log_dir):
-        os.makedirs(log_dir)
-
     # Start the bot
-    bot = ArbitrageBot()
-    await bot.run()
+    try:
+        bot = ArbitrageBot()
+        await bot.run()
+    finally:
+        log_listener.stop()
 
 if __name__ == "__main__":
     asyncio.run(main())
@@ -0,0 +1,386 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from models import Quote, exchange_table, symbol_table
+from config import STREAM_MAX_AGE, STREAM_RECONNECT_DELAY, STREAM_URLS
+
+
+class FeedTransport:
+    """Minimal message transport used by MarketDataStream
+
+    Implementations only move raw text frames; parsing is handled by the
+    per-exchange feed adapters so transports can be swapped freely.
+    """
+
+    async def connect(self, url: str) -> None:
+        raise NotImplementedError
+
+    async def send(self, message: str) -> None:
+        raise NotImplementedError
+
+    async def recv(self) -> str:
+        """Return the next raw frame, raising ConnectionError when the feed ends"""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        raise NotImplementedError
+
+
+class WebSocketTransport(FeedTransport):
+    """Transport backed by the websockets client library"""
+
+    def __init__(self):
+        self._connection = None
+
+    async def connect(self, url: str) -> None:
+        import websockets
+        self._connection = await websockets.connect(url, ping_interval=20, max_queue=None)
+
+    async def send(self, message: str) -> None:
+        await self._connection.send(message)
+
+    async def recv(self) -> str:
+        try:
+            return await self._connection.recv()
+        except Exception as e:
+            raise ConnectionError(str(e)) from e
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+class ReplayTransport(FeedTransport):
+    """Transport that replays pre-recorded frames without any network access
+
+    Args:
+        frames: Raw frames (str or JSON-serialisable dicts) to deliver in order
+        delay: Optional pause between frames in seconds
+    """
+
+    def __init__(self, frames: Iterable, delay: float = 0.0):
+        self.frames = [f if isinstance(f, str) else json.dumps(f) for f in frames]
+        self.delay = delay
+        self.sent: List[str] = []
+        self._position = 0
+
+    async def connect(self, url: str) -> None:
+        self._position = 0
+
+    async def send(self, message: str) -> None:
+        self.sent.append(message)
+
+    async def recv(self) -> str:
+        if self._position >= len(self.frames):
+            raise ConnectionError("Replay exhausted")
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        frame = self.frames[self._position]
+        self._position += 1
+        return frame
+
+    async def close(self) -> None:
+        pass
+
+
+class FeedAdapter:
+    """Exchange-specific subscription and message parsing
+
+    Subclasses translate between unified symbols ('BTC/USDT') and the venue's
+    wire format and turn frames into normalized top-of-book updates.
+    """
+
+    def subscription_url(self, url: str, symbols: List[str]) -> str:
+        return url
+
+    def subscribe_messages(self, symbols: List[str]) -> List[str]:
+        return []
+
+    def parse(self, frame: Dict) -> List[Tuple[str, Dict]]:
+        """Return a list of (symbol, quote) updates contained in a frame"""
+        raise NotImplementedError
+
+    def parse_depth(self, frame: Dict) -> List[Tuple]:
+        """Return a list of (symbol, bids, asks, first_sequence, last_sequence, timestamp) diffs"""
+        return []
+
+
+class BinanceFeedAdapter(FeedAdapter):
+    def __init__(self, depth: bool = False):
+        self.depth = depth
+        self._symbols: Dict[str, str] = {}
+
+    def subscription_url(self, url: str, symbols: List[str]) -> str:
+        self._symbols = {s.replace('/', ''): s for s in symbols}
+        channels = ['bookTicker', 'depth@100ms'] if self.depth else ['bookTicker']
+        streams = '/'.join(f"{s.replace('/', '').lower()}@{channel}"
+                           for s in symbols for channel in channels)
+        return f"{url}?streams={streams}"
+
+    def parse(self, frame: Dict) -> List[Tuple[str, Dict]]:
+        data = frame.get('data', frame)
+        symbol = self._symbols.get(data.get('s'))
+        if not symbol or 'b' not in data or data.get('e') == 'depthUpdate':
+            return []
+        bid_size = float(data['B'])
+        ask_size = float(data['A'])
+        # bookTicker carries no 24h volume; top-of-book depth bounds the tradable amount instead
+        return [(symbol, {
+            'bid': float(data['b']),
+            'bid_size': bid_size,
+            'ask': float(data['a']),
+            'ask_size': ask_size,
+            'volume': min(bid_size, ask_size),
+        })]
+
+    def parse_depth(self, frame: Dict) -> List[Tuple]:
+        data = frame.get('data', frame)
+        symbol = self._symbols.get(data.get('s'))
+        if not symbol or data.get('e') != 'depthUpdate':
+            return []
+        bids = [(float(price), float(size)) for price, size in data['b']]
+        asks = [(float(price), float(size)) for price, size in data['a']]
+        return [(symbol, bids, asks, data['U'], data['u'], data['E'])]
+
+
+class KrakenFeedAdapter(FeedAdapter):
+    def subscribe_messages(self, symbols: List[str]) -> List[str]:
+        return [json.dumps({
+            'method': 'subscribe',
+            'params': {'channel': 'ticker', 'symbol': symbols}
+        })]
+
+    def parse(self, frame: Dict) -> List[Tuple[str, Dict]]:
+        if frame.get('channel') != 'ticker':
+            return []
+        return [(item['symbol'], {
+            'bid': float(item['bid']),
+            'bid_size': float(item['bid_qty']),
+            'ask': float(item['ask']),
+            'ask_size': float(item['ask_qty']),
+            'last': float(item['last']),
+            'volume': float(item['volume']),
+        }) for item in frame.get('data', [])]
+
+
+class CoinbaseFeedAdapter(FeedAdapter):
+    def subscribe_messages(self, symbols: List[str]) -> List[str]:
+        return [json.dumps({
+            'type': 'subscribe',
+            'channel': 'ticker',
+            'product_ids': [s.replace('/', '-') for s in symbols]
+        })]
+
+    def parse(self, frame: Dict) -> List[Tuple[str, Dict]]:
+        if frame.get('channel') != 'ticker':
+            return []
+        updates = []
+        for event in frame.get('events', []):
+            for item in event.get('tickers', []):
+                updates.append((item['product_id'].replace('-', '/'), {
+                    'bid': float(item['best_bid']),
+                    'bid_size': float(item['best_bid_quantity']),
+                    'ask': float(item['best_ask']),
+                    'ask_size': float(item['best_ask_quantity']),
+                    'last': float(item['price']),
+                    'volume': float(item['volume_24_h']),
+                }))
+        return updates
+
+
+FEED_ADAPTERS = {
+    'binance': BinanceFeedAdapter,
+    'kraken': KrakenFeedAdapter,
+    'coinbase': CoinbaseFeedAdapter,
+}
+
+
+class MarketDataStream:
+    def __init__(self, exchange_ids: List[str], symbols: List[str],
+                 transport_factory: Callable[[str], FeedTransport] = None,
+                 adapters: Optional[Dict[str, FeedAdapter]] = None,
+                 urls: Optional[Dict[str, str]] = None,
+                 max_age: float = STREAM_MAX_AGE):
+        """
+        Maintain a live top-of-book cache fed by per-exchange push subscriptions
+
+        Args:
+            exchange_ids: Exchanges to subscribe to
+            symbols: Unified trading pair symbols to subscribe to
+            transport_factory: Callable returning a FeedTransport for an exchange ID
+            adapters: Optional feed adapter overrides keyed by exchange ID
+            urls: Optional WebSocket endpoint overrides keyed by exchange ID
+            max_age: Seconds after which a cached quote is considered stale
+        """
+        self.exchange_ids = list(exchange_ids)
+        self.symbols = list(symbols)
+        self.transport_factory = transport_factory or (lambda exchange_id: WebSocketTransport())
+        self.adapters = adapters or {}
+        self.urls = dict(STREAM_URLS, **(urls or {}))
+        self.max_age_ns = int(max_age * 1e9)
+        self.logger = logging.getLogger(__name__)
+
+        self.quotes: Dict[Tuple[str, str], Quote] = {}
+        self.listeners: List[Callable[[str, str, Quote], None]] = []
+        self.depth_listeners: List[Callable] = []
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._transports: Dict[str, FeedTransport] = {}
+        self._running = False
+
+    def add_listener(self, callback: Callable[[str, str, Quote], None]) -> None:
+        """Register a callback invoked with (exchange_id, symbol, quote) on every update"""
+        self.listeners.append(callback)
+
+    def add_depth_listener(self, callback: Callable) -> None:
+        """Register a callback invoked with (exchange_id, symbol, bids, asks, first, last, timestamp)"""
+        self.depth_listeners.append(callback)
+
+    async def start(self) -> None:
+        """Start one subscription task per exchange"""
+        self._running = True
+        for exchange_id in self.exchange_ids:
+            if exchange_id not in self.adapters:
+                adapter_class = FEED_ADAPTERS.get(exchange_id)
+                if adapter_class is None:
+                    self.logger.warning("No streaming adapter for %s, skipping", exchange_id)
+                    continue
+                self.adapters[exchange_id] = adapter_class()
+            self._tasks[exchange_id] = asyncio.create_task(self._run_feed(exchange_id))
+
+    async def stop(self) -> None:
+        """Cancel all subscription tasks and close transports"""
+        self._running = False
+        for task in self._tasks.values():
+            task.cancel()
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+        self._tasks.clear()
+        for exchange_id, transport in self._transports.items():
+            try:
+                await transport.close()
+            except Exception as e:
+                self.logger.error("Error closing stream for %s: %s", exchange_id, e)
+        self._transports.clear()
+
+    async def _run_feed(self, exchange_id: str) -> None:
+        """Connect, subscribe and consume frames for one exchange, reconnecting on failure"""
+        adapter = self.adapters[exchange_id]
+        while self._running:
+            transport = self.transport_factory(exchange_id)
+            self._transports[exchange_id] = transport
+            try:
+                url = adapter.subscription_url(self.urls.get(exchange_id, ''), self.symbols)
+                await transport.connect(url)
+                for message in adapter.subscribe_messages(self.symbols):
+                    await transport.send(message)
+                self.logger.info("Streaming market data from %s", exchange_id)
+
+                while self._running:
+                    frame = await transport.recv()
+                    self.handle_frame(exchange_id, frame)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning("Market data stream for %s dropped: %s", exchange_id, e)
+            finally:
+                await transport.close()
+                self._drop_exchange(exchange_id)
+
+            if self._running:
+                await asyncio.sleep(STREAM_RECONNECT_DELAY)
+
+    def handle_frame(self, exchange_id: str, frame) -> None:
+        """
+        Parse a raw frame and apply any contained updates to the cache
+
+        Args:
+            exchange_id: ID of the exchange the frame came from
+            frame: Raw text frame or already decoded dictionary
+        """
+        adapter = self.adapters[exchange_id]
+        try:
+            if isinstance(frame, (str, bytes)):
+                frame = json.loads(frame)
+            if not isinstance(frame, dict):
+                return
+            updates = adapter.parse(frame)
+            diffs = adapter.parse_depth(frame) if self.depth_listeners else []
+        except (KeyError, TypeError, ValueError) as e:
+            self.logger.debug("Ignoring malformed frame from %s: %s", exchange_id, e)
+            return
+        for symbol, quote in updates:
+            self.update_quote(exchange_id, symbol, quote)
+        for diff in diffs:
+            for callback in self.depth_listeners:
+                try:
+                    callback(exchange_id, *diff)
+                except Exception as e:
+                    self.logger.error("Depth listener failed: %s", e)
+
+    def update_quote(self, exchange_id: str, symbol: str, quote: Dict) -> None:
+        """
+        Merge a top-of-book update into the cache and notify listeners
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+            quote: Partial quote with at least 'bid' and 'ask'
+        """
+        key = (exchange_id, symbol)
+        cached = self.quotes.get(key)
+        if cached is None:
+            cached = Quote(exchange_table.id(exchange_id), symbol_table.id(symbol), bid_size=0.0, ask_size=0.0)
+            self.quotes[key] = cached
+        for field, value in quote.items():
+            setattr(cached, field, value)
+        if cached.last is None:
+            cached.last = (cached.bid + cached.ask) / 2
+        cached.timestamp = int(time.time() * 1000)
+        cached.received_ns = time.monotonic_ns()
+
+        for callback in self.listeners:
+            try:
+                callback(exchange_id, symbol, cached)
+            except Exception as e:
+                self.logger.error("Market data listener failed: %s", e)
+
+    def _drop_exchange(self, exchange_id: str) -> None:
+        """Forget cached quotes for an exchange whose stream is down"""
+        for key in [k for k in self.quotes if k[0] == exchange_id]:
+            del self.quotes[key]
+
+    def get_ticker(self, exchange_id: str, symbol: str) -> Optional[Quote]:
+        """
+        Read the cached ticker for a symbol without any I/O
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+
+        Returns:
+            Quote in the same shape as ExchangeManager.get_ticker,
+            or None if no fresh quote is cached
+        """
+        quote = self.quotes.get((exchange_id, symbol))
+        if quote is None or time.monotonic_ns() - quote.received_ns > self.max_age_ns:
+            return None
+        return quote
+
+    def get_tickers(self, symbol: str) -> Dict[str, Quote]:
+        """
+        Read fresh cached tickers for a symbol from every exchange
+
+        Args:
+            symbol: Trading pair symbol
+
+        Returns:
+            Quotes keyed by exchange ID
+        """
+        prices = {}
+        for exchange_id in self.exchange_ids:
+            ticker = self.get_ticker(exchange_id, symbol)
+            if ticker:
+                prices[exchange_id] = ticker
+        return prices
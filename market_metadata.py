@@ -0,0 +1,256 @@
+import json
+import logging
+import math
+import os
+import time
+from typing import Dict, List, Optional
+from models import MarketInfo
+from config import EXCHANGE_FEES, MARKET_CACHE_PATH, MARKET_CACHE_TTL
+
+CACHE_VERSION = 1
+
+# ccxt precisionMode values (ccxt.base.decimal_to_precision), repeated here so
+# reading the cache does not need the ccxt import
+DECIMAL_PLACES = 2
+SIGNIFICANT_DIGITS = 3
+TICK_SIZE = 4
+
+
+def precision_step(precision: Optional[float], mode: int) -> Optional[float]:
+    """
+    Increment implied by a ccxt market precision value
+
+    Args:
+        precision: market['precision']['amount'] or ['price']
+        mode: Exchange precisionMode
+
+    Returns:
+        Step size, or None when unknown or expressed in significant digits
+    """
+    if precision is None:
+        return None
+    if mode == TICK_SIZE:
+        return float(precision)
+    if mode == DECIMAL_PLACES:
+        return 10.0 ** -int(precision)
+    return None
+
+
+def floor_to_step(value: float, step: Optional[float]) -> float:
+    """Round down to a multiple of step, tolerating float error just below a boundary"""
+    if not step:
+        return value
+    return round(math.floor(value / step + 1e-9) * step, 12)
+
+
+def round_to_step(value: float, step: Optional[float]) -> float:
+    """Round to the nearest multiple of step"""
+    if not step:
+        return value
+    return round(round(value / step) * step, 12)
+
+
+class MarketMetadata:
+    def __init__(self, path: str = MARKET_CACHE_PATH, ttl: float = MARKET_CACHE_TTL):
+        """
+        Markets, fee tiers, precision and limits per exchange, cached on disk
+
+        The cache file keeps the raw ccxt markets so clients can be handed
+        them with set_markets() instead of calling load_markets() at
+        startup. MarketInfo records are derived on first lookup and served
+        from memory. Entries older than ttl are still served but reported by
+        stale() so they can be refreshed in the background.
+
+        Args:
+            path: JSON cache file
+            ttl: Seconds before an exchange's entry should be refreshed
+        """
+        self.path = path
+        self.ttl = ttl
+        self.logger = logging.getLogger(__name__)
+        self.entries: Dict[str, Dict] = {}
+        self._info: Dict[str, Dict[str, Optional[MarketInfo]]] = {}
+
+    def load(self) -> None:
+        """Read the cache file if present (blocking)"""
+        try:
+            with open(self.path) as f:
+                cache = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            self.logger.warning("Ignoring unreadable market cache %s: %s", self.path, e)
+            return
+        if cache.get('version') != CACHE_VERSION:
+            self.logger.info("Ignoring market cache %s from another version", self.path)
+            return
+        self.entries = cache['exchanges']
+        self._info = {}
+        self.logger.info("Loaded cached markets for %s", ', '.join(sorted(self.entries)))
+
+    def save(self) -> None:
+        """Write the cache file atomically (blocking)"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Per-process temporary name, since shard workers share the cache file
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'version': CACHE_VERSION, 'exchanges': self.entries}, f)
+        os.replace(temp_path, self.path)
+
+    def update(self, exchange_id: str, markets: Dict[str, Dict], precision_mode: int,
+               default_fees: Dict, trading_fees: Optional[Dict[str, Dict]] = None) -> None:
+        """
+        Replace an exchange's entry with freshly loaded data
+
+        Args:
+            exchange_id: ID of the exchange
+            markets: ccxt markets keyed by symbol
+            precision_mode: Exchange precisionMode
+            default_fees: Exchange-wide ccxt 'maker' and 'taker' fractions
+            trading_fees: Account fee tier per symbol from fetch_trading_fees, if available
+        """
+        self.entries[exchange_id] = {
+            'fetched_at': time.time(),
+            'precision_mode': precision_mode,
+            'maker': default_fees.get('maker'),
+            'taker': default_fees.get('taker'),
+            'markets': markets,
+            'trading_fees': trading_fees or {}
+        }
+        self._info.pop(exchange_id, None)
+
+    def markets(self, exchange_id: str) -> Optional[Dict[str, Dict]]:
+        """Cached raw ccxt markets for an exchange, or None"""
+        entry = self.entries.get(exchange_id)
+        return entry['markets'] if entry else None
+
+    def symbols(self, exchange_id: str) -> List[str]:
+        entry = self.entries.get(exchange_id)
+        return list(entry['markets']) if entry else []
+
+    def common_symbols(self, exchange_ids: List[str], min_exchanges: int = 2,
+                       quotes: Optional[List[str]] = None) -> List[str]:
+        """
+        Active spot symbols listed on at least min_exchanges of the given exchanges
+
+        Args:
+            exchange_ids: Exchanges to consider
+            min_exchanges: Minimum number of exchanges listing a symbol
+            quotes: Allowed quote currencies, or None for any
+
+        Returns:
+            Symbols, most widely listed first, then alphabetically
+        """
+        listings: Dict[str, int] = {}
+        for exchange_id in exchange_ids:
+            for symbol, market in (self.markets(exchange_id) or {}).items():
+                if market.get('active') is False or market.get('spot') is False:
+                    continue
+                if quotes is not None and market.get('quote') not in quotes:
+                    continue
+                listings[symbol] = listings.get(symbol, 0) + 1
+        symbols = [symbol for symbol, count in listings.items() if count >= min_exchanges]
+        return sorted(symbols, key=lambda symbol: (-listings[symbol], symbol))
+
+    def stale(self, exchange_ids: List[str]) -> List[str]:
+        """Exchanges among exchange_ids whose entry is older than the TTL or missing"""
+        now = time.time()
+        return [
+            exchange_id for exchange_id in exchange_ids
+            if exchange_id not in self.entries or now - self.entries[exchange_id]['fetched_at'] >= self.ttl
+        ]
+
+    def get(self, exchange_id: str, symbol: str) -> Optional[MarketInfo]:
+        """
+        Trading rules for a market
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+
+        Returns:
+            MarketInfo, or None if the market is not cached
+        """
+        infos = self._info.setdefault(exchange_id, {})
+        if symbol not in infos:
+            infos[symbol] = self._build(exchange_id, symbol)
+        return infos[symbol]
+
+    def _build(self, exchange_id: str, symbol: str) -> Optional[MarketInfo]:
+        entry = self.entries.get(exchange_id)
+        market = entry['markets'].get(symbol) if entry else None
+        if market is None:
+            return None
+        mode = entry['precision_mode']
+        precision = market.get('precision') or {}
+        limits = market.get('limits') or {}
+        amount_limits = limits.get('amount') or {}
+        fees = entry['trading_fees'].get(symbol) or {}
+
+        def fee(side: str) -> float:
+            # Account tier first, then the market's and the exchange's published fees
+            for source in (fees, market, entry):
+                if source.get(side) is not None:
+                    return source[side] * 100
+            return EXCHANGE_FEES.get(exchange_id, 0.0)
+
+        return MarketInfo(
+            symbol,
+            market.get('base'),
+            market.get('quote'),
+            fee('maker'),
+            fee('taker'),
+            precision_step(precision.get('amount'), mode),
+            precision_step(precision.get('price'), mode),
+            amount_limits.get('min'),
+            amount_limits.get('max'),
+            (limits.get('cost') or {}).get('min')
+        )
+
+    def fee(self, exchange_id: str, symbol: Optional[str] = None, maker: bool = False) -> float:
+        """
+        Trading fee percentage, falling back to EXCHANGE_FEES when nothing is cached
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol, or None for the exchange-wide fee
+            maker: Maker instead of taker fee
+
+        Returns:
+            Fee as a percentage
+        """
+        if symbol is not None:
+            info = self.get(exchange_id, symbol)
+            if info is not None:
+                return info.maker if maker else info.taker
+        entry = self.entries.get(exchange_id)
+        value = entry.get('maker' if maker else 'taker') if entry else None
+        return value * 100 if value is not None else EXCHANGE_FEES.get(exchange_id, 0.0)
+
+    def check_order(self, exchange_id: str, symbol: str, amount: float, price: Optional[float]) -> Optional[str]:
+        """
+        Check an already rounded order against the market's limits
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+            amount: Order amount in base currency
+            price: Order or expected price, if known, for the notional check
+
+        Returns:
+            Reason the exchange would reject the order, or None if it passes or the market is not cached
+        """
+        info = self.get(exchange_id, symbol)
+        if info is None:
+            return None
+        if amount <= 0:
+            return "amount rounds to zero"
+        if info.min_amount is not None and amount < info.min_amount:
+            return f"amount {amount} below minimum {info.min_amount}"
+        if info.max_amount is not None and amount > info.max_amount:
+            return f"amount {amount} above maximum {info.max_amount}"
+        if price is not None and info.min_cost is not None and amount * price < info.min_cost:
+            return f"notional {amount * price} below minimum {info.min_cost}"
+        return None
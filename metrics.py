@@ -0,0 +1,189 @@
+import logging
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+from aiohttp import web
+from models import AnyOpportunity
+from config import METRICS_BUCKETS
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, buckets: List[float] = METRICS_BUCKETS):
+        """
+        Fixed-bucket latency histogram
+
+        Args:
+            buckets: Upper bounds in seconds, ascending
+        """
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the q-th quantile (None if empty or beyond the last bucket)"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = 'arb_'):
+        """
+        In-process counters, gauges and histograms rendered in Prometheus text format
+
+        Recording is a dict lookup and an add, cheap enough to leave on in the
+        hot path. Label values are passed as keyword arguments.
+
+        Args:
+            prefix: Prepended to every metric name
+        """
+        self.prefix = prefix
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.gauges: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.help: Dict[str, str] = {}
+
+    def describe(self, name: str, text: str) -> None:
+        """Set the HELP text for a metric"""
+        self.help[name] = text
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        series = self.counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        series[key] = series.get(key, 0.0) + value
+
+    def set_gauge(self, name: str, value: float, **labels) -> None:
+        self.gauges.setdefault(name, {})[tuple(sorted(labels.items()))] = value
+
+    def histogram(self, name: str, **labels) -> Histogram:
+        """Histogram for a label set, created on first use; callers may keep the reference"""
+        series = self.histograms.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = Histogram()
+        return histogram
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        self.histogram(name, **labels).observe(value)
+
+    @staticmethod
+    def _labels(labels: Labels, extra: str = '') -> str:
+        parts = [f'{key}="{value}"' for key, value in labels]
+        if extra:
+            parts.append(extra)
+        return '{' + ','.join(parts) + '}' if parts else ''
+
+    def render(self) -> str:
+        """
+        Render every metric in Prometheus text exposition format
+
+        Returns:
+            Exposition text
+        """
+        lines = []
+        for kind, families in (('counter', self.counters), ('gauge', self.gauges)):
+            for name, series in families.items():
+                full_name = self.prefix + name
+                if name in self.help:
+                    lines.append(f"# HELP {full_name} {self.help[name]}")
+                lines.append(f"# TYPE {full_name} {kind}")
+                for labels, value in series.items():
+                    lines.append(f"{full_name}{self._labels(labels)} {value}")
+
+        for name, series in self.histograms.items():
+            full_name = self.prefix + name
+            if name in self.help:
+                lines.append(f"# HELP {full_name} {self.help[name]}")
+            lines.append(f"# TYPE {full_name} histogram")
+            for labels, histogram in series.items():
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    bucket = self._labels(labels, 'le="%s"' % bound)
+                    lines.append(f"{full_name}_bucket{bucket} {cumulative}")
+                bucket = self._labels(labels, 'le="+Inf"')
+                lines.append(f"{full_name}_bucket{bucket} {histogram.count}")
+                lines.append(f"{full_name}_sum{self._labels(labels)} {histogram.sum}")
+                lines.append(f"{full_name}_count{self._labels(labels)} {histogram.count}")
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry shared by every component
+metrics = MetricsRegistry()
+metrics.describe('stage_seconds', "Time to reach each hot-path stage (evaluated, verified, sent, acked) from the previous one")
+metrics.describe('tick_to_trade_seconds', "Market data receipt to order acknowledgement")
+metrics.describe('exchange_request_seconds', "Exchange API call latency excluding rate-limit waits")
+metrics.describe('exchange_request_errors_total', "Exchange API calls that raised")
+metrics.describe('exchange_retries_total', "Exchange API calls retried after a failure")
+metrics.describe('rate_limit_wait_seconds', "Time spent waiting for the request scheduler")
+metrics.describe('shard_opportunities_total', "Opportunities received from each shard worker")
+metrics.describe('http_connections_total', "HTTP connections opened (kind=new) or taken from the keep-alive pool (kind=reused)")
+
+
+def mark(opportunity: AnyOpportunity, stage: str, previous: str, **labels) -> int:
+    """
+    Stamp a stage time on an opportunity and record the time since the previous stage
+
+    Args:
+        opportunity: Opportunity carrying '<stage>_ns' monotonic timestamps
+        stage: Stage being reached ('evaluated', 'verified', ...)
+        previous: Stage the elapsed time is measured from
+        **labels: Extra labels for the stage histogram
+
+    Returns:
+        The monotonic timestamp recorded, in nanoseconds
+    """
+    now = time.monotonic_ns()
+    setattr(opportunity, stage + '_ns', now)
+    started = getattr(opportunity, previous + '_ns')
+    if started is not None:
+        metrics.observe('stage_seconds', (now - started) / 1e9, stage=stage, **labels)
+    return now
+
+
+class MetricsServer:
+    def __init__(self, registry: MetricsRegistry, host: str, port: int):
+        """
+        Local HTTP endpoint serving /metrics for Prometheus scrapes
+
+        Args:
+            registry: Registry to render
+            host: Interface to bind
+            port: Port to listen on
+        """
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self.logger = logging.getLogger(__name__)
+        self._runner: Optional[web.AppRunner] = None
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.registry.render(), content_type='text/plain', charset='utf-8')
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.add_routes([web.get('/metrics', self._handle)])
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self.logger.info("Serving metrics on http://%s:%s/metrics", self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
@@ -0,0 +1,393 @@
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Union
+
+# Offset turning monotonic nanoseconds into wall-clock nanoseconds for display
+_WALL_CLOCK_OFFSET_NS = time.time_ns() - time.monotonic_ns()
+
+
+def epoch_seconds(monotonic_ns: int) -> float:
+    """Seconds since the epoch at a monotonic nanosecond timestamp"""
+    return (monotonic_ns + _WALL_CLOCK_OFFSET_NS) / 1e9
+
+
+def wall_time(monotonic_ns: Optional[int]) -> Optional[str]:
+    """ISO 8601 UTC time of a monotonic nanosecond timestamp, or None if unset"""
+    if monotonic_ns is None:
+        return None
+    return datetime.fromtimestamp(epoch_seconds(monotonic_ns), timezone.utc).isoformat()
+
+
+class Interner:
+    def __init__(self):
+        """Two-way mapping between names and dense integer IDs, assigned on first use"""
+        self.ids: Dict[str, int] = {}
+        self.names: List[str] = []
+
+    def id(self, name: str) -> int:
+        index = self.ids.get(name)
+        if index is None:
+            index = self.ids[name] = len(self.names)
+            self.names.append(name)
+        return index
+
+    def name(self, index: int) -> str:
+        return self.names[index]
+
+
+# Process-wide ID tables shared by every component
+exchange_table = Interner()
+symbol_table = Interner()
+
+
+class Model:
+    """Base for hot-path records; dictionaries are built only at the edges via to_dict()"""
+    __slots__ = ()
+
+    def to_dict(self) -> Dict:
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.to_dict()})"
+
+
+class Quote(Model):
+    __slots__ = ('exchange_idx', 'symbol_idx', 'bid', 'ask', 'last', 'volume', 'bid_size', 'ask_size',
+                 'timestamp', 'received_ns')
+
+    def __init__(self, exchange_idx: int, symbol_idx: int, bid: Optional[float] = None,
+                 ask: Optional[float] = None, last: Optional[float] = None, volume: Optional[float] = 0.0,
+                 bid_size: Optional[float] = None, ask_size: Optional[float] = None,
+                 timestamp: Optional[int] = None, received_ns: Optional[int] = None):
+        """
+        Top of book for one (exchange, symbol)
+
+        Args:
+            exchange_idx: Exchange ID in exchange_table
+            symbol_idx: Symbol ID in symbol_table
+            bid: Best bid price
+            ask: Best ask price
+            last: Last traded price
+            volume: Base currency volume
+            bid_size: Size at the best bid, if known
+            ask_size: Size at the best ask, if known
+            timestamp: Exchange timestamp in milliseconds since the epoch
+            received_ns: Local monotonic receipt time in nanoseconds
+        """
+        self.exchange_idx = exchange_idx
+        self.symbol_idx = symbol_idx
+        self.bid = bid
+        self.ask = ask
+        self.last = last
+        self.volume = volume
+        self.bid_size = bid_size
+        self.ask_size = ask_size
+        self.timestamp = timestamp
+        self.received_ns = received_ns
+
+    @property
+    def exchange(self) -> str:
+        return exchange_table.names[self.exchange_idx]
+
+    @property
+    def symbol(self) -> str:
+        return symbol_table.names[self.symbol_idx]
+
+    def to_dict(self) -> Dict:
+        return {
+            'exchange': self.exchange,
+            'symbol': self.symbol,
+            'bid': self.bid,
+            'ask': self.ask,
+            'last': self.last,
+            'volume': self.volume,
+            'bid_size': self.bid_size,
+            'ask_size': self.ask_size,
+            'timestamp': self.timestamp
+        }
+
+
+class Opportunity(Model):
+    type = 'pairwise'
+    __slots__ = ('symbol_idx', 'buy_exchange_idx', 'sell_exchange_idx', 'buy_price', 'sell_price', 'trade_amount',
+                 'profit_percentage', 'expected_profit_usdt', 'buy_volume', 'sell_volume', 'total_fees_percentage',
+                 'marginal_spread', 'received_ns', 'evaluated_ns', 'verified_ns')
+
+    def __init__(self, symbol_idx: int, buy_exchange_idx: int, sell_exchange_idx: int, buy_price: float,
+                 sell_price: float, trade_amount: float, profit_percentage: float, expected_profit_usdt: float,
+                 buy_volume: float, sell_volume: float, total_fees_percentage: float):
+        """
+        A buy on one exchange matched with a sell of the same symbol on another
+
+        Stage timestamps (received_ns, evaluated_ns, verified_ns) are monotonic
+        nanoseconds, stamped as the opportunity moves through the hot path.
+
+        Args:
+            symbol_idx: Symbol ID in symbol_table
+            buy_exchange_idx: Exchange ID to buy on
+            sell_exchange_idx: Exchange ID to sell on
+            buy_price: Expected buy price
+            sell_price: Expected sell price
+            trade_amount: Size in base currency
+            profit_percentage: Net profit percentage after fees
+            expected_profit_usdt: Expected profit in quote currency after fees
+            buy_volume: Volume quoted on the buy exchange
+            sell_volume: Volume quoted on the sell exchange
+            total_fees_percentage: Combined fee percentage of both legs
+        """
+        self.symbol_idx = symbol_idx
+        self.buy_exchange_idx = buy_exchange_idx
+        self.sell_exchange_idx = sell_exchange_idx
+        self.buy_price = buy_price
+        self.sell_price = sell_price
+        self.trade_amount = trade_amount
+        self.profit_percentage = profit_percentage
+        self.expected_profit_usdt = expected_profit_usdt
+        self.buy_volume = buy_volume
+        self.sell_volume = sell_volume
+        self.total_fees_percentage = total_fees_percentage
+        self.marginal_spread = None
+        self.received_ns = None
+        self.evaluated_ns = None
+        self.verified_ns = None
+
+    @property
+    def symbol(self) -> str:
+        return symbol_table.names[self.symbol_idx]
+
+    @property
+    def buy_exchange(self) -> str:
+        return exchange_table.names[self.buy_exchange_idx]
+
+    @property
+    def sell_exchange(self) -> str:
+        return exchange_table.names[self.sell_exchange_idx]
+
+    def apply_sizing(self, sizing: Dict) -> None:
+        """Take size, fill prices, expected profit and marginal spread from optimal_trade_size"""
+        self.trade_amount = sizing['trade_amount']
+        self.buy_price = sizing['buy_price']
+        self.sell_price = sizing['sell_price']
+        self.expected_profit_usdt = sizing['expected_profit_usdt']
+        self.profit_percentage = sizing['profit_percentage']
+        self.marginal_spread = sizing['marginal_spread']
+
+    def to_dict(self) -> Dict:
+        return {
+            'type': self.type,
+            'symbol': self.symbol,
+            'buy_exchange': self.buy_exchange,
+            'sell_exchange': self.sell_exchange,
+            'buy_price': self.buy_price,
+            'sell_price': self.sell_price,
+            'trade_amount': self.trade_amount,
+            'profit_percentage': self.profit_percentage,
+            'expected_profit_usdt': self.expected_profit_usdt,
+            'buy_volume': self.buy_volume,
+            'sell_volume': self.sell_volume,
+            'total_fees_percentage': self.total_fees_percentage,
+            'marginal_spread': self.marginal_spread,
+            'timestamp': wall_time(self.evaluated_ns)
+        }
+
+
+class Leg(Model):
+    __slots__ = ('exchange_idx', 'symbol_idx', 'side', 'from_exchange_idx', 'from_currency', 'to_currency', 'rate')
+
+    def __init__(self, exchange_idx: int, symbol_idx: int, side: str, from_exchange_idx: int,
+                 from_currency: str, to_currency: str, rate: float):
+        """
+        One step of a cycle route: an order on a market, or a transfer between exchanges
+
+        Args:
+            exchange_idx: Exchange ID the step happens on (the destination for transfers)
+            symbol_idx: Symbol ID traded, or -1 for transfers
+            side: 'buy', 'sell' or 'transfer'
+            from_exchange_idx: Exchange ID holding the currency spent
+            from_currency: Currency spent
+            to_currency: Currency received
+            rate: Units of to_currency received per unit of from_currency after fees
+        """
+        self.exchange_idx = exchange_idx
+        self.symbol_idx = symbol_idx
+        self.side = side
+        self.from_exchange_idx = from_exchange_idx
+        self.from_currency = from_currency
+        self.to_currency = to_currency
+        self.rate = rate
+
+    @property
+    def exchange(self) -> str:
+        return exchange_table.names[self.exchange_idx]
+
+    @property
+    def symbol(self) -> Optional[str]:
+        return symbol_table.names[self.symbol_idx] if self.symbol_idx >= 0 else None
+
+    @property
+    def from_exchange(self) -> str:
+        return exchange_table.names[self.from_exchange_idx]
+
+    def to_dict(self) -> Dict:
+        return {
+            'exchange': self.exchange,
+            'symbol': self.symbol,
+            'side': self.side,
+            'from_exchange': self.from_exchange,
+            'from_currency': self.from_currency,
+            'to_currency': self.to_currency,
+            'rate': self.rate
+        }
+
+
+class CycleOpportunity(Model):
+    type = 'cycle'
+    __slots__ = ('legs', 'start_currency', 'start_exchange_idx', 'profit_percentage', 'start_amount',
+                 'expected_profit_usdt', 'received_ns', 'evaluated_ns', 'verified_ns')
+
+    def __init__(self, legs: List[Leg], profit_percentage: float):
+        """
+        A closed loop of legs ending in the currency it started with
+
+        Args:
+            legs: Route legs in execution order
+            profit_percentage: Net profit percentage of one loop
+        """
+        self.legs = legs
+        self.start_currency = legs[0].from_currency
+        self.start_exchange_idx = legs[0].from_exchange_idx
+        self.profit_percentage = profit_percentage
+        self.start_amount = 0.0
+        self.expected_profit_usdt = 0.0
+        self.received_ns = None
+        self.evaluated_ns = None
+        self.verified_ns = None
+
+    @property
+    def start_exchange(self) -> str:
+        return exchange_table.names[self.start_exchange_idx]
+
+    @property
+    def exchanges(self) -> List[str]:
+        """Exchanges with order legs, sorted"""
+        return sorted({leg.exchange for leg in self.legs if leg.side != 'transfer'})
+
+    def to_dict(self) -> Dict:
+        return {
+            'type': self.type,
+            'legs': [leg.to_dict() for leg in self.legs],
+            'start_currency': self.start_currency,
+            'start_exchange': self.start_exchange,
+            'start_amount': self.start_amount,
+            'profit_percentage': self.profit_percentage,
+            'expected_profit_usdt': self.expected_profit_usdt,
+            'exchanges': self.exchanges,
+            'timestamp': wall_time(self.evaluated_ns)
+        }
+
+
+AnyOpportunity = Union[Opportunity, CycleOpportunity]
+
+
+class Fill(Model):
+    __slots__ = ('id', 'client_order_id', 'exchange_idx', 'symbol_idx', 'order_type', 'side', 'amount', 'price',
+                 'status', 'timestamp')
+
+    def __init__(self, id: str, exchange_idx: int, symbol_idx: int, order_type: str, side: str, amount: float,
+                 price: Optional[float], status: str, timestamp: Optional[int], client_order_id: Optional[str] = None):
+        """
+        Acknowledged result of one of our orders
+
+        Args:
+            id: Exchange order ID
+            exchange_idx: Exchange ID in exchange_table
+            symbol_idx: Symbol ID in symbol_table
+            order_type: 'market' or 'limit'
+            side: 'buy' or 'sell'
+            amount: Filled amount in base currency
+            price: Average fill price, if reported
+            status: Exchange order status
+            timestamp: Exchange timestamp in milliseconds since the epoch
+            client_order_id: Client order ID sent with the order, if any
+        """
+        self.id = id
+        self.client_order_id = client_order_id
+        self.exchange_idx = exchange_idx
+        self.symbol_idx = symbol_idx
+        self.order_type = order_type
+        self.side = side
+        self.amount = amount
+        self.price = price
+        self.status = status
+        self.timestamp = timestamp
+
+    @property
+    def exchange(self) -> str:
+        return exchange_table.names[self.exchange_idx]
+
+    @property
+    def symbol(self) -> str:
+        return symbol_table.names[self.symbol_idx]
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'client_order_id': self.client_order_id,
+            'exchange': self.exchange,
+            'symbol': self.symbol,
+            'type': self.order_type,
+            'side': self.side,
+            'amount': self.amount,
+            'price': self.price,
+            'status': self.status,
+            'timestamp': self.timestamp
+        }
+
+
+class MarketInfo(Model):
+    __slots__ = ('symbol', 'base', 'quote', 'maker', 'taker', 'amount_step', 'price_step', 'min_amount',
+                 'max_amount', 'min_cost')
+
+    def __init__(self, symbol: str, base: str, quote: str, maker: float, taker: float,
+                 amount_step: Optional[float] = None, price_step: Optional[float] = None,
+                 min_amount: Optional[float] = None, max_amount: Optional[float] = None,
+                 min_cost: Optional[float] = None):
+        """
+        Trading rules of one market on one exchange
+
+        Args:
+            symbol: Trading pair symbol
+            base: Base currency
+            quote: Quote currency
+            maker: Maker fee percentage for our account tier
+            taker: Taker fee percentage for our account tier
+            amount_step: Order amount increment, if known
+            price_step: Price tick size, if known
+            min_amount: Minimum order amount in base currency
+            max_amount: Maximum order amount in base currency
+            min_cost: Minimum order notional in quote currency
+        """
+        self.symbol = symbol
+        self.base = base
+        self.quote = quote
+        self.maker = maker
+        self.taker = taker
+        self.amount_step = amount_step
+        self.price_step = price_step
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.min_cost = min_cost
+
+    def to_dict(self) -> Dict:
+        return {
+            'symbol': self.symbol,
+            'base': self.base,
+            'quote': self.quote,
+            'maker': self.maker,
+            'taker': self.taker,
+            'amount_step': self.amount_step,
+            'price_step': self.price_step,
+            'min_amount': self.min_amount,
+            'max_amount': self.max_amount,
+            'min_cost': self.min_cost
+        }
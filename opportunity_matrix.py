@@ -0,0 +1,128 @@
+import numpy as np
+from typing import Dict, List, Union
+from models import Opportunity, Quote, exchange_table, symbol_table
+from config import MIN_PROFIT_THRESHOLD, MAX_TRADE_AMOUNT
+
+
+class OpportunityMatrix:
+    def __init__(self, symbols: List[str], exchange_ids: List[str], fees: Dict[str, Union[float, Dict[str, float]]],
+                 min_profit: float = MIN_PROFIT_THRESHOLD, max_trade_amount: float = MAX_TRADE_AMOUNT):
+        """
+        Batched route analysis over (symbol x exchange) price arrays
+
+        Produces the same opportunities, in the same order, as
+        ArbitrageFinder._analyze_price_differences applied per symbol.
+
+        Args:
+            symbols: Trading pair symbols (rows)
+            exchange_ids: Exchange IDs (columns)
+            fees: Trading fee percentage per exchange, either one value or one per symbol
+            min_profit: Minimum net profit percentage for a route to qualify
+            max_trade_amount: Maximum trade notional in quote currency
+        """
+        self.symbols = list(symbols)
+        self.exchange_ids = list(exchange_ids)
+        self.symbol_index = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self.exchange_index = {exchange_id: i for i, exchange_id in enumerate(self.exchange_ids)}
+        self._symbol_idx = [symbol_table.id(symbol) for symbol in self.symbols]
+        self._exchange_idx = [exchange_table.id(exchange_id) for exchange_id in self.exchange_ids]
+        self.min_profit = min_profit
+        self.max_trade_amount = max_trade_amount
+
+        shape = (len(self.symbols), len(self.exchange_ids))
+        self.bids = np.full(shape, np.nan)
+        self.asks = np.full(shape, np.nan)
+        self.volumes = np.full(shape, np.nan)
+        # Fee percentage per (symbol, exchange) cell
+        self.fees = np.empty(shape)
+        for column, exchange_id in enumerate(self.exchange_ids):
+            fee = fees.get(exchange_id, 0.0)
+            for row, symbol in enumerate(self.symbols):
+                self.fees[row, column] = fee.get(symbol, 0.0) if isinstance(fee, dict) else fee
+        self._off_diagonal = ~np.eye(len(self.exchange_ids), dtype=bool)
+
+    def clear(self) -> None:
+        """Mark every quote as missing"""
+        self.bids.fill(np.nan)
+        self.asks.fill(np.nan)
+        self.volumes.fill(np.nan)
+
+    def update(self, symbol: str, exchange_id: str, ticker: Quote) -> None:
+        """
+        Store the latest ticker for one (symbol, exchange) cell
+
+        Args:
+            symbol: Trading pair symbol
+            exchange_id: ID of the exchange
+            ticker: Quote for the cell
+        """
+        row = self.symbol_index[symbol]
+        column = self.exchange_index[exchange_id]
+        self.bids[row, column] = np.nan if ticker.bid is None else ticker.bid
+        self.asks[row, column] = np.nan if ticker.ask is None else ticker.ask
+        self.volumes[row, column] = np.nan if ticker.volume is None else ticker.volume
+
+    def load(self, prices_by_symbol: Dict[str, Dict[str, Quote]]) -> None:
+        """
+        Replace all quotes with a fresh set of tickers
+
+        Args:
+            prices_by_symbol: Quotes keyed by symbol, then exchange ID
+        """
+        self.clear()
+        for symbol, exchange_prices in prices_by_symbol.items():
+            if symbol not in self.symbol_index:
+                continue
+            for exchange_id, ticker in exchange_prices.items():
+                if exchange_id in self.exchange_index:
+                    self.update(symbol, exchange_id, ticker)
+
+    def compute(self) -> List[Opportunity]:
+        """
+        Evaluate every (symbol, buy exchange, sell exchange) route in one pass
+
+        Returns:
+            List of arbitrage opportunities for routes above the profit threshold
+        """
+        # Axes: symbol, buy exchange, sell exchange
+        buy_price = self.asks[:, :, None]
+        sell_price = self.bids[:, None, :]
+        buy_fee = self.fees[:, :, None]
+        sell_fee = self.fees[:, None, :]
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            profit_percentage = ((sell_price - buy_price) / buy_price) * 100
+            total_fee_percentage = buy_fee + sell_fee
+            net_profit_percentage = profit_percentage - total_fee_percentage
+            mask = (net_profit_percentage >= self.min_profit) & self._off_diagonal
+
+        rows, buys, sells = np.nonzero(mask)
+        if rows.size == 0:
+            return []
+
+        buy_prices = self.asks[rows, buys]
+        sell_prices = self.bids[rows, sells]
+        buy_volumes = self.volumes[rows, buys]
+        sell_volumes = self.volumes[rows, sells]
+        buy_fees = self.fees[rows, buys]
+        sell_fees = self.fees[rows, sells]
+
+        trade_amounts = np.minimum(self.max_trade_amount / buy_prices, np.minimum(buy_volumes, sell_volumes))
+        expected_profit = (trade_amounts * sell_prices) - (trade_amounts * buy_prices)
+        expected_profit_after_fees = expected_profit - (
+            (trade_amounts * buy_prices * buy_fees / 100) +
+            (trade_amounts * sell_prices * sell_fees / 100)
+        )
+
+        symbol_idx = self._symbol_idx
+        exchange_idx = self._exchange_idx
+        # tolist() converts each column to Python floats in one call
+        return [
+            Opportunity(symbol_idx[row], exchange_idx[buy], exchange_idx[sell], *values)
+            for row, buy, sell, *values in zip(
+                rows.tolist(), buys.tolist(), sells.tolist(),
+                buy_prices.tolist(), sell_prices.tolist(), trade_amounts.tolist(),
+                net_profit_percentage[rows, buys, sells].tolist(), expected_profit_after_fees.tolist(),
+                buy_volumes.tolist(), sell_volumes.tolist(), (buy_fees + sell_fees).tolist()
+            )
+        ]
@@ -0,0 +1,332 @@
+import asyncio
+import logging
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+
+class BookSide:
+    def __init__(self, is_bid: bool):
+        """
+        One side of an L2 order book stored as parallel sorted arrays
+
+        Prices are kept as sort keys in best-first order (bids are negated) so
+        both sides share the same bisect logic. Cumulative sizes come from a
+        Fenwick tree over the sizes: a size change updates it in O(log n),
+        and inserting or removing a level only invalidates the entries from
+        that level on, which are rebuilt when a query next reaches them.
+
+        Args:
+            is_bid: True for the bid side, False for the ask side
+        """
+        self.is_bid = is_bid
+        self.keys = array('d')
+        self.sizes = array('d')
+        # 1-based Fenwick tree; holds only the entries still valid, extended lazily
+        self._tree = array('d', [0.0])
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _key(self, price: float) -> float:
+        return -price if self.is_bid else price
+
+    def clear(self) -> None:
+        self.keys = array('d')
+        self.sizes = array('d')
+        self._tree = array('d', [0.0])
+
+    def load(self, levels: Iterable[Sequence[float]]) -> None:
+        """Replace the side with a full snapshot of [price, size] levels"""
+        ordered = sorted((self._key(float(price)), float(size))
+                         for price, size, *_ in levels if size > 0)
+        self.keys = array('d', (key for key, _ in ordered))
+        self.sizes = array('d', (size for _, size in ordered))
+        self._tree = array('d', [0.0])
+
+    def update(self, price: float, size: float) -> None:
+        """Set the size at a price level, removing it when size is zero"""
+        key = self._key(price)
+        index = bisect_left(self.keys, key)
+        exists = index < len(self.keys) and self.keys[index] == key
+        if size <= 0:
+            if exists:
+                del self.keys[index]
+                del self.sizes[index]
+                self._invalidate(index)
+        elif exists:
+            self._add(index, size - self.sizes[index])
+            self.sizes[index] = size
+        else:
+            self.keys.insert(index, key)
+            self.sizes.insert(index, size)
+            self._invalidate(index)
+
+    def best(self) -> Optional[float]:
+        """Best price on this side or None if empty"""
+        if not self.keys:
+            return None
+        return self._key(self.keys[0])
+
+    def levels(self, depth: int) -> List[List[float]]:
+        """Top levels as [price, size] pairs, best first"""
+        return [[self._key(key), size] for key, size in zip(self.keys[:depth], self.sizes[:depth])]
+
+    def iter_levels(self) -> Iterator[Tuple[float, float]]:
+        """Iterate (price, size) levels best first without copying the side"""
+        key_of = self._key
+        for key, size in zip(self.keys, self.sizes):
+            yield key_of(key), size
+
+    def _invalidate(self, index: int) -> None:
+        """Drop tree entries covering levels at or after index, whose positions have shifted"""
+        if len(self._tree) > index + 1:
+            del self._tree[index + 1:]
+
+    def _add(self, index: int, delta: float) -> None:
+        """Add a size change at a level to every valid tree entry covering it"""
+        tree = self._tree
+        position = index + 1
+        while position < len(tree):
+            tree[position] += delta
+            position += position & -position
+
+    def _prefix(self, count: int) -> float:
+        """Total size of the best count levels"""
+        tree = self._tree
+        sizes = self.sizes
+        # Rebuild missing entries from the sizes and the lower entries they cover
+        for position in range(len(tree), count + 1):
+            total = sizes[position - 1]
+            lowest = position & -position
+            step = 1
+            while step < lowest:
+                total += tree[position - step]
+                step <<= 1
+            tree.append(total)
+        total = 0.0
+        while count:
+            total += tree[count]
+            count -= count & -count
+        return total
+
+    def volume_to(self, price: float) -> float:
+        """
+        Total size at prices equal to or better than a limit price
+
+        Args:
+            price: Worst acceptable price (maximum for asks, minimum for bids)
+
+        Returns:
+            Cumulative size available up to the limit
+        """
+        return self._prefix(bisect_right(self.keys, self._key(price)))
+
+    def volume_within_bps(self, bps: float) -> float:
+        """
+        Total size available within a distance of the best price
+
+        Args:
+            bps: Distance from the best price in basis points
+
+        Returns:
+            Cumulative size available within the band
+        """
+        best = self.best()
+        if best is None:
+            return 0.0
+        offset = bps / 10000
+        limit = best * (1 - offset) if self.is_bid else best * (1 + offset)
+        return self.volume_to(limit)
+
+
+class LocalOrderBook:
+    def __init__(self, exchange_id: str, symbol: str):
+        """
+        Incrementally maintained L2 replica for one symbol on one exchange
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+        """
+        self.exchange_id = exchange_id
+        self.symbol = symbol
+        self.bids = BookSide(is_bid=True)
+        self.asks = BookSide(is_bid=False)
+        self.sequence: Optional[int] = None
+        self.timestamp: Optional[int] = None
+        self.in_sync = False
+
+    def apply_snapshot(self, bids: Iterable, asks: Iterable, sequence: Optional[int],
+                       timestamp: Optional[int] = None) -> None:
+        """
+        Replace the book with a full snapshot
+
+        Args:
+            bids: Bid levels as [price, size]
+            asks: Ask levels as [price, size]
+            sequence: Exchange sequence number of the snapshot
+            timestamp: Snapshot timestamp in milliseconds
+        """
+        self.bids.load(bids)
+        self.asks.load(asks)
+        self.sequence = sequence
+        self.timestamp = timestamp
+        self.in_sync = True
+
+    def apply_diff(self, bids: Iterable, asks: Iterable, first_sequence: Optional[int],
+                   last_sequence: Optional[int], timestamp: Optional[int] = None) -> bool:
+        """
+        Apply an incremental update covering sequences first..last
+
+        Args:
+            bids: Changed bid levels as [price, size] (size 0 removes the level)
+            asks: Changed ask levels as [price, size]
+            first_sequence: First sequence number covered by the update
+            last_sequence: Last sequence number covered by the update
+            timestamp: Update timestamp in milliseconds
+
+        Returns:
+            False if a sequence gap was detected and the book needs a resync
+        """
+        if not self.in_sync:
+            return False
+        if self.sequence is not None and last_sequence is not None:
+            if last_sequence <= self.sequence:
+                return True
+            if first_sequence is not None and first_sequence > self.sequence + 1:
+                self.in_sync = False
+                return False
+
+        for price, size, *_ in bids:
+            self.bids.update(float(price), float(size))
+        for price, size, *_ in asks:
+            self.asks.update(float(price), float(size))
+
+        if last_sequence is not None:
+            self.sequence = last_sequence
+        if timestamp is not None:
+            self.timestamp = timestamp
+        return True
+
+    def to_dict(self, depth: int = 20) -> Dict:
+        """Order book in the shape returned by ExchangeManager.get_order_book"""
+        return {
+            'bids': self.bids.levels(depth),
+            'asks': self.asks.levels(depth),
+            'timestamp': self.timestamp
+        }
+
+
+class OrderBookManager:
+    def __init__(self, exchange_manager, depth: int = 100):
+        """
+        Keep local order book replicas in sync from snapshots and diff updates
+
+        While the exchange manager is recording, books changed by diffs are
+        sampled into the recording so a replay sees the depth the live finder
+        used, not just REST snapshots.
+
+        Args:
+            exchange_manager: ExchangeManager used to fetch resync snapshots
+            depth: Number of levels requested for snapshots
+        """
+        self.exchange_manager = exchange_manager
+        self.depth = depth
+        self.books: Dict[Tuple[str, str], LocalOrderBook] = {}
+        self.logger = logging.getLogger(__name__)
+        self._pending: Dict[Tuple[str, str], List[Tuple]] = {}
+        self._resyncing: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    def get_book(self, exchange_id: str, symbol: str) -> Optional[LocalOrderBook]:
+        """
+        Get an in-sync local book without any I/O
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+
+        Returns:
+            LocalOrderBook or None if the book is missing or out of sync
+        """
+        book = self.books.get((exchange_id, symbol))
+        if book is None or not book.in_sync:
+            return None
+        return book
+
+    def handle_diff(self, exchange_id: str, symbol: str, bids: Iterable, asks: Iterable,
+                    first_sequence: Optional[int], last_sequence: Optional[int],
+                    timestamp: Optional[int] = None) -> None:
+        """
+        Apply a diff update, buffering it and triggering a resync on sequence gaps
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+            bids: Changed bid levels
+            asks: Changed ask levels
+            first_sequence: First sequence number covered by the update
+            last_sequence: Last sequence number covered by the update
+            timestamp: Update timestamp in milliseconds
+        """
+        key = (exchange_id, symbol)
+        update = (list(bids), list(asks), first_sequence, last_sequence, timestamp)
+        book = self.books.get(key)
+
+        if book is not None and book.in_sync and book.apply_diff(*update):
+            self._record(book)
+            return
+
+        self._pending.setdefault(key, []).append(update)
+        if key not in self._resyncing:
+            if book is not None:
+                self.logger.warning("Sequence gap in %s %s order book, resyncing", exchange_id, symbol)
+            self._resyncing[key] = asyncio.create_task(self.resync(exchange_id, symbol))
+
+    async def resync(self, exchange_id: str, symbol: str) -> bool:
+        """
+        Fetch a fresh snapshot and replay buffered diffs on top of it
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+
+        Returns:
+            True if the book is in sync afterwards
+        """
+        key = (exchange_id, symbol)
+        try:
+            snapshot = await self.exchange_manager.get_order_book(exchange_id, symbol, self.depth)
+            if not snapshot:
+                self.logger.error("Failed to resync %s %s order book", exchange_id, symbol)
+                return False
+
+            book = self.books.setdefault(key, LocalOrderBook(exchange_id, symbol))
+            book.apply_snapshot(snapshot['bids'], snapshot['asks'],
+                                snapshot.get('nonce'), snapshot.get('timestamp'))
+            for update in self._pending.pop(key, []):
+                if not book.apply_diff(*update):
+                    self.logger.warning("Buffered diff gap after resync of %s %s", exchange_id, symbol)
+                    return False
+            self._record(book)
+            return book.in_sync
+        finally:
+            self._resyncing.pop(key, None)
+            # Diffs buffered for a failed resync are useless to the next one, which
+            # starts from a newer snapshot; dropping them bounds the buffer while
+            # the venue's snapshots keep failing
+            book = self.books.get(key)
+            if book is None or not book.in_sync:
+                self._pending.pop(key, None)
+
+    def _record(self, book: LocalOrderBook) -> None:
+        recorder = self.exchange_manager.recorder
+        if recorder is not None:
+            recorder.record_local_book(book.exchange_id, book.symbol, book)
+
+    async def close(self) -> None:
+        """Cancel any in-flight resyncs"""
+        for task in self._resyncing.values():
+            task.cancel()
+        await asyncio.gather(*self._resyncing.values(), return_exceptions=True)
+        self._resyncing.clear()
@@ -0,0 +1,400 @@
+import argparse
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from contextlib import closing
+from typing import Dict, List, Optional, Sequence, Tuple
+from metrics import metrics
+from models import AnyOpportunity, Fill, epoch_seconds
+from config import (
+    DB_BACKEND, DB_CONFIG, SQLITE_PATH, PERSIST_BATCH_SIZE, PERSIST_FLUSH_INTERVAL, PERSIST_BUFFER_SIZE
+)
+
+# Column name and portable type per table; every table also gets an auto-increment id
+TABLES: Dict[str, List[Tuple[str, str]]] = {
+    'opportunities': [
+        ('ts', 'float'), ('route', 'text'), ('type', 'text'), ('symbol', 'text'),
+        ('buy_exchange', 'text'), ('sell_exchange', 'text'), ('profit_percentage', 'float'),
+        ('expected_profit', 'float'), ('trade_amount', 'float'), ('buy_price', 'float'),
+        ('sell_price', 'float'), ('detail', 'text')
+    ],
+    'orders': [
+        ('ts', 'float'), ('exchange', 'text'), ('symbol', 'text'), ('order_type', 'text'), ('side', 'text'),
+        ('requested_amount', 'float'), ('limit_price', 'float'), ('order_id', 'text'),
+        ('client_order_id', 'text'), ('status', 'text'), ('filled_amount', 'float'),
+        ('average_price', 'float'), ('latency_ms', 'float')
+    ],
+    'trades': [
+        ('ts', 'float'), ('trade_id', 'text'), ('route', 'text'), ('type', 'text'), ('status', 'text'),
+        ('expected_profit', 'float'), ('actual_profit', 'float'), ('amount', 'float'), ('detail', 'text')
+    ],
+    'stats': [
+        ('ts', 'float'), ('opportunities_found', 'int'), ('trades_executed', 'int'),
+        ('successful_trades', 'int'), ('failed_trades', 'int'), ('total_profit', 'float'),
+        ('start_time', 'text')
+    ]
+}
+
+INDEXES = [
+    ('opportunities', ('ts',)),
+    ('opportunities', ('route', 'ts')),
+    ('orders', ('ts',)),
+    ('orders', ('exchange', 'ts')),
+    ('trades', ('ts',)),
+    ('trades', ('route', 'ts')),
+    ('stats', ('ts',)),
+]
+
+# Tables whose last column holds a JSON document, encoded on the writer thread
+JSON_TABLES = {'opportunities', 'trades'}
+
+
+def route_name(opportunity: AnyOpportunity) -> str:
+    """Readable route identifier used to group opportunities and trades"""
+    if opportunity.type == 'cycle':
+        return ' '.join(f"{leg.side}:{leg.symbol}@{leg.exchange}" for leg in opportunity.legs
+                        if leg.side != 'transfer')
+    return f"{opportunity.symbol} {opportunity.buy_exchange}>{opportunity.sell_exchange}"
+
+
+class SQLiteBackend:
+    placeholder = '?'
+    primary_key = 'INTEGER PRIMARY KEY'
+    types = {'float': 'REAL', 'int': 'INTEGER', 'text': 'TEXT'}
+
+    def __init__(self, path: str = SQLITE_PATH):
+        """
+        Local single-file database
+
+        Args:
+            path: Database file path
+        """
+        self.path = path
+
+    def connect(self):
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        # WAL lets query helpers read while the writer thread commits
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def insert_many(self, cursor, table: str, columns: Sequence[str], rows: List[tuple]) -> None:
+        values = ', '.join('?' for _ in columns)
+        cursor.executemany(f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({values})", rows)
+
+
+class PostgresBackend:
+    placeholder = '%s'
+    primary_key = 'BIGSERIAL PRIMARY KEY'
+    types = {'float': 'DOUBLE PRECISION', 'int': 'BIGINT', 'text': 'TEXT'}
+
+    def __init__(self, config: Dict = DB_CONFIG):
+        """
+        PostgreSQL server reached with psycopg2
+
+        Args:
+            config: Connection parameters ('host', 'database', 'user', 'password', ...)
+        """
+        self.config = config
+
+    def connect(self):
+        import psycopg2
+        return psycopg2.connect(**{key: value for key, value in self.config.items() if value is not None})
+
+    def insert_many(self, cursor, table: str, columns: Sequence[str], rows: List[tuple]) -> None:
+        from psycopg2.extras import execute_values
+        # One multi-row INSERT per batch instead of a round trip per row
+        execute_values(cursor, f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s", rows, page_size=len(rows))
+
+
+BACKENDS = {
+    'sqlite': SQLiteBackend,
+    'postgres': PostgresBackend,
+}
+
+
+class TradeStore:
+    def __init__(self, backend=None, batch_size: int = PERSIST_BATCH_SIZE,
+                 flush_interval: float = PERSIST_FLUSH_INTERVAL, buffer_size: int = PERSIST_BUFFER_SIZE):
+        """
+        Write-behind store for opportunities, orders, trades and stats snapshots
+
+        Recording only captures a row tuple and enqueues it. A background
+        thread writes batched inserts when batch_size rows are waiting or
+        every flush_interval seconds, so the event loop never waits on the
+        database. When buffer_size rows are pending, new rows are dropped and
+        counted instead of growing memory.
+
+        Args:
+            backend: SQLiteBackend or PostgresBackend (defaults to DB_BACKEND)
+            batch_size: Pending rows that trigger an early flush
+            flush_interval: Maximum seconds between flushes
+            buffer_size: Maximum rows waiting to be written
+        """
+        self.backend = backend or BACKENDS[DB_BACKEND]()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.logger = logging.getLogger(__name__)
+        self.dropped = 0
+        self.failed = 0
+        self.written = 0
+
+        self._queue: queue.Queue = queue.Queue(buffer_size)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def create_schema(self) -> None:
+        """Create missing tables and indexes (blocking)"""
+        with closing(self.backend.connect()) as connection:
+            with closing(connection.cursor()) as cursor:
+                for table, columns in TABLES.items():
+                    definitions = ', '.join(f"{name} {self.backend.types[kind]}" for name, kind in columns)
+                    cursor.execute(f"CREATE TABLE IF NOT EXISTS {table} (id {self.backend.primary_key}, {definitions})")
+                for table, columns in INDEXES:
+                    cursor.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_{'_'.join(columns)} "
+                                   f"ON {table} ({', '.join(columns)})")
+            connection.commit()
+
+    def start(self) -> None:
+        """Create the schema and start the writer thread (blocking; run before trading)"""
+        self.create_schema()
+        self._thread = threading.Thread(target=self._run, name='trade-store', daemon=True)
+        self._thread.start()
+
+    def _put(self, table: str, row: tuple) -> None:
+        try:
+            self._queue.put_nowait((table, row))
+        except queue.Full:
+            self.dropped += 1
+            metrics.inc('persist_dropped_total', table=table)
+            return
+        if self._queue.qsize() >= self.batch_size:
+            self._wake.set()
+
+    def record_opportunity(self, opportunity: AnyOpportunity) -> None:
+        """Queue one detected opportunity"""
+        ts = epoch_seconds(opportunity.evaluated_ns) if opportunity.evaluated_ns is not None else time.time()
+        if opportunity.type == 'cycle':
+            self._put('opportunities', (
+                ts, route_name(opportunity), 'cycle', None, None, None, opportunity.profit_percentage,
+                opportunity.expected_profit_usdt, opportunity.start_amount, None, None,
+                [leg.to_dict() for leg in opportunity.legs]
+            ))
+        else:
+            self._put('opportunities', (
+                ts, route_name(opportunity), 'pairwise', opportunity.symbol, opportunity.buy_exchange,
+                opportunity.sell_exchange, opportunity.profit_percentage, opportunity.expected_profit_usdt,
+                opportunity.trade_amount, opportunity.buy_price, opportunity.sell_price, None
+            ))
+
+    def record_opportunities(self, opportunities: List[AnyOpportunity]) -> None:
+        for opportunity in opportunities:
+            self.record_opportunity(opportunity)
+
+    def record_order(self, exchange_id: str, symbol: str, order_type: str, side: str, amount: float,
+                     price: Optional[float], fill: Optional[Fill], latency_ms: float) -> None:
+        """
+        Queue one order placement and its outcome
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+            order_type: 'market' or 'limit'
+            side: 'buy' or 'sell'
+            amount: Requested amount
+            price: Limit price, if any
+            fill: Acknowledged fill, or None if placement failed
+            latency_ms: Time from the first send to the final outcome
+        """
+        if fill is None:
+            self._put('orders', (time.time(), exchange_id, symbol, order_type, side, amount, price,
+                                 None, None, 'failed', None, None, latency_ms))
+        else:
+            self._put('orders', (time.time(), exchange_id, symbol, order_type, side, amount, price,
+                                 fill.id, fill.client_order_id, fill.status, fill.amount, fill.price, latency_ms))
+
+    def record_trade(self, opportunity: AnyOpportunity, trade_result: Optional[Dict]) -> None:
+        """Queue the outcome of one execution attempt (trade_result None means it failed)"""
+        route = route_name(opportunity)
+        if trade_result is None:
+            amount = opportunity.start_amount if opportunity.type == 'cycle' else opportunity.trade_amount
+            self._put('trades', (time.time(), None, route, opportunity.type, 'failed',
+                                 opportunity.expected_profit_usdt, None, amount, None))
+        else:
+            self._put('trades', (time.time(), trade_result['id'], route, opportunity.type, trade_result['status'],
+                                 trade_result['expected_profit'], trade_result['actual_profit'],
+                                 trade_result.get('amount', trade_result.get('start_amount')), dict(trade_result)))
+
+    def record_stats(self, stats: Dict) -> None:
+        """Queue a snapshot of the bot's running statistics"""
+        self._put('stats', (time.time(), stats['opportunities_found'], stats['trades_executed'],
+                            stats['successful_trades'], stats['failed_trades'], stats['total_profit'],
+                            stats['start_time']))
+
+    def _run(self) -> None:
+        """Background writer loop"""
+        connection = None
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            connection = self._flush(connection)
+        connection = self._flush(connection)
+        if connection is not None:
+            connection.close()
+
+    def _flush(self, connection):
+        """Write everything pending in one transaction; returns the connection to reuse, or None to reconnect"""
+        rows_by_table: Dict[str, List[tuple]] = {}
+        count = 0
+        for _ in range(self._queue.qsize()):
+            try:
+                table, row = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if table in JSON_TABLES and row[-1] is not None:
+                row = row[:-1] + (json.dumps(row[-1], default=str),)
+            rows_by_table.setdefault(table, []).append(row)
+            count += 1
+        if not count:
+            return connection
+
+        try:
+            if connection is None:
+                connection = self.backend.connect()
+            with closing(connection.cursor()) as cursor:
+                for table, rows in rows_by_table.items():
+                    self.backend.insert_many(cursor, table, [name for name, _ in TABLES[table]], rows)
+            connection.commit()
+            self.written += count
+            return connection
+        except Exception as e:
+            self.failed += count
+            self.logger.error("Failed to persist %s rows: %s", count, e)
+            if connection is not None:
+                try:
+                    connection.close()
+                except Exception:
+                    pass
+            return None
+
+    def close(self) -> None:
+        """Flush pending rows and stop the writer thread"""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.logger.info("Trade store closed: %s rows written, %s dropped, %s failed",
+                         self.written, self.dropped, self.failed)
+
+    def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        with closing(self.backend.connect()) as connection:
+            with closing(connection.cursor()) as cursor:
+                cursor.execute(sql.replace('?', self.backend.placeholder), params)
+                return cursor.fetchall()
+
+    def latest_stats(self) -> Optional[Dict]:
+        """
+        Most recent stats snapshot (blocking)
+
+        Returns:
+            Dictionary in the shape of ArbitrageBot.stats plus 'runtime', the
+            seconds from start_time to the snapshot, or None if none was recorded
+        """
+        rows = self._query("SELECT ts, opportunities_found, trades_executed, successful_trades, failed_trades, "
+                           "total_profit, start_time FROM stats ORDER BY ts DESC LIMIT 1")
+        if not rows:
+            return None
+        ts, found, executed, successful, failed, profit, start_time = rows[0]
+        # start_time is a naive UTC ISO timestamp, ts is epoch seconds
+        started = datetime.fromisoformat(start_time).replace(tzinfo=timezone.utc).timestamp()
+        return {
+            'opportunities_found': found,
+            'trades_executed': executed,
+            'successful_trades': successful,
+            'failed_trades': failed,
+            'total_profit': profit,
+            'start_time': start_time,
+            'runtime': max(0.0, ts - started)
+        }
+
+    def recent_pnl(self, window: float = 86400) -> Dict:
+        """
+        Trade counts and profit over a recent window (blocking)
+
+        Args:
+            window: Seconds to look back
+
+        Returns:
+            Dictionary with trade counts, realized and expected profit
+        """
+        rows = self._query(
+            "SELECT COUNT(*), "
+            "COALESCE(SUM(CASE WHEN status = 'failed' THEN 0 ELSE 1 END), 0), "
+            "COALESCE(SUM(actual_profit), 0), "
+            "COALESCE(SUM(CASE WHEN status = 'failed' THEN 0 ELSE expected_profit END), 0) "
+            "FROM trades WHERE ts >= ?",
+            (time.time() - window,)
+        )
+        attempts, completed, realized, expected = rows[0]
+        return {
+            'window_seconds': window,
+            'trades': attempts,
+            'completed': completed,
+            'failed': attempts - completed,
+            'realized_profit': realized,
+            'expected_profit': expected
+        }
+
+    def route_stats(self, window: float = 86400, limit: int = 20) -> List[Dict]:
+        """
+        Per-route opportunity counts, hit rate and profit over a recent window (blocking)
+
+        Args:
+            window: Seconds to look back
+            limit: Maximum routes returned, most profitable first
+
+        Returns:
+            List of dictionaries, one per route
+        """
+        since = (time.time() - window,)
+        routes: Dict[str, Dict] = {}
+        for route, seen, average, best in self._query(
+                "SELECT route, COUNT(*), AVG(profit_percentage), MAX(profit_percentage) "
+                "FROM opportunities WHERE ts >= ? GROUP BY route", since):
+            routes[route] = {'route': route, 'opportunities': seen, 'avg_profit_percentage': average,
+                             'max_profit_percentage': best, 'trades': 0, 'completed': 0, 'realized_profit': 0.0}
+        for route, attempts, completed, realized in self._query(
+                "SELECT route, COUNT(*), SUM(CASE WHEN status = 'failed' THEN 0 ELSE 1 END), "
+                "COALESCE(SUM(actual_profit), 0) FROM trades WHERE ts >= ? GROUP BY route", since):
+            entry = routes.setdefault(route, {'route': route, 'opportunities': 0, 'avg_profit_percentage': None,
+                                              'max_profit_percentage': None})
+            entry.update(trades=attempts, completed=completed, realized_profit=realized)
+        for entry in routes.values():
+            entry['hit_rate'] = entry['completed'] / entry['trades'] if entry['trades'] else None
+        return sorted(routes.values(), key=lambda x: x['realized_profit'], reverse=True)[:limit]
+
+
+def main():
+    """Command line entry point printing recent PnL and route statistics"""
+    parser = argparse.ArgumentParser(description="Summarize persisted trading history")
+    parser.add_argument('--hours', type=float, default=24, help="Hours to look back")
+    parser.add_argument('--routes', type=int, default=20, help="Number of routes to list")
+    args = parser.parse_args()
+
+    store = TradeStore()
+    store.create_schema()
+    window = args.hours * 3600
+    print(json.dumps({
+        'pnl': store.recent_pnl(window),
+        'routes': store.route_stats(window, args.routes)
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+import math
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from models import AnyOpportunity, Quote
+from config import (
+    EXCHANGE_RATE_LIMITS, REQUEST_WEIGHTS, POLL_MIN_INTERVAL, POLL_MAX_INTERVAL, POLL_SCORE_WEIGHTS,
+    POLL_HOT_VOLATILITY_BPS, POLL_LIQUID_VOLUME, POLL_EWMA_ALPHA, POLL_BUDGET_SHARE
+)
+
+Key = Tuple[str, str]
+
+
+def poll_budget(exchange_id: str, share: float = POLL_BUDGET_SHARE) -> float:
+    """Request weight per second that market data polling may spend on an exchange"""
+    limits = EXCHANGE_RATE_LIMITS.get(exchange_id, EXCHANGE_RATE_LIMITS['default'])
+    return limits['refill_rate'] * share
+
+
+class PollScheduler:
+    def __init__(self, symbols: List[str], bulk: Dict[str, bool], listed: Optional[Dict[str, Iterable[str]]] = None,
+                 min_interval: float = POLL_MIN_INTERVAL, max_interval: float = POLL_MAX_INTERVAL,
+                 alpha: float = POLL_EWMA_ALPHA, budget_share: float = POLL_BUDGET_SHARE):
+        """
+        Per (exchange, symbol) refresh rates for REST polling within each exchange's request budget
+
+        Each pair gets a score in [0, 1] from its recent mid-price volatility,
+        how often it appears in opportunities and its traded volume. The score
+        maps geometrically onto [min_interval, max_interval], so hot routes
+        refresh every few hundred milliseconds and dead ones about once a
+        minute. Intervals are then stretched until the polling demand fits
+        the exchange's budget: for exchanges polled per symbol the whole
+        schedule is scaled, for exchanges with a bulk ticker call the call
+        rate is capped instead.
+
+        Args:
+            symbols: Trading pair symbols to poll
+            bulk: Whether each exchange supports fetch_tickers, keyed by exchange ID
+            listed: Symbols each exchange lists, keyed by exchange ID; an exchange
+                is only polled for the symbols it lists, or for all of them
+                when its listing is missing or empty
+            min_interval: Fastest refresh in seconds
+            max_interval: Slowest refresh in seconds
+            alpha: Weight of the newest observation in the moving averages
+            budget_share: Share of each exchange's rate limit available to this scheduler
+        """
+        self.symbols = list(symbols)
+        self.bulk = bulk
+        self.exchange_symbols: Dict[str, List[str]] = {}
+        for exchange_id in bulk:
+            listing = set((listed or {}).get(exchange_id) or ())
+            self.exchange_symbols[exchange_id] = (
+                [symbol for symbol in self.symbols if symbol in listing] if listing else list(self.symbols)
+            )
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.alpha = alpha
+        self.budget_share = budget_share
+
+        self.quotes: Dict[str, Dict[str, Quote]] = {symbol: {} for symbol in self.symbols}
+        self.next_due: Dict[Key, float] = {}
+        self.intervals: Dict[Key, float] = {}
+        self.volatility: Dict[Key, float] = {}
+        self.hit_rate: Dict[Key, float] = {}
+        self.quote_volume: Dict[Key, float] = {}
+        self._last_mid: Dict[Key, float] = {}
+        self._scale: Dict[str, float] = {}
+        # Earliest time the next bulk call may be made on each exchange
+        self._next_call: Dict[str, float] = {}
+        self._call_gap: Dict[str, float] = {}
+
+        start = time.monotonic()
+        for exchange_id, exchange_symbols in self.exchange_symbols.items():
+            for symbol in exchange_symbols:
+                key = (exchange_id, symbol)
+                # New pairs start hot and cool down as their own volatility is observed
+                self.volatility[key] = POLL_HOT_VOLATILITY_BPS
+                self.hit_rate[key] = 0.0
+            self._rebalance(exchange_id)
+            # Spread the first per-symbol polls over one interval instead of a burst at startup
+            count = len(exchange_symbols)
+            for i, symbol in enumerate(exchange_symbols):
+                key = (exchange_id, symbol)
+                self.next_due[key] = start if bulk[exchange_id] else start + self.intervals[key] * i / count
+
+    def score(self, key: Key) -> float:
+        """Priority of a pair in [0, 1]"""
+        volatility = min(1.0, self.volatility[key] / POLL_HOT_VOLATILITY_BPS)
+        liquidity = min(1.0, math.log10(1 + self.quote_volume.get(key, 0.0)) / math.log10(1 + POLL_LIQUID_VOLUME))
+        return (POLL_SCORE_WEIGHTS['volatility'] * volatility +
+                POLL_SCORE_WEIGHTS['hit_rate'] * self.hit_rate[key] +
+                POLL_SCORE_WEIGHTS['liquidity'] * liquidity)
+
+    def _raw_interval(self, key: Key) -> float:
+        return self.max_interval * (self.min_interval / self.max_interval) ** self.score(key)
+
+    def _rebalance(self, exchange_id: str) -> None:
+        """Recompute an exchange's intervals from scores, then fit them to its budget"""
+        budget = poll_budget(exchange_id, self.budget_share)
+        weights = REQUEST_WEIGHTS.get(exchange_id, {})
+        raw = {symbol: self._raw_interval((exchange_id, symbol)) for symbol in self.exchange_symbols[exchange_id]}
+        if self.bulk[exchange_id]:
+            # One call refreshes every due symbol, so only the call rate has to fit
+            floor = weights.get('fetch_tickers', 1) / budget
+            self._call_gap[exchange_id] = floor
+            scale = max(1.0, floor / min(raw.values())) if raw else 1.0
+            for symbol, interval in raw.items():
+                self.intervals[(exchange_id, symbol)] = max(interval, floor)
+        else:
+            demand = sum(weights.get('fetch_ticker', 1) / interval for interval in raw.values())
+            scale = max(1.0, demand / budget)
+            for symbol, interval in raw.items():
+                self.intervals[(exchange_id, symbol)] = interval * scale
+        self._scale[exchange_id] = scale
+
+    def due(self, exchange_id: str, now: float) -> List[str]:
+        """Symbols on an exchange whose refresh time has come"""
+        if now < self._next_call.get(exchange_id, 0.0):
+            return []
+        next_due = self.next_due
+        return [symbol for symbol in self.exchange_symbols[exchange_id] if next_due[(exchange_id, symbol)] <= now]
+
+    def next_wakeup(self) -> float:
+        """Monotonic time of the earliest pending refresh"""
+        return min(
+            (max(due, self._next_call.get(exchange_id, 0.0)) for (exchange_id, _), due in self.next_due.items()),
+            default=time.monotonic() + self.max_interval
+        )
+
+    def record_quotes(self, exchange_id: str, symbols: Iterable[str], quotes: Dict[str, Quote], now: float) -> None:
+        """
+        Apply a poll's results and schedule the polled symbols' next refresh
+
+        Args:
+            exchange_id: ID of the exchange polled
+            symbols: Symbols requested, including any missing from the response
+            quotes: Quotes returned, keyed by symbol
+            now: Monotonic time the poll started
+        """
+        keep = 1 - self.alpha
+        symbols = list(symbols)
+        for symbol in symbols:
+            key = (exchange_id, symbol)
+            self.hit_rate[key] *= keep
+            quote = quotes.get(symbol)
+            if quote is not None and quote.bid and quote.ask:
+                self.quotes[symbol][exchange_id] = quote
+                mid = (quote.bid + quote.ask) / 2
+                last_mid = self._last_mid.get(key)
+                if last_mid:
+                    move = abs(mid - last_mid) / last_mid * 1e4
+                    self.volatility[key] = keep * self.volatility[key] + self.alpha * move
+                self._last_mid[key] = mid
+                if quote.volume:
+                    self.quote_volume[key] = quote.volume * mid
+        self._rebalance(exchange_id)
+        for symbol in symbols:
+            key = (exchange_id, symbol)
+            self.next_due[key] = now + self.intervals[key]
+        if exchange_id in self._call_gap:
+            self._next_call[exchange_id] = now + self._call_gap[exchange_id]
+
+    def record_opportunities(self, opportunities: List[AnyOpportunity]) -> None:
+        """Raise the hit rate of every polled pair an opportunity was found on"""
+        for opportunity in opportunities:
+            if opportunity.type == 'cycle':
+                keys = [(leg.exchange, leg.symbol) for leg in opportunity.legs if leg.side != 'transfer']
+            else:
+                keys = [(opportunity.buy_exchange, opportunity.symbol), (opportunity.sell_exchange, opportunity.symbol)]
+            for key in keys:
+                if key in self.hit_rate:
+                    self.hit_rate[key] = min(1.0, self.hit_rate[key] + self.alpha)
+
+    def summary(self) -> Dict[str, Dict]:
+        """Per-exchange interval spread and budget scale, for logging"""
+        result = {}
+        for exchange_id in self.bulk:
+            intervals = sorted(self.intervals[(exchange_id, symbol)] for symbol in self.exchange_symbols[exchange_id])
+            if intervals:
+                result[exchange_id] = {
+                    'fastest': round(intervals[0], 3),
+                    'median': round(intervals[len(intervals) // 2], 3),
+                    'slowest': round(intervals[-1], 3),
+                    'budget_scale': round(self._scale[exchange_id], 2)
+                }
+        return result
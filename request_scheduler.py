@@ -0,0 +1,224 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+from config import EXCHANGE_RATE_LIMITS, ORDER_RESERVE_RATIO
+
+# Priority lanes, lower value is served first
+PRIORITY_ORDER = 0
+PRIORITY_CANCEL = 1
+PRIORITY_VERIFY = 2
+PRIORITY_MARKET_DATA = 3
+
+LANE_NAMES = {
+    PRIORITY_ORDER: 'order',
+    PRIORITY_CANCEL: 'cancel',
+    PRIORITY_VERIFY: 'verify',
+    PRIORITY_MARKET_DATA: 'market_data'
+}
+
+
+class TokenBucket:
+    def __init__(self, capacity: float, refill_rate: float):
+        """
+        Weight-aware token bucket
+
+        Args:
+            capacity: Maximum number of tokens (burst size)
+            refill_rate: Tokens added per second
+        """
+        self.capacity = capacity
+        self.refill_rate = refill_rate
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    def try_take(self, weight: float, floor: float = 0.0) -> bool:
+        """Take tokens if at least weight + floor are available"""
+        self.refill()
+        if self.tokens - weight < floor:
+            return False
+        self.tokens -= weight
+        return True
+
+    def time_until(self, weight: float, floor: float = 0.0) -> float:
+        """Seconds until weight + floor tokens will be available"""
+        missing = weight + floor - self.tokens
+        return max(0.0, missing / self.refill_rate)
+
+
+class ExchangeScheduler:
+    def __init__(self, exchange_id: str, capacity: float, refill_rate: float,
+                 order_reserve: float = ORDER_RESERVE_RATIO):
+        """
+        Prioritized request admission for a single exchange
+
+        Requests wait in priority lanes and are admitted strictly by lane.
+        Lower lanes may not draw the bucket below a reserve kept for orders
+        and cancels, so the order path never queues behind market data.
+
+        Args:
+            exchange_id: ID of the exchange
+            capacity: Token bucket capacity in request weight
+            refill_rate: Request weight replenished per second
+            order_reserve: Fraction of capacity only orders and cancels may use
+        """
+        self.exchange_id = exchange_id
+        self.bucket = TokenBucket(capacity, refill_rate)
+        self.reserve = capacity * order_reserve
+        self._waiters: List[Tuple[int, int, float, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._dispatcher = None
+        # Resolved to cut the dispatcher's sleep short when the head waiter changes
+        self._wakeup: Optional[asyncio.Future] = None
+        self.stats = {
+            name: {'requests': 0, 'queued': 0, 'total_wait': 0.0, 'max_wait': 0.0}
+            for name in LANE_NAMES.values()
+        }
+
+    def _floor(self, priority: int) -> float:
+        return 0.0 if priority <= PRIORITY_CANCEL else self.reserve
+
+    def _record(self, priority: int, waited: float) -> None:
+        lane = self.stats[LANE_NAMES[priority]]
+        lane['requests'] += 1
+        lane['total_wait'] += waited
+        lane['max_wait'] = max(lane['max_wait'], waited)
+
+    async def acquire(self, priority: int, weight: float = 1.0) -> float:
+        """
+        Wait until a request of the given weight may be sent
+
+        Args:
+            priority: Lane priority (PRIORITY_* constant)
+            weight: Request weight charged against the bucket
+
+        Returns:
+            Time spent waiting in seconds
+        """
+        weight = min(weight, self.bucket.capacity - self._floor(priority))
+        blocked = self._waiters and self._waiters[0][0] <= priority
+        if not blocked and self.bucket.try_take(weight, self._floor(priority)):
+            self._record(priority, 0.0)
+            return 0.0
+
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), weight, future))
+        self.stats[LANE_NAMES[priority]]['queued'] += 1
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        elif self._waiters[0][3] is future:
+            # The dispatcher is sleeping for a lower-priority head; recompute for this one
+            self._wake()
+        try:
+            await future
+        finally:
+            self.stats[LANE_NAMES[priority]]['queued'] -= 1
+            if future.cancelled():
+                self._wake()
+
+        waited = time.monotonic() - started
+        self._record(priority, waited)
+        return waited
+
+    async def _dispatch(self) -> None:
+        """Admit queued requests in priority order as tokens become available"""
+        while self._waiters:
+            priority, _, weight, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            floor = self._floor(priority)
+            if self.bucket.try_take(weight, floor):
+                heapq.heappop(self._waiters)
+                future.set_result(None)
+                continue
+            loop = asyncio.get_running_loop()
+            self._wakeup = loop.create_future()
+            timer = loop.call_later(self.bucket.time_until(weight, floor), self._wake)
+            try:
+                await self._wakeup
+            finally:
+                timer.cancel()
+                self._wakeup = None
+
+    def _wake(self) -> None:
+        if self._wakeup is not None and not self._wakeup.done():
+            self._wakeup.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority: int, weight: float = 1.0):
+        await self.acquire(priority, weight)
+        yield
+
+
+class RequestScheduler:
+    def __init__(self, exchange_ids: List[str], limits: Dict[str, Dict] = None, share: float = 1.0):
+        """
+        Per-exchange request schedulers sized from each venue's published limits
+
+        Args:
+            exchange_ids: Exchanges to schedule requests for
+            limits: Optional overrides of EXCHANGE_RATE_LIMITS
+            share: Fraction of each limit this process may use, when several
+                processes send requests from the same account or address
+        """
+        limits = dict(EXCHANGE_RATE_LIMITS, **(limits or {}))
+        default = limits.get('default', {'capacity': 10, 'refill_rate': 5})
+        self.logger = logging.getLogger(__name__)
+        self.schedulers: Dict[str, ExchangeScheduler] = {}
+        for exchange_id in exchange_ids:
+            limit = limits.get(exchange_id, default)
+            self.schedulers[exchange_id] = ExchangeScheduler(
+                exchange_id, limit['capacity'] * share, limit['refill_rate'] * share
+            )
+
+    def slot(self, exchange_id: str, priority: int, weight: float = 1.0):
+        """
+        Async context manager admitting one request to an exchange
+
+        Args:
+            exchange_id: ID of the exchange
+            priority: Lane priority (PRIORITY_* constant)
+            weight: Request weight charged against the bucket
+        """
+        return self.schedulers[exchange_id].slot(priority, weight)
+
+    async def acquire(self, exchange_id: str, priority: int, weight: float = 1.0) -> float:
+        """
+        Wait until a request may be sent to an exchange
+
+        Args:
+            exchange_id: ID of the exchange
+            priority: Lane priority (PRIORITY_* constant)
+            weight: Request weight charged against the bucket
+
+        Returns:
+            Time spent waiting in seconds
+        """
+        return await self.schedulers[exchange_id].acquire(priority, weight)
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """
+        Queue depth and wait time statistics per exchange and lane
+
+        Returns:
+            Dictionary keyed by exchange ID, then lane name
+        """
+        stats = {}
+        for exchange_id, scheduler in self.schedulers.items():
+            stats[exchange_id] = {}
+            for lane, values in scheduler.stats.items():
+                stats[exchange_id][lane] = dict(
+                    values,
+                    avg_wait=values['total_wait'] / max(1, values['requests'])
+                )
+        return stats
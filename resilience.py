@@ -0,0 +1,155 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Awaitable, Callable, Deque, Optional
+from config import (
+    REQUEST_TIMEOUT, MIN_REQUEST_TIMEOUT, TIMEOUT_P99_MULTIPLIER, LATENCY_WINDOW, LATENCY_MIN_SAMPLES,
+    RETRY_BASE_DELAY, RETRY_MAX_DELAY, BREAKER_FAILURE_THRESHOLD, BREAKER_COOLDOWN
+)
+
+BREAKER_CLOSED = 'closed'
+BREAKER_OPEN = 'open'
+BREAKER_HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an exchange whose circuit breaker is open"""
+
+
+class LatencyTracker:
+    def __init__(self, window: int = LATENCY_WINDOW, min_samples: int = LATENCY_MIN_SAMPLES):
+        """
+        Rolling latency window for one (exchange, method)
+
+        Args:
+            window: Number of recent successful calls kept
+            min_samples: Samples required before quantiles are trusted
+        """
+        self.samples: Deque[float] = deque(maxlen=window)
+        self.min_samples = min_samples
+        self._sorted: Optional[list] = None
+
+    def record(self, latency: float) -> None:
+        self.samples.append(latency)
+        self._sorted = None
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Observed latency quantile in seconds, or None until enough samples exist"""
+        if len(self.samples) < self.min_samples:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self.samples)
+        return self._sorted[min(len(self._sorted) - 1, int(q * len(self._sorted)))]
+
+    def timeout(self) -> float:
+        """Request timeout derived from the observed p99, bounded by the configured limits"""
+        p99 = self.quantile(0.99)
+        if p99 is None:
+            return REQUEST_TIMEOUT
+        return min(REQUEST_TIMEOUT, max(MIN_REQUEST_TIMEOUT, p99 * TIMEOUT_P99_MULTIPLIER))
+
+
+def backoff_delay(attempt: int, base: float = RETRY_BASE_DELAY, cap: float = RETRY_MAX_DELAY) -> float:
+    """
+    Full-jitter exponential backoff
+
+    Args:
+        attempt: Zero-based number of the attempt that just failed
+        base: Delay scale for the first retry in seconds
+        cap: Maximum delay in seconds
+
+    Returns:
+        Seconds to wait before the next attempt
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    def __init__(self, exchange_id: str, failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+                 cooldown: float = BREAKER_COOLDOWN):
+        """
+        Per-exchange circuit breaker
+
+        Opens after consecutive venue failures and rejects calls for the
+        cooldown. Then a single probe is let through (half open); its success
+        closes the breaker and its failure reopens it.
+
+        Args:
+            exchange_id: ID of the exchange
+            failure_threshold: Consecutive failures that open the breaker
+            cooldown: Seconds to stay open before probing
+        """
+        self.exchange_id = exchange_id
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    @property
+    def available(self) -> bool:
+        """False while open and still cooling down"""
+        return self.state != BREAKER_OPEN or time.monotonic() - self.opened_at >= self.cooldown
+
+    def allow(self) -> bool:
+        """True if a call may be made now"""
+        if self.state == BREAKER_CLOSED:
+            return True
+        if self.state == BREAKER_OPEN:
+            if time.monotonic() - self.opened_at < self.cooldown:
+                return False
+            self.state = BREAKER_HALF_OPEN
+            self._probing = False
+        if self._probing:
+            return False
+        self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self._probing = False
+
+    def release(self) -> None:
+        """Free the probe slot after a call that ended without a verdict, such as a cancelled one"""
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self._probing = False
+        if self.state == BREAKER_HALF_OPEN or self.failures >= self.failure_threshold:
+            self.state = BREAKER_OPEN
+            self.opened_at = time.monotonic()
+
+
+async def hedged(attempt: Callable[[], Awaitable], hedge_delay: float) -> object:
+    """
+    Run an idempotent call, starting a duplicate if the first is slower than hedge_delay
+
+    Args:
+        attempt: Coroutine function performing one call
+        hedge_delay: Seconds to wait for the first call before hedging
+
+    Returns:
+        Result of whichever call succeeds first
+    """
+    first = asyncio.ensure_future(attempt())
+    done, _ = await asyncio.wait({first}, timeout=hedge_delay)
+    if done:
+        return first.result()
+
+    pending = {first, asyncio.ensure_future(attempt())}
+    error: Optional[BaseException] = None
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in pending:
+            task.cancel()
@@ -0,0 +1,295 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import pickle
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+from models import AnyOpportunity, CycleOpportunity, Leg, Opportunity, exchange_table, symbol_table
+from execution_dispatcher import route_key
+from exchange_manager import ExchangeManager
+from arbitrage_finder import ArbitrageFinder
+from event_engine import EvaluationEngine
+from poll_scheduler import PollScheduler
+from metrics import metrics
+from log_pipeline import configure_logging
+from config import (
+    EXCHANGES, CHECK_INTERVAL, EVENT_DRIVEN, EVENT_QUEUE_SIZE, LOCAL_ORDER_BOOKS, LOG_CONFIG,
+    MARKET_DATA_MODE, SHARD_SOCKET_PATH, PRIORITY_POLLING, POLL_BUDGET_SHARE
+)
+
+# Frames are a 4-byte big-endian length followed by a pickled tuple
+_HEADER = struct.Struct('!I')
+
+MESSAGE_HELLO = 'hello'
+MESSAGE_OPPORTUNITY = 'opportunity'
+
+
+def shard_rate_share(shard_count: int) -> float:
+    """
+    Fraction of each venue's rate limit available to one process of a sharded bot
+
+    The shard workers and the coordinating process all send requests to the
+    same venues from the same address, so each gets an equal share.
+
+    Args:
+        shard_count: Number of shard workers
+
+    Returns:
+        Share of the rate limit per process
+    """
+    return 1.0 / (shard_count + 1)
+
+
+def shard_symbols(symbols: List[str], count: int) -> List[List[str]]:
+    """
+    Split symbols into count round-robin shards of near-equal size
+
+    Args:
+        symbols: Trading pair symbols
+        count: Number of shards
+
+    Returns:
+        One list of symbols per shard (empty shards are omitted)
+    """
+    return [shard for shard in (symbols[i::count] for i in range(count)) if shard]
+
+
+def pack_opportunity(opportunity: AnyOpportunity) -> Tuple:
+    """
+    Encode an opportunity with names instead of interned IDs
+
+    Interner tables are per process, so IDs cannot cross the process boundary.
+    Stage timestamps can: time.monotonic_ns() reads the same system-wide clock
+    in every process.
+    """
+    stages = (opportunity.received_ns, opportunity.evaluated_ns, opportunity.verified_ns)
+    if opportunity.type == 'cycle':
+        legs = [(leg.exchange, leg.symbol, leg.side, leg.from_exchange, leg.from_currency, leg.to_currency, leg.rate)
+                for leg in opportunity.legs]
+        return ('cycle', legs, opportunity.profit_percentage, opportunity.start_amount,
+                opportunity.expected_profit_usdt) + stages
+    return ('pairwise', opportunity.symbol, opportunity.buy_exchange, opportunity.sell_exchange,
+            opportunity.buy_price, opportunity.sell_price, opportunity.trade_amount, opportunity.profit_percentage,
+            opportunity.expected_profit_usdt, opportunity.buy_volume, opportunity.sell_volume,
+            opportunity.total_fees_percentage, opportunity.marginal_spread) + stages
+
+
+def unpack_opportunity(packed: Tuple) -> AnyOpportunity:
+    """Rebuild an opportunity packed by pack_opportunity against this process's ID tables"""
+    if packed[0] == 'cycle':
+        _, legs, profit_percentage, start_amount, expected_profit_usdt = packed[:5]
+        opportunity = CycleOpportunity([
+            Leg(exchange_table.id(exchange), symbol_table.id(symbol) if symbol is not None else -1, side,
+                exchange_table.id(from_exchange), from_currency, to_currency, rate)
+            for exchange, symbol, side, from_exchange, from_currency, to_currency, rate in legs
+        ], profit_percentage)
+        opportunity.start_amount = start_amount
+        opportunity.expected_profit_usdt = expected_profit_usdt
+    else:
+        (_, symbol, buy_exchange, sell_exchange, buy_price, sell_price, trade_amount, profit_percentage,
+         expected_profit_usdt, buy_volume, sell_volume, total_fees_percentage, marginal_spread) = packed[:13]
+        opportunity = Opportunity(
+            symbol_table.id(symbol), exchange_table.id(buy_exchange), exchange_table.id(sell_exchange),
+            buy_price, sell_price, trade_amount, profit_percentage, expected_profit_usdt,
+            buy_volume, sell_volume, total_fees_percentage
+        )
+        opportunity.marginal_spread = marginal_spread
+    opportunity.received_ns, opportunity.evaluated_ns, opportunity.verified_ns = packed[-3:]
+    return opportunity
+
+
+def encode_frame(message: Tuple) -> bytes:
+    payload = pickle.dumps(message, pickle.HIGHEST_PROTOCOL)
+    return _HEADER.pack(len(payload)) + payload
+
+
+async def read_frame(reader: asyncio.StreamReader) -> Tuple:
+    """Read one frame, raising asyncio.IncompleteReadError when the peer disconnects"""
+    header = await reader.readexactly(_HEADER.size)
+    return pickle.loads(await reader.readexactly(_HEADER.unpack(header)[0]))
+
+
+class ShardWorker:
+    def __init__(self, shard: int, symbols: List[str], shard_count: int, socket_path: str = SHARD_SOCKET_PATH):
+        """
+        Market data and route detection for one shard of symbols
+
+        The worker opens its own exchange connections with public access
+        only, so it can read prices but never place orders. Every
+        opportunity it finds is forwarded to the coordinator.
+
+        Args:
+            shard: Shard number
+            symbols: Trading pair symbols owned by this shard
+            shard_count: Number of shards splitting the venues' rate limits
+            socket_path: Coordinator's Unix socket
+        """
+        self.shard = shard
+        self.symbols = symbols
+        self.shard_count = shard_count
+        self.socket_path = socket_path
+        self.logger = logging.getLogger(__name__)
+        self._writer: Optional[asyncio.StreamWriter] = None
+
+    async def run(self) -> None:
+        public_keys = {exchange_id: {'api_key': None, 'secret_key': None} for exchange_id in EXCHANGES}
+        rate_share = shard_rate_share(self.shard_count)
+        exchange_manager = ExchangeManager(EXCHANGES, public_keys, rate_share=rate_share)
+        finder = ArbitrageFinder(exchange_manager, self.symbols)
+        await exchange_manager.prepare_markets()
+        await exchange_manager.start_warmup()
+        market_symbols = self.symbols + finder.cross_symbols()
+
+        _, self._writer = await asyncio.open_unix_connection(self.socket_path)
+        self._writer.write(encode_frame((MESSAGE_HELLO, self.shard, os.getpid(), self.symbols)))
+        self.logger.info("Shard %s scanning %s symbols: %s", self.shard, len(self.symbols), ', '.join(self.symbols))
+
+        try:
+            if MARKET_DATA_MODE == 'stream':
+                await exchange_manager.start_streaming(market_symbols, local_books=LOCAL_ORDER_BOOKS)
+            if MARKET_DATA_MODE == 'stream' and EVENT_DRIVEN:
+                engine = EvaluationEngine(finder, exchange_manager.market_data)
+                engine.start()
+                while True:
+                    await self._send([await engine.next_opportunity()])
+            if PRIORITY_POLLING:
+                poller = PollScheduler(market_symbols, {
+                    exchange_id: bool(exchange.has.get('fetchTickers'))
+                    for exchange_id, exchange in exchange_manager.exchanges.items()
+                }, exchange_manager.listed_symbols(), budget_share=POLL_BUDGET_SHARE * rate_share)
+                while True:
+                    await self._send(await finder.poll_opportunities(poller))
+                    await asyncio.sleep(max(0.0, poller.next_wakeup() - time.monotonic()))
+            while True:
+                await self._send(await finder.find_opportunities())
+                await asyncio.sleep(CHECK_INTERVAL)
+        finally:
+            self._writer.close()
+            await exchange_manager.close_connections()
+
+    async def _send(self, opportunities: List[AnyOpportunity]) -> None:
+        for opportunity in opportunities:
+            self._writer.write(encode_frame((MESSAGE_OPPORTUNITY, pack_opportunity(opportunity))))
+        # Only waits when the coordinator falls behind and the socket buffer is full
+        await self._writer.drain()
+
+
+def run_worker(shard: int, symbols: List[str], shard_count: int, socket_path: str) -> None:
+    """Process entry point for a shard worker"""
+    root, extension = os.path.splitext(LOG_CONFIG['filename'])
+    log_listener = configure_logging(dict(LOG_CONFIG, filename=f"{root}.shard{shard}{extension}"))
+    try:
+        asyncio.run(ShardWorker(shard, symbols, shard_count, socket_path).run())
+    except (KeyboardInterrupt, ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        log_listener.stop()
+
+
+class ShardCoordinator:
+    def __init__(self, symbols: List[str], shard_count: int, socket_path: str = SHARD_SOCKET_PATH,
+                 queue_size: int = EVENT_QUEUE_SIZE):
+        """
+        Spawns shard workers and collects their opportunities for execution in this process
+
+        Detection scales across processes while inventory, risk limits and
+        order placement stay with the single ExecutionDispatcher and Trader
+        of the coordinating bot. Candidates wait on a bounded queue with one
+        slot per route, as in EvaluationEngine: a newer candidate replaces its
+        route's pending one, and when the queue is full the stalest route is
+        dropped.
+
+        Args:
+            symbols: Trading pair symbols to shard
+            shard_count: Number of worker processes
+            socket_path: Unix socket the workers connect to
+            queue_size: Maximum number of routes waiting for execution
+        """
+        self.shards = shard_symbols(symbols, shard_count)
+        self.socket_path = socket_path
+        # Route keys in arrival order; the latest candidate per route waits in _pending
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._pending: Dict[Tuple, AnyOpportunity] = {}
+        self.logger = logging.getLogger(__name__)
+        self.processes: List[multiprocessing.Process] = []
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[int, asyncio.StreamWriter] = {}
+        self.stats = {'received': 0, 'replaced': 0, 'dropped': 0, 'connected': 0}
+
+    async def start(self) -> None:
+        """Listen for workers and start one process per shard"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        self._server = await asyncio.start_unix_server(self._handle, path=self.socket_path)
+
+        # Spawned rather than forked so workers do not inherit the running event loop
+        context = multiprocessing.get_context('spawn')
+        for shard, symbols in enumerate(self.shards):
+            process = context.Process(target=run_worker, args=(shard, symbols, len(self.shards), self.socket_path),
+                                      name=f"shard-{shard}", daemon=True)
+            process.start()
+            self.processes.append(process)
+        self.logger.info("Started %s shard workers for %s symbols", len(self.processes),
+                         sum(len(symbols) for symbols in self.shards))
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        shard = None
+        try:
+            _, shard, pid, symbols = await read_frame(reader)
+            self._connections[shard] = writer
+            self.stats['connected'] = len(self._connections)
+            self.logger.info("Shard %s connected (pid %s, %s symbols)", shard, pid, len(symbols))
+            label = str(shard)
+            while True:
+                kind, packed = await read_frame(reader)
+                if kind != MESSAGE_OPPORTUNITY:
+                    continue
+                opportunity = unpack_opportunity(packed)
+                if opportunity.evaluated_ns is not None:
+                    metrics.observe('stage_seconds', (time.monotonic_ns() - opportunity.evaluated_ns) / 1e9,
+                                    stage='routed', shard=label)
+                metrics.inc('shard_opportunities_total', shard=label)
+                self._push(opportunity)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if shard is not None:
+                self._connections.pop(shard, None)
+                self.stats['connected'] = len(self._connections)
+                self.logger.warning("Shard %s disconnected", shard)
+            writer.close()
+
+    def _push(self, opportunity: AnyOpportunity) -> None:
+        """Queue a candidate, replacing its route's pending one or dropping the stalest route if full"""
+        self.stats['received'] += 1
+        key = route_key(opportunity)
+        if key in self._pending:
+            self._pending[key] = opportunity
+            self.stats['replaced'] += 1
+            return
+        if self.queue.full():
+            del self._pending[self.queue.get_nowait()]
+            self.stats['dropped'] += 1
+        self.queue.put_nowait(key)
+        self._pending[key] = opportunity
+
+    async def next_opportunity(self) -> AnyOpportunity:
+        """Wait for the next candidate from any shard"""
+        return self._pending.pop(await self.queue.get())
+
+    async def stop(self) -> None:
+        """Stop the workers and the listening socket"""
+        for process in self.processes:
+            process.terminate()
+        loop = asyncio.get_running_loop()
+        for process in self.processes:
+            await loop.run_in_executor(None, process.join, 5)
+        self.processes = []
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
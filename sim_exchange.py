@@ -0,0 +1,428 @@
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import time
+from typing import Dict, List, Optional
+from aiohttp import web, ClientResponseError, ClientSession, ClientTimeout, WSMsgType
+from config import REQUEST_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class SimulatedVenue:
+    def __init__(self, venue_id: str, symbols: List[str], seed: int = 0,
+                 latency_ms: float = 0.0, jitter_ms: float = 0.0, error_rate: float = 0.0,
+                 rate_limit: float = 0.0, tick_interval: float = 0.1, depth: int = 20,
+                 start_prices: Optional[Dict[str, float]] = None,
+                 price_paths: Optional[Dict[str, List[float]]] = None,
+                 balances: Optional[Dict[str, float]] = None):
+        """
+        Local stand-in exchange with a matching engine and fault injection
+
+        Prices follow a seeded random walk unless a scripted path is given for a
+        symbol, in which case one path point is consumed per tick. Books are
+        rebuilt around the mid on every tick; market orders walk the book and
+        marketable limit orders fill immediately while others rest until the
+        book crosses them.
+
+        Args:
+            venue_id: Name of the simulated venue
+            symbols: Trading pair symbols listed on the venue
+            seed: Random seed for prices, latency and errors
+            latency_ms: Base response latency in milliseconds
+            jitter_ms: Maximum additional random latency in milliseconds
+            error_rate: Probability of answering a request with HTTP 500
+            rate_limit: Requests per second before answering HTTP 429 (0 disables)
+            tick_interval: Seconds between price updates
+            depth: Book levels per side
+            start_prices: Initial mid per symbol
+            price_paths: Scripted mid prices per symbol
+            balances: Starting free balance per currency
+        """
+        self.venue_id = venue_id
+        self.symbols = list(symbols)
+        self.random = random.Random(seed)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.tick_interval = tick_interval
+        self.depth = depth
+        self.price_paths = {symbol: list(path) for symbol, path in (price_paths or {}).items()}
+        self.mids = {symbol: (start_prices or {}).get(symbol, 100.0) for symbol in self.symbols}
+        self.balances: Dict[str, float] = dict(balances or {})
+        self.books: Dict[str, Dict] = {}
+        self.resting: List[Dict] = []
+        self.sockets: List[web.WebSocketResponse] = []
+        self.stats = {'requests': 0, 'errors_injected': 0, 'rate_limited': 0, 'orders': 0}
+        self.logger = logging.getLogger(__name__)
+        self._order_ids = itertools.count(1)
+        self._tokens = rate_limit
+        self._token_time = time.monotonic()
+        self._ticker_task: Optional[asyncio.Task] = None
+        for symbol in self.symbols:
+            self._rebuild_book(symbol)
+
+    def _rebuild_book(self, symbol: str) -> None:
+        mid = self.mids[symbol]
+        tick = mid * 0.0001
+        self.books[symbol] = {
+            'bids': [[mid - tick * (i + 1), round(self.random.uniform(0.1, 2.0), 4)] for i in range(self.depth)],
+            'asks': [[mid + tick * (i + 1), round(self.random.uniform(0.1, 2.0), 4)] for i in range(self.depth)],
+            'timestamp': int(time.time() * 1000)
+        }
+
+    def step(self) -> None:
+        """Advance every price by one tick, rebuild books and match resting orders"""
+        for symbol in self.symbols:
+            path = self.price_paths.get(symbol)
+            if path:
+                self.mids[symbol] = path.pop(0)
+            else:
+                self.mids[symbol] *= 1 + self.random.gauss(0, 0.0005)
+            self._rebuild_book(symbol)
+        self._match_resting()
+
+    def _match_resting(self) -> None:
+        still_resting = []
+        for order in self.resting:
+            book = self.books[order['symbol']]
+            best = book['asks'][0][0] if order['side'] == 'buy' else book['bids'][0][0]
+            crossed = best <= order['price'] if order['side'] == 'buy' else best >= order['price']
+            if crossed:
+                self._settle(order['symbol'], order['side'], order['amount'], order['price'] * order['amount'])
+                order['status'] = 'closed'
+                order['filled'] = order['amount']
+            else:
+                still_resting.append(order)
+        self.resting = still_resting
+
+    def _settle(self, symbol: str, side: str, amount: float, notional: float) -> None:
+        base, quote = symbol.split('/')
+        sign = 1 if side == 'buy' else -1
+        self.balances[base] = self.balances.get(base, 0.0) + sign * amount
+        self.balances[quote] = self.balances.get(quote, 0.0) - sign * notional
+
+    def _take_token(self) -> bool:
+        if not self.rate_limit:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._token_time) * self.rate_limit)
+        self._token_time = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def _inject(self) -> Optional[web.Response]:
+        """Apply rate limiting, latency and error injection to a request"""
+        self.stats['requests'] += 1
+        if not self._take_token():
+            self.stats['rate_limited'] += 1
+            return web.json_response({'error': 'rate limited'}, status=429)
+        delay = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+        if delay:
+            await asyncio.sleep(delay / 1000)
+        if self.random.random() < self.error_rate:
+            self.stats['errors_injected'] += 1
+            return web.json_response({'error': 'injected failure'}, status=500)
+        return None
+
+    def _ticker(self, symbol: str) -> Dict:
+        book = self.books[symbol]
+        return {
+            'symbol': symbol,
+            'bid': book['bids'][0][0],
+            'bidVolume': book['bids'][0][1],
+            'ask': book['asks'][0][0],
+            'askVolume': book['asks'][0][1],
+            'last': self.mids[symbol],
+            'baseVolume': 1000.0,
+            'timestamp': book['timestamp']
+        }
+
+    async def handle_ticker(self, request: web.Request) -> web.Response:
+        failure = await self._inject()
+        if failure:
+            return failure
+        symbol = request.query['symbol']
+        if symbol not in self.books:
+            return web.json_response({'error': f'unknown symbol {symbol}'}, status=400)
+        return web.json_response(self._ticker(symbol))
+
+    async def handle_tickers(self, request: web.Request) -> web.Response:
+        failure = await self._inject()
+        if failure:
+            return failure
+        symbols = request.query.get('symbols')
+        symbols = symbols.split(',') if symbols else self.symbols
+        return web.json_response({symbol: self._ticker(symbol) for symbol in symbols if symbol in self.books})
+
+    async def handle_order_book(self, request: web.Request) -> web.Response:
+        failure = await self._inject()
+        if failure:
+            return failure
+        symbol = request.query['symbol']
+        limit = int(request.query.get('limit', self.depth))
+        book = self.books[symbol]
+        return web.json_response({
+            'bids': book['bids'][:limit],
+            'asks': book['asks'][:limit],
+            'timestamp': book['timestamp'],
+            'nonce': None
+        })
+
+    async def handle_ping(self, request: web.Request) -> web.Response:
+        # Connection warm-up, exempt from injected latency, errors and rate limits
+        return web.json_response({})
+
+    async def handle_balance(self, request: web.Request) -> web.Response:
+        failure = await self._inject()
+        if failure:
+            return failure
+        free = dict(self.balances)
+        return web.json_response({'free': free, **{c: {'free': a} for c, a in free.items()}})
+
+    async def handle_order(self, request: web.Request) -> web.Response:
+        failure = await self._inject()
+        if failure:
+            return failure
+        body = await request.json()
+        symbol, side, order_type = body['symbol'], body['side'], body['type']
+        amount, price = float(body['amount']), body.get('price')
+        if symbol not in self.books:
+            return web.json_response({'error': f'unknown symbol {symbol}'}, status=400)
+        self.stats['orders'] += 1
+
+        order = {
+            'id': f"{self.venue_id}-{next(self._order_ids)}",
+            'clientOrderId': body.get('clientOrderId'),
+            'symbol': symbol,
+            'type': order_type,
+            'side': side,
+            'amount': amount,
+            'price': price,
+            'filled': 0.0,
+            'status': 'open',
+            'timestamp': int(time.time() * 1000)
+        }
+
+        levels = self.books[symbol]['asks' if side == 'buy' else 'bids']
+        filled = notional = 0.0
+        for level in levels:
+            if price is not None and ((side == 'buy' and level[0] > price) or (side == 'sell' and level[0] < price)):
+                break
+            quantity = min(amount - filled, level[1])
+            level[1] -= quantity
+            filled += quantity
+            notional += quantity * level[0]
+            if filled >= amount:
+                break
+        levels[:] = [level for level in levels if level[1] > 0]
+
+        if filled:
+            self._settle(symbol, side, filled, notional)
+            order['filled'] = filled
+            order['price'] = notional / filled
+        if filled >= amount:
+            order['status'] = 'closed'
+        elif order_type == 'limit':
+            self.resting.append(dict(order, amount=amount - filled, price=price))
+        elif not filled:
+            return web.json_response({'error': 'no liquidity'}, status=400)
+        else:
+            order['amount'] = filled
+            order['status'] = 'closed'
+        return web.json_response(order)
+
+    async def handle_ws(self, request: web.Request) -> web.WebSocketResponse:
+        """Push Binance-style bookTicker frames for every symbol on each tick"""
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.sockets.append(ws)
+        try:
+            async for message in ws:
+                if message.type == WSMsgType.ERROR:
+                    break
+        finally:
+            self.sockets.remove(ws)
+        return ws
+
+    async def _broadcast(self) -> None:
+        frames = []
+        for symbol in self.symbols:
+            book = self.books[symbol]
+            frames.append(json.dumps({
+                'stream': f"{symbol.replace('/', '').lower()}@bookTicker",
+                'data': {
+                    's': symbol.replace('/', ''),
+                    'b': str(book['bids'][0][0]), 'B': str(book['bids'][0][1]),
+                    'a': str(book['asks'][0][0]), 'A': str(book['asks'][0][1])
+                }
+            }))
+        for ws in list(self.sockets):
+            for frame in frames:
+                await ws.send_str(frame)
+
+    async def _run_ticker(self) -> None:
+        while True:
+            await asyncio.sleep(self.tick_interval)
+            self.step()
+            if self.sockets:
+                await self._broadcast()
+
+    def app(self) -> web.Application:
+        """Build the aiohttp application serving this venue"""
+        app = web.Application()
+        app.add_routes([
+            web.get('/ticker', self.handle_ticker),
+            web.get('/tickers', self.handle_tickers),
+            web.get('/orderbook', self.handle_order_book),
+            web.get('/balance', self.handle_balance),
+            web.get('/ping', self.handle_ping),
+            web.post('/order', self.handle_order),
+            web.get('/ws', self.handle_ws),
+        ])
+        app.on_startup.append(self._on_startup)
+        app.on_cleanup.append(self._on_cleanup)
+        return app
+
+    async def _on_startup(self, app: web.Application) -> None:
+        self._ticker_task = asyncio.create_task(self._run_ticker())
+
+    async def _on_cleanup(self, app: web.Application) -> None:
+        if self._ticker_task:
+            self._ticker_task.cancel()
+            await asyncio.gather(self._ticker_task, return_exceptions=True)
+
+
+class SimExchangeClient:
+    def __init__(self, config: Dict):
+        """
+        ccxt-compatible client for a SimulatedVenue
+
+        Args:
+            config: ccxt-style config; 'url' is the venue base URL,
+                'timeout' is in milliseconds and 'session' is an optional
+                shared aiohttp session, left open by close()
+        """
+        self.id = config.get('id', 'sim')
+        self.url = config['url'].rstrip('/')
+        self.timeout = config.get('timeout', REQUEST_TIMEOUT * 1000) / 1000
+        self.has = {'fetchTickers': True}
+        self.markets = None
+        self.session: Optional[ClientSession] = config.get('session')
+        self.own_session = self.session is None
+
+    def _session(self) -> ClientSession:
+        if self.session is None or self.session.closed:
+            self.own_session = True
+            self.session = ClientSession(timeout=ClientTimeout(total=self.timeout))
+        return self.session
+
+    async def _request(self, method: str, path: str, **kwargs) -> Dict:
+        async with self._session().request(method, self.url + path, **kwargs) as response:
+            data = await response.json()
+            if response.status == 429 or response.status >= 500:
+                # Throttling and outages are transient, like ccxt's NetworkError subclasses
+                raise ClientResponseError(response.request_info, response.history, status=response.status,
+                                          message=f"{self.id}: {data.get('error')}")
+            if response.status != 200:
+                raise Exception(f"{self.id} {response.status}: {data.get('error')}")
+            return data
+
+    async def fetch_ticker(self, symbol: str) -> Dict:
+        return await self._request('GET', '/ticker', params={'symbol': symbol})
+
+    async def fetch_tickers(self, symbols: Optional[List[str]] = None) -> Dict:
+        params = {'symbols': ','.join(symbols)} if symbols else {}
+        return await self._request('GET', '/tickers', params=params)
+
+    async def fetch_order_book(self, symbol: str, limit: Optional[int] = None) -> Dict:
+        params = {'symbol': symbol}
+        if limit:
+            params['limit'] = limit
+        return await self._request('GET', '/orderbook', params=params)
+
+    async def fetch_balance(self) -> Dict:
+        return await self._request('GET', '/balance')
+
+    async def create_order(self, symbol: str, order_type: str, side: str, amount: float,
+                           price: Optional[float] = None, params: Optional[Dict] = None) -> Dict:
+        body = {'symbol': symbol, 'type': order_type, 'side': side, 'amount': amount, 'price': price}
+        body.update(params or {})
+        return await self._request('POST', '/order', json=body)
+
+    async def create_market_order(self, symbol: str, side: str, amount: float, params: Optional[Dict] = None) -> Dict:
+        return await self.create_order(symbol, 'market', side, amount, None, params)
+
+    async def create_limit_order(self, symbol: str, side: str, amount: float, price: float,
+                                 params: Optional[Dict] = None) -> Dict:
+        return await self.create_order(symbol, 'limit', side, amount, price, params)
+
+    async def close(self) -> None:
+        if self.session is not None and self.own_session:
+            await self.session.close()
+
+
+async def run_venues(count: int, base_port: int, symbols: List[str], host: str = '127.0.0.1', **options) -> List[web.AppRunner]:
+    """
+    Start several simulated venues in the current event loop, one port each
+
+    Args:
+        count: Number of venues
+        base_port: Port of the first venue; others follow consecutively
+        symbols: Symbols listed on every venue
+        host: Interface to bind
+        **options: Extra SimulatedVenue arguments applied to every venue
+
+    Returns:
+        Runners to clean up on shutdown
+    """
+    runners = []
+    for i in range(count):
+        venue = SimulatedVenue(f"sim{i}", symbols, seed=i, **options)
+        # Offset each venue's prices slightly so cross-venue spreads appear
+        for symbol in venue.mids:
+            venue.mids[symbol] *= 1 + (i - count / 2) * 0.001
+        runner = web.AppRunner(venue.app())
+        await runner.setup()
+        await web.TCPSite(runner, host, base_port + i).start()
+        runners.append(runner)
+    return runners
+
+
+async def main():
+    """Command line entry point serving simulated venues until interrupted"""
+    parser = argparse.ArgumentParser(description="Serve simulated exchanges for load and latency testing")
+    parser.add_argument('--venues', type=int, default=3)
+    parser.add_argument('--base-port', type=int, default=8800)
+    parser.add_argument('--symbols', default='BTC/USDT,ETH/USDT')
+    parser.add_argument('--latency-ms', type=float, default=20.0)
+    parser.add_argument('--jitter-ms', type=float, default=10.0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--rate-limit', type=float, default=0.0)
+    parser.add_argument('--tick-interval', type=float, default=0.1)
+    args = parser.parse_args()
+
+    balances = {'USDT': 1_000_000.0}
+    balances.update({symbol.split('/')[0]: 1000.0 for symbol in args.symbols.split(',')})
+    runners = await run_venues(
+        args.venues, args.base_port, args.symbols.split(','),
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_rate=args.error_rate,
+        rate_limit=args.rate_limit, tick_interval=args.tick_interval, balances=balances
+    )
+    logger.info("Serving %s simulated venues from port %s", args.venues, args.base_port)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for runner in runners:
+            await runner.cleanup()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,294 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+import numpy as np
+from models import Quote
+from config import RECORDER_BOOK_DEPTH, RECORDER_BOOK_INTERVAL, RECORDER_FLUSH_INTERVAL, RECORDER_SEGMENT_BYTES
+
+TICK_DTYPE = np.dtype([
+    ('ts', '<i8'),             # capture time, ns since epoch
+    ('exchange_ts', '<i8'),    # exchange timestamp, ms since epoch (0 if unknown)
+    ('exchange', '<u2'),
+    ('symbol', '<u4'),
+    ('bid', '<f8'),
+    ('ask', '<f8'),
+    ('bid_size', '<f8'),
+    ('ask_size', '<f8'),
+    ('last', '<f8'),
+    ('volume', '<f8'),
+])
+
+
+def book_dtype(depth: int = RECORDER_BOOK_DEPTH) -> np.dtype:
+    """Fixed-width order book record holding the top `depth` [price, size] levels per side"""
+    return np.dtype([
+        ('ts', '<i8'),
+        ('exchange_ts', '<i8'),
+        ('exchange', '<u2'),
+        ('symbol', '<u4'),
+        ('bids', '<f8', (depth, 2)),
+        ('asks', '<f8', (depth, 2)),
+    ])
+
+
+INDEX_FILE = 'index.json'
+
+
+def _number(value) -> float:
+    return float('nan') if value is None else float(value)
+
+
+class TickRecorder:
+    def __init__(self, directory: str, segment_bytes: int = RECORDER_SEGMENT_BYTES,
+                 flush_interval: float = RECORDER_FLUSH_INTERVAL, depth: int = RECORDER_BOOK_DEPTH,
+                 book_interval: float = RECORDER_BOOK_INTERVAL):
+        """
+        Append-only capture of tickers and order books into rotating binary segments
+
+        The trading path only enqueues a tuple; a background thread batches
+        records into NumPy structured arrays and appends them to the current
+        segment. Segments are raw fixed-width records so readers can memory-map
+        them directly. index.json lists segments and the exchange/symbol ID maps.
+
+        Args:
+            directory: Directory holding segments and the index
+            segment_bytes: Rotate to a new segment after this many bytes
+            flush_interval: Maximum seconds between writes
+            depth: Order book levels stored per side
+            book_interval: Minimum seconds between captures of one local order book
+        """
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.depth = depth
+        self.book_interval = book_interval
+        self.book_dtype = book_dtype(depth)
+        self.logger = logging.getLogger(__name__)
+        os.makedirs(directory, exist_ok=True)
+
+        self.index = self._load_index()
+        self.exchange_ids: Dict[str, int] = {name: i for i, name in enumerate(self.index['exchanges'])}
+        self.symbol_ids: Dict[str, int] = {name: i for i, name in enumerate(self.index['symbols'])}
+
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._files: Dict[str, object] = {}
+        self._current: Dict[str, Dict] = {}
+        self._book_captured: Dict[Tuple[str, str], float] = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='tick-recorder', daemon=True)
+        self._thread.start()
+
+    def _load_index(self) -> Dict:
+        path = os.path.join(self.directory, INDEX_FILE)
+        if os.path.exists(path):
+            with open(path) as f:
+                return json.load(f)
+        return {'exchanges': [], 'symbols': [], 'book_depth': self.depth, 'segments': []}
+
+    def _exchange_id(self, exchange_id: str) -> int:
+        index = self.exchange_ids.get(exchange_id)
+        if index is None:
+            index = len(self.index['exchanges'])
+            self.index['exchanges'].append(exchange_id)
+            self.exchange_ids[exchange_id] = index
+        return index
+
+    def _symbol_id(self, symbol: str) -> int:
+        index = self.symbol_ids.get(symbol)
+        if index is None:
+            index = len(self.index['symbols'])
+            self.index['symbols'].append(symbol)
+            self.symbol_ids[symbol] = index
+        return index
+
+    def record_ticker(self, exchange_id: str, symbol: str, ticker: Quote) -> None:
+        """
+        Queue a ticker for capture
+
+        Fields are copied now, since streamed quotes are updated in place.
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+            ticker: Quote as returned by ExchangeManager.get_ticker
+        """
+        self._queue.put(('tick', time.time_ns(), exchange_id, symbol, (
+            ticker.timestamp, ticker.bid, ticker.ask, ticker.bid_size, ticker.ask_size, ticker.last, ticker.volume
+        )))
+
+    def record_order_book(self, exchange_id: str, symbol: str, order_book: Dict) -> None:
+        """
+        Queue an order book for capture
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+            order_book: Order book as returned by ExchangeManager.get_order_book
+        """
+        self._queue.put(('book', time.time_ns(), exchange_id, symbol, order_book))
+
+    def record_local_book(self, exchange_id: str, symbol: str, book) -> None:
+        """
+        Queue a snapshot of a locally maintained order book, at most once per book_interval
+
+        Streamed depth diffs change the local books far more often than the
+        replay needs, so each book is sampled rather than captured per diff.
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+            book: LocalOrderBook the diffs were applied to
+        """
+        key = (exchange_id, symbol)
+        now = time.monotonic()
+        if now - self._book_captured.get(key, -self.book_interval) < self.book_interval:
+            return
+        self._book_captured[key] = now
+        self.record_order_book(exchange_id, symbol, book.to_dict(self.depth))
+
+    def _run(self) -> None:
+        """Background writer loop"""
+        while not self._stop.is_set():
+            self._stop.wait(self.flush_interval)
+            try:
+                self._drain()
+            except Exception as e:
+                self.logger.error("Tick recorder write failed: %s", e)
+        self._drain()
+
+    def _drain(self) -> None:
+        ticks, books = [], []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            (ticks if item[0] == 'tick' else books).append(item)
+        if ticks:
+            self._append('tick', self._tick_array(ticks))
+        if books:
+            self._append('book', self._book_array(books))
+
+    def _tick_array(self, items: List) -> np.ndarray:
+        records = np.empty(len(items), dtype=TICK_DTYPE)
+        for i, (_, captured, exchange_id, symbol, fields) in enumerate(items):
+            timestamp, bid, ask, bid_size, ask_size, last, volume = fields
+            records[i] = (
+                captured,
+                timestamp or 0,
+                self._exchange_id(exchange_id),
+                self._symbol_id(symbol),
+                _number(bid),
+                _number(ask),
+                _number(bid_size),
+                _number(ask_size),
+                _number(last),
+                _number(volume),
+            )
+        return records
+
+    def _book_array(self, items: List) -> np.ndarray:
+        records = np.zeros(len(items), dtype=self.book_dtype)
+        for i, (_, captured, exchange_id, symbol, order_book) in enumerate(items):
+            record = records[i]
+            record['ts'] = captured
+            record['exchange_ts'] = order_book.get('timestamp') or 0
+            record['exchange'] = self._exchange_id(exchange_id)
+            record['symbol'] = self._symbol_id(symbol)
+            for side in ('bids', 'asks'):
+                levels = [level[:2] for level in order_book[side][:self.depth]]
+                if levels:
+                    record[side][:len(levels)] = levels
+        return records
+
+    def _append(self, kind: str, records: np.ndarray) -> None:
+        segment = self._current.get(kind)
+        if segment is None or segment['bytes'] >= self.segment_bytes:
+            segment = self._rotate(kind)
+        self._files[kind].write(records.tobytes())
+        self._files[kind].flush()
+        segment['bytes'] += records.nbytes
+        segment['count'] += len(records)
+        segment['first_ts'] = segment['first_ts'] or int(records['ts'][0])
+        segment['last_ts'] = int(records['ts'][-1])
+        self._write_index()
+
+    def _rotate(self, kind: str) -> Dict:
+        if kind in self._files:
+            self._files[kind].close()
+        number = sum(1 for s in self.index['segments'] if s['kind'] == kind)
+        name = f"{kind}-{number:06d}.bin"
+        segment = {'kind': kind, 'file': name, 'count': 0, 'bytes': 0, 'first_ts': 0, 'last_ts': 0}
+        self.index['segments'].append(segment)
+        self._files[kind] = open(os.path.join(self.directory, name), 'ab')
+        self._current[kind] = segment
+        return segment
+
+    def _write_index(self) -> None:
+        path = os.path.join(self.directory, INDEX_FILE)
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.index, f)
+        os.replace(temp_path, path)
+
+    def close(self) -> None:
+        """Flush pending records and close segment files"""
+        self._stop.set()
+        self._thread.join()
+        for f in self._files.values():
+            f.close()
+        self._files.clear()
+
+
+class TickReader:
+    def __init__(self, directory: str):
+        """
+        Zero-copy reader for segments written by TickRecorder
+
+        Args:
+            directory: Directory holding segments and the index
+        """
+        self.directory = directory
+        with open(os.path.join(directory, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        self.exchanges: List[str] = self.index['exchanges']
+        self.symbols: List[str] = self.index['symbols']
+        self.book_dtype = book_dtype(self.index['book_depth'])
+
+    def _open(self, segment: Dict) -> Optional[np.ndarray]:
+        if segment['count'] == 0:
+            return None
+        dtype = TICK_DTYPE if segment['kind'] == 'tick' else self.book_dtype
+        path = os.path.join(self.directory, segment['file'])
+        return np.memmap(path, dtype=dtype, mode='r', shape=(segment['count'],))
+
+    def segments(self, kind: str, start_ns: int = 0, end_ns: Optional[int] = None) -> Iterator[np.ndarray]:
+        """
+        Memory-map every segment of a kind overlapping a capture time window
+
+        Args:
+            kind: 'tick' or 'book'
+            start_ns: Window start in ns since epoch
+            end_ns: Window end in ns since epoch (None for open-ended)
+
+        Yields:
+            Structured arrays backed directly by the segment files
+        """
+        for segment in self.index['segments']:
+            if segment['kind'] != kind:
+                continue
+            if segment['last_ts'] < start_ns or (end_ns is not None and segment['first_ts'] > end_ns):
+                continue
+            records = self._open(segment)
+            if records is not None:
+                yield records
+
+    def ticks(self, start_ns: int = 0, end_ns: Optional[int] = None) -> Iterator[np.ndarray]:
+        return self.segments('tick', start_ns, end_ns)
+
+    def books(self, start_ns: int = 0, end_ns: Optional[int] = None) -> Iterator[np.ndarray]:
+        return self.segments('book', start_ns, end_ns)
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+from bisect import bisect_left, bisect_right
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from models import Quote
+from log_pipeline import LogSampler
+from config import MONITOR_INTERVAL, STOP_LOSS_PERCENTAGE, TAKE_PROFIT_PERCENTAGE
+
+
+class TriggerIndex:
+    def __init__(self):
+        """
+        Sorted stop-loss and take-profit levels for one (exchange, symbol)
+
+        Stops fire when the price falls to or below their level and
+        take-profits when it rises to or above theirs, so each tick only
+        bisects both level lists and pops the crossed ends.
+        """
+        self.stop_levels: List[float] = []
+        self.stop_ids: List[str] = []
+        self.target_levels: List[float] = []
+        self.target_ids: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.stop_ids)
+
+    def add(self, trade_id: str, stop_price: float, target_price: float) -> None:
+        index = bisect_right(self.stop_levels, stop_price)
+        self.stop_levels.insert(index, stop_price)
+        self.stop_ids.insert(index, trade_id)
+        index = bisect_right(self.target_levels, target_price)
+        self.target_levels.insert(index, target_price)
+        self.target_ids.insert(index, trade_id)
+
+    def remove(self, trade_id: str) -> None:
+        for levels, ids in ((self.stop_levels, self.stop_ids), (self.target_levels, self.target_ids)):
+            if trade_id in ids:
+                index = ids.index(trade_id)
+                del levels[index]
+                del ids[index]
+
+    def crossed(self, price: float) -> List[Tuple[str, str]]:
+        """
+        Pop every trade whose stop or target was crossed by a price
+
+        Args:
+            price: Latest price
+
+        Returns:
+            List of (trade_id, reason) where reason is 'stopped_loss' or 'take_profit'
+        """
+        triggered = []
+        stop_index = bisect_left(self.stop_levels, price)
+        if stop_index < len(self.stop_levels):
+            triggered.extend((trade_id, 'stopped_loss') for trade_id in self.stop_ids[stop_index:])
+            del self.stop_levels[stop_index:]
+            del self.stop_ids[stop_index:]
+        target_index = bisect_right(self.target_levels, price)
+        if target_index:
+            triggered.extend((trade_id, 'take_profit') for trade_id in self.target_ids[:target_index])
+            del self.target_levels[:target_index]
+            del self.target_ids[:target_index]
+
+        # Drop the opposite level of every trade that fired
+        for trade_id, reason in triggered:
+            if reason == 'stopped_loss' and trade_id in self.target_ids:
+                index = self.target_ids.index(trade_id)
+                del self.target_levels[index]
+                del self.target_ids[index]
+            elif reason == 'take_profit' and trade_id in self.stop_ids:
+                index = self.stop_ids.index(trade_id)
+                del self.stop_levels[index]
+                del self.stop_ids[index]
+        return triggered
+
+
+class TradeMonitor:
+    def __init__(self, exchange_manager, on_trigger: Callable[[Dict, str], Awaitable],
+                 interval: float = MONITOR_INTERVAL):
+        """
+        Shared stop-loss / take-profit monitoring for all open positions
+
+        One price feed per (exchange, symbol) is fanned out to every position
+        on it: the streaming cache when available, otherwise a single REST
+        poll per interval.
+
+        Args:
+            exchange_manager: ExchangeManager providing prices
+            on_trigger: Coroutine called with (trade, reason) when a level is crossed
+            interval: Seconds between price checks when polling
+        """
+        self.exchange_manager = exchange_manager
+        self.on_trigger = on_trigger
+        self.interval = interval
+        self.logger = logging.getLogger(__name__)
+        # A venue outage fails every poll; log each feed's errors at most once per interval
+        self.sampled = LogSampler(self.logger)
+        self.trades: Dict[str, Dict] = {}
+        self.indexes: Dict[Tuple[str, str], TriggerIndex] = {}
+        self._feeds: Dict[Tuple[str, str], asyncio.Task] = {}
+
+    def add(self, trade: Dict) -> None:
+        """
+        Start monitoring a position
+
+        Args:
+            trade: Dictionary containing trade details
+        """
+        key = (trade['buy_exchange'], trade['symbol'])
+        entry_price = trade['buy_price']
+        self.trades[trade['id']] = trade
+        index = self.indexes.setdefault(key, TriggerIndex())
+        index.add(
+            trade['id'],
+            entry_price * (1 - STOP_LOSS_PERCENTAGE / 100),
+            entry_price * (1 + TAKE_PROFIT_PERCENTAGE / 100)
+        )
+        if key not in self._feeds or self._feeds[key].done():
+            self._feeds[key] = asyncio.create_task(self._run_feed(*key))
+
+    def remove(self, trade_id: str) -> None:
+        """Stop monitoring a position"""
+        trade = self.trades.pop(trade_id, None)
+        if trade is None:
+            return
+        index = self.indexes.get((trade['buy_exchange'], trade['symbol']))
+        if index is not None:
+            index.remove(trade_id)
+
+    async def _run_feed(self, exchange_id: str, symbol: str) -> None:
+        """Poll one price for as long as positions on it remain open, through any errors"""
+        key = (exchange_id, symbol)
+        try:
+            while self.indexes.get(key):
+                try:
+                    ticker = await self._get_price(exchange_id, symbol)
+                    if ticker and ticker.last is not None:
+                        await self.on_price(exchange_id, symbol, ticker.last)
+                except Exception as e:
+                    self.sampled.log(logging.ERROR, key, "Error monitoring %s %s: %s", exchange_id, symbol, e)
+                await asyncio.sleep(self.interval)
+        finally:
+            self._feeds.pop(key, None)
+            if not self.indexes.get(key):
+                self.indexes.pop(key, None)
+
+    async def _get_price(self, exchange_id: str, symbol: str) -> Optional[Quote]:
+        market_data = self.exchange_manager.market_data
+        if market_data:
+            ticker = market_data.get_ticker(exchange_id, symbol)
+            if ticker:
+                return ticker
+        return await self.exchange_manager.get_ticker(exchange_id, symbol)
+
+    async def on_price(self, exchange_id: str, symbol: str, price: float) -> None:
+        """
+        Fire triggers for every position whose level the price crossed
+
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+            price: Latest price
+        """
+        index = self.indexes.get((exchange_id, symbol))
+        if not index:
+            return
+        for trade_id, reason in index.crossed(price):
+            trade = self.trades.pop(trade_id, None)
+            if trade is None:
+                continue
+            try:
+                await self.on_trigger(trade, reason)
+            except Exception as e:
+                self.logger.error("Error handling %s for trade %s: %s", reason, trade_id, e)
+
+    async def close(self) -> None:
+        """Stop all price feeds"""
+        for task in self._feeds.values():
+            task.cancel()
+        await asyncio.gather(*self._feeds.values(), return_exceptions=True)
+        self._feeds.clear()
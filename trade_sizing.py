@@ -0,0 +1,86 @@
+from typing import Dict, Iterable, Optional, Sequence
+
+
+def optimal_trade_size(asks: Iterable[Sequence[float]], bids: Iterable[Sequence[float]],
+                       buy_fee: float, sell_fee: float, max_notional: float,
+                       min_margin: float = 0.0) -> Optional[Dict]:
+    """
+    Find the profit-maximizing size by walking the buy venue's asks against the sell venue's bids
+
+    Both ladders are consumed in a single merge pass, best level first. Each
+    step trades the smaller of the two remaining level sizes, so per-unit
+    profit is non-increasing and the walk stops at the first unprofitable
+    step, the end of either ladder, or the notional cap.
+
+    Args:
+        asks: Ask levels on the buy exchange as [price, size], best first
+        bids: Bid levels on the sell exchange as [price, size], best first
+        buy_fee: Buy exchange fee as a percentage
+        sell_fee: Sell exchange fee as a percentage
+        max_notional: Maximum quote currency to spend on the buy side
+        min_margin: Minimum fee-adjusted marginal spread, as a percentage, for each step
+
+    Returns:
+        Dictionary with size, VWAP fill prices, expected profit and marginal spread,
+        or None if not even the first unit is profitable
+    """
+    buy_factor = 1 + buy_fee / 100
+    sell_factor = 1 - sell_fee / 100
+    ask_iter = iter(asks)
+    bid_iter = iter(bids)
+
+    ask = next(ask_iter, None)
+    bid = next(bid_iter, None)
+    if ask is None or bid is None:
+        return None
+    ask_price, ask_left = ask[0], ask[1]
+    bid_price, bid_left = bid[0], bid[1]
+
+    size = 0.0
+    cost = 0.0
+    proceeds = 0.0
+    marginal_spread = None
+    budget = max_notional
+
+    while True:
+        unit_cost = ask_price * buy_factor
+        unit_proceeds = bid_price * sell_factor
+        margin = (unit_proceeds - unit_cost) / unit_cost * 100
+        if margin <= min_margin or budget <= 0:
+            break
+
+        affordable = budget / ask_price
+        quantity = min(ask_left, bid_left, affordable)
+        size += quantity
+        cost += quantity * ask_price
+        proceeds += quantity * bid_price
+        budget -= quantity * ask_price
+        marginal_spread = margin
+        if quantity == affordable:
+            break
+
+        ask_left -= quantity
+        bid_left -= quantity
+        if ask_left <= 0:
+            ask = next(ask_iter, None)
+            if ask is None:
+                break
+            ask_price, ask_left = ask[0], ask[1]
+        if bid_left <= 0:
+            bid = next(bid_iter, None)
+            if bid is None:
+                break
+            bid_price, bid_left = bid[0], bid[1]
+
+    if size <= 0:
+        return None
+
+    expected_profit = proceeds - cost - (cost * buy_fee / 100 + proceeds * sell_fee / 100)
+    return {
+        'trade_amount': size,
+        'buy_price': cost / size,
+        'sell_price': proceeds / size,
+        'expected_profit_usdt': expected_profit,
+        'profit_percentage': expected_profit / cost * 100,
+        'marginal_spread': marginal_spread
+    }
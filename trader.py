@@ -1,108 +1,428 @@
 import asyncio
 import logging
-from typing import Dict, Optional
+import time
+from typing import Dict, Optional, Tuple
 from datetime import datetime
 from exchange_manager import ExchangeManager
 from arbitrage_finder import ArbitrageFinder
-from config import STOP_LOSS_PERCENTAGE, TAKE_PROFIT_PERCENTAGE
+from inventory import InventoryLedger
+from trade_monitor import TradeMonitor
+from metrics import metrics, mark
+from models import AnyOpportunity, CycleOpportunity, Fill, Opportunity
+from log_pipeline import LogSampler
+from execution_dispatcher import route_key
+from config import CONCURRENT_LEGS, LEG_TIMEOUT
 
 class Trader:
-    def __init__(self, exchange_manager: ExchangeManager, arbitrage_finder: ArbitrageFinder):
+    def __init__(self, exchange_manager: ExchangeManager, arbitrage_finder: ArbitrageFinder,
+                 inventory: Optional[InventoryLedger] = None):
         """
         Initialize trader with exchange manager and arbitrage finder
         
         Args:
             exchange_manager: Instance of ExchangeManager
             arbitrage_finder: Instance of ArbitrageFinder
+            inventory: Optional InventoryLedger used for balance checks instead of fetch_balance
         """
         self.exchange_manager = exchange_manager
         self.arbitrage_finder = arbitrage_finder
+        self.inventory = inventory
         self.logger = logging.getLogger(__name__)
+        # Route rejections recur on every evaluation while a spread persists
+        self.sampled = LogSampler(self.logger)
         self.active_trades = {}
+        self.monitor = TradeMonitor(exchange_manager, self._on_monitor_trigger)
 
-    async def execute_arbitrage(self, opportunity: Dict) -> Optional[Dict]:
+    async def execute_arbitrage(self, opportunity: AnyOpportunity) -> Optional[Dict]:
         """
         Execute an arbitrage opportunity
         
         Args:
-            opportunity: Dictionary containing opportunity details
+            opportunity: Pairwise or cycle opportunity
             
         Returns:
             Dictionary containing trade results or None if failed
         """
+        if opportunity.type == 'cycle':
+            return await self.execute_cycle(opportunity)
+        if CONCURRENT_LEGS:
+            return await self.execute_concurrent(opportunity)
+
         try:
             # Verify opportunity is still valid
             is_valid, reason = await self.arbitrage_finder.verify_opportunity(opportunity)
             if not is_valid:
-                self.logger.warning(f"Opportunity no longer valid: {reason}")
+                self.sampled.warning(route_key(opportunity), "Opportunity no longer valid: %s", reason)
                 return None
+            mark(opportunity, 'verified', 'evaluated')
 
             # Check if we have sufficient balance
-            buy_currency = opportunity['symbol'].split('/')[1]  # Quote currency (e.g., USDT)
-            buy_exchange = opportunity['buy_exchange']
+            symbol = opportunity.symbol
+            buy_currency = symbol.split('/')[1]  # Quote currency (e.g., USDT)
+            buy_exchange = opportunity.buy_exchange
+            sell_exchange = opportunity.sell_exchange
             
-            balance = await self.exchange_manager.get_balance(buy_exchange, buy_currency)
-            if not balance or balance < opportunity['trade_amount'] * opportunity['buy_price']:
-                self.logger.error(f"Insufficient balance in {buy_exchange}")
+            balance = await self._get_balance(buy_exchange, buy_currency)
+            if not balance or balance < opportunity.trade_amount * opportunity.buy_price:
+                self.logger.error("Insufficient balance in %s", buy_exchange)
                 return None
 
             # Execute buy order
+            sent = time.monotonic_ns()
             buy_order = await self.exchange_manager.place_order(
                 buy_exchange,
-                opportunity['symbol'],
+                symbol,
                 'market',
                 'buy',
-                opportunity['trade_amount']
+                opportunity.trade_amount
             )
+            self._record_leg_timing(opportunity, buy_exchange, sent, buy_order)
             
             if not buy_order:
                 self.logger.error("Failed to execute buy order")
                 return None
 
-            self.logger.info(f"Buy order executed: {buy_order['id']}")
+            self._record_fill(buy_exchange, buy_order)
+            self.logger.info("Buy order executed: %s", buy_order.id)
 
             # Execute sell order
+            sent = time.monotonic_ns()
             sell_order = await self.exchange_manager.place_order(
-                opportunity['sell_exchange'],
-                opportunity['symbol'],
+                sell_exchange,
+                symbol,
                 'market',
                 'sell',
-                opportunity['trade_amount']
+                opportunity.trade_amount
             )
+            self._record_leg_timing(opportunity, sell_exchange, sent, sell_order)
             
             if not sell_order:
                 self.logger.error("Failed to execute sell order")
                 # Implement emergency sell on buy exchange
-                await self._emergency_sell(buy_exchange, opportunity['symbol'], opportunity['trade_amount'])
+                await self._emergency_sell(buy_exchange, symbol, opportunity.trade_amount)
                 return None
 
-            self.logger.info(f"Sell order executed: {sell_order['id']}")
+            self._record_fill(sell_exchange, sell_order)
+            self.logger.info("Sell order executed: %s", sell_order.id)
 
             # Calculate actual profit
-            actual_profit = (
-                sell_order['price'] * sell_order['amount'] -
-                buy_order['price'] * buy_order['amount']
+            buy_price = self._fill_price(buy_order, opportunity.buy_price)
+            sell_price = self._fill_price(sell_order, opportunity.sell_price)
+            actual_profit = sell_price * sell_order.amount - buy_price * buy_order.amount
+
+            trade_result = {
+                'id': f"{buy_order.id}_{sell_order.id}",
+                'symbol': symbol,
+                'buy_exchange': buy_exchange,
+                'sell_exchange': sell_exchange,
+                'buy_price': buy_price,
+                'sell_price': sell_price,
+                'amount': buy_order.amount,
+                'expected_profit': opportunity.expected_profit_usdt,
+                'actual_profit': actual_profit,
+                'timestamp': datetime.utcnow().isoformat(),
+                'status': 'completed'
+            }
+
+            self.logger.info("Arbitrage trade completed: %s", trade_result)
+            return trade_result
+
+        except Exception as e:
+            self.logger.error("Error executing arbitrage: %s", e)
+            return None
+
+    async def execute_concurrent(self, opportunity: Opportunity) -> Optional[Dict]:
+        """
+        Execute both legs of an arbitrage at the same time from pre-positioned inventory
+        
+        The buy venue must hold enough quote currency and the sell venue enough
+        base currency, so neither leg depends on the other. If only one leg
+        fills, the filled leg is unwound on its own exchange.
+        
+        Args:
+            opportunity: Pairwise opportunity
+            
+        Returns:
+            Dictionary containing trade results or None if failed
+        """
+        try:
+            symbol = opportunity.symbol
+            base_currency, quote_currency = symbol.split('/')
+            buy_exchange = opportunity.buy_exchange
+            sell_exchange = opportunity.sell_exchange
+
+            (is_valid, reason), quote_balance, base_balance = await asyncio.gather(
+                self.arbitrage_finder.verify_opportunity(opportunity),
+                self._get_balance(buy_exchange, quote_currency),
+                self._get_balance(sell_exchange, base_currency)
             )
+            if not is_valid:
+                self.sampled.warning(route_key(opportunity), "Opportunity no longer valid: %s", reason)
+                return None
+            mark(opportunity, 'verified', 'evaluated')
+
+            # Verification may resize the trade to the executable depth
+            amount = opportunity.trade_amount
+            if not quote_balance or quote_balance < amount * opportunity.buy_price:
+                self.logger.error("Insufficient %s balance in %s", quote_currency, buy_exchange)
+                return None
+            if not base_balance or base_balance < amount:
+                self.logger.error("Insufficient %s balance in %s", base_currency, sell_exchange)
+                return None
+
+            quote_needed = amount * opportunity.buy_price
+            if (self.inventory and self.inventory.is_seeded(buy_exchange)
+                    and self.inventory.is_seeded(sell_exchange)):
+                if not self.inventory.reserve(buy_exchange, quote_currency, quote_needed):
+                    self.sampled.log(logging.ERROR, route_key(opportunity), "%s on %s is reserved by another trade",
+                                     quote_currency, buy_exchange)
+                    return None
+                if not self.inventory.reserve(sell_exchange, base_currency, amount):
+                    self.inventory.release(buy_exchange, quote_currency, quote_needed)
+                    self.sampled.log(logging.ERROR, route_key(opportunity), "%s on %s is reserved by another trade",
+                                     base_currency, sell_exchange)
+                    return None
+                try:
+                    (buy_order, buy_latency, buy_known), (sell_order, sell_latency, sell_known) = await asyncio.gather(
+                        self._place_leg(buy_exchange, symbol, 'buy', amount, opportunity),
+                        self._place_leg(sell_exchange, symbol, 'sell', amount, opportunity)
+                    )
+                finally:
+                    self.inventory.release(buy_exchange, quote_currency, quote_needed)
+                    self.inventory.release(sell_exchange, base_currency, amount)
+            else:
+                (buy_order, buy_latency, buy_known), (sell_order, sell_latency, sell_known) = await asyncio.gather(
+                    self._place_leg(buy_exchange, symbol, 'buy', amount, opportunity),
+                    self._place_leg(sell_exchange, symbol, 'sell', amount, opportunity)
+                )
+            leg_latency_ms = {'buy': buy_latency, 'sell': sell_latency}
+            self.logger.info("Leg latency (ms): buy %.1f on %s, sell %.1f on %s",
+                             buy_latency, buy_exchange, sell_latency, sell_exchange)
+
+            if not buy_order or not sell_order:
+                await self._reconcile_legs(opportunity, buy_order, sell_order, buy_known, sell_known)
+                return None
+
+            buy_price = self._fill_price(buy_order, opportunity.buy_price)
+            sell_price = self._fill_price(sell_order, opportunity.sell_price)
+            actual_profit = sell_price * sell_order.amount - buy_price * buy_order.amount
 
             trade_result = {
-                'id': f"{buy_order['id']}_{sell_order['id']}",
-                'symbol': opportunity['symbol'],
+                'id': f"{buy_order.id}_{sell_order.id}",
+                'symbol': symbol,
                 'buy_exchange': buy_exchange,
-                'sell_exchange': opportunity['sell_exchange'],
-                'buy_price': buy_order['price'],
-                'sell_price': sell_order['price'],
-                'amount': buy_order['amount'],
-                'expected_profit': opportunity['expected_profit_usdt'],
+                'sell_exchange': sell_exchange,
+                'buy_price': buy_price,
+                'sell_price': sell_price,
+                'amount': buy_order.amount,
+                'expected_profit': opportunity.expected_profit_usdt,
                 'actual_profit': actual_profit,
+                'leg_latency_ms': leg_latency_ms,
                 'timestamp': datetime.utcnow().isoformat(),
                 'status': 'completed'
             }
 
-            self.logger.info(f"Arbitrage trade completed: {trade_result}")
+            self.logger.info("Arbitrage trade completed: %s", trade_result)
             return trade_result
 
         except Exception as e:
-            self.logger.error(f"Error executing arbitrage: {str(e)}")
+            self.logger.error("Error executing arbitrage: %s", e)
+            return None
+
+    async def _get_balance(self, exchange_id: str, currency: str) -> Optional[float]:
+        """
+        Free balance from the inventory ledger when seeded, otherwise from the exchange
+        
+        Args:
+            exchange_id: ID of the exchange
+            currency: Currency code
+            
+        Returns:
+            Balance amount or None if failed
+        """
+        if self.inventory and self.inventory.is_seeded(exchange_id):
+            return self.inventory.available(exchange_id, currency)
+        return await self.exchange_manager.get_balance(exchange_id, currency)
+
+    @staticmethod
+    def _fill_price(order: Fill, quoted: float) -> float:
+        """Average fill price, or the quoted price when the exchange reported none"""
+        return order.price if order.price is not None else quoted
+
+    def _record_fill(self, exchange_id: str, order: Optional[Fill]) -> None:
+        """Apply one of our own fills to the inventory ledger"""
+        if not order or not self.inventory or order.price is None:
+            return
+        self.inventory.apply_fill(
+            exchange_id, order.symbol, order.side, order.amount, order.price,
+            self.exchange_manager.get_trading_fee(exchange_id, order.symbol)
+        )
+
+    async def _place_leg(self, exchange_id: str, symbol: str, side: str, amount: float,
+                         opportunity: Optional[Opportunity] = None) -> Tuple[Optional[Fill], float, bool]:
+        """
+        Send one market order leg with a timeout
+        
+        A leg that times out may still have reached the exchange, so it is
+        looked up before the trade is reconciled.
+        
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+            side: Order side ('buy' or 'sell')
+            amount: Order amount
+            opportunity: Opportunity the leg belongs to, for stage timing
+            
+        Returns:
+            Tuple of (fill or None, send-to-ack latency in milliseconds,
+            False if the leg timed out and its order could not be resolved)
+        """
+        client_order_id = self.exchange_manager.new_client_order_id(exchange_id)
+        since = int(time.time() * 1000)
+        sent = time.monotonic_ns()
+        known = True
+        try:
+            order = await asyncio.wait_for(
+                self.exchange_manager.place_order(exchange_id, symbol, 'market', side, amount,
+                                                  client_order_id=client_order_id),
+                timeout=LEG_TIMEOUT
+            )
+            acked = self._record_leg_timing(opportunity, exchange_id, sent, order)
+        except asyncio.TimeoutError:
+            acked = self._record_leg_timing(opportunity, exchange_id, sent, None)
+            self.logger.error("%s leg on %s timed out after %ss, resolving order state",
+                              side.capitalize(), exchange_id, LEG_TIMEOUT)
+            try:
+                order = await self.exchange_manager.resolve_order(exchange_id, symbol, side, client_order_id, since)
+            except Exception as e:
+                self.logger.error("Could not resolve %s leg on %s: %s", side, exchange_id, e)
+                order = None
+                known = False
+        self._record_fill(exchange_id, order)
+        return order, (acked - sent) / 1e6, known
+
+    def _record_leg_timing(self, opportunity: Optional[Opportunity], exchange_id: str, sent: int,
+                           order: Optional[Fill]) -> int:
+        """
+        Record send and acknowledgement stage latencies for one order leg
+        
+        Args:
+            opportunity: Opportunity carrying stage timestamps, if any
+            exchange_id: ID of the exchange the leg was sent to
+            sent: Monotonic time the leg was sent, in nanoseconds
+            order: Acknowledged fill or None if it failed
+            
+        Returns:
+            Monotonic time the leg completed, in nanoseconds
+        """
+        acked = time.monotonic_ns()
+        metrics.observe('stage_seconds', (acked - sent) / 1e9, stage='acked', exchange=exchange_id)
+        if opportunity is None:
+            return acked
+        if opportunity.verified_ns is not None:
+            metrics.observe('stage_seconds', (sent - opportunity.verified_ns) / 1e9, stage='sent', exchange=exchange_id)
+        if order and opportunity.received_ns is not None:
+            metrics.observe('tick_to_trade_seconds', (acked - opportunity.received_ns) / 1e9, exchange=exchange_id)
+        return acked
+
+    async def _reconcile_legs(self, opportunity: Opportunity, buy_order: Optional[Fill],
+                              sell_order: Optional[Fill], buy_known: bool = True, sell_known: bool = True) -> None:
+        """
+        Restore the starting inventory when only one leg of a concurrent trade filled
+        
+        Nothing is unwound while either leg's state is unknown: if that order
+        did fill, unwinding the other leg would double the position.
+        
+        Args:
+            opportunity: Pairwise opportunity
+            buy_order: Buy leg result or None if it failed
+            sell_order: Sell leg result or None if it failed
+            buy_known: False if the buy leg may have filled without being acknowledged
+            sell_known: False if the sell leg may have filled without being acknowledged
+        """
+        symbol = opportunity.symbol
+        if not buy_known or not sell_known:
+            unknown = ' and '.join(side for side, known in (('buy', buy_known), ('sell', sell_known)) if not known)
+            self.logger.error("State of %s leg of %s on %s/%s unknown, not unwinding; reconcile manually",
+                              unknown, symbol, opportunity.buy_exchange, opportunity.sell_exchange)
+        elif buy_order and not sell_order:
+            self.logger.error("Sell leg failed, unwinding buy leg")
+            await self._emergency_order(opportunity.buy_exchange, symbol, 'sell', buy_order.amount)
+        elif sell_order and not buy_order:
+            self.logger.error("Buy leg failed, unwinding sell leg")
+            await self._emergency_order(opportunity.sell_exchange, symbol, 'buy', sell_order.amount)
+        else:
+            self.logger.error("Both legs failed, no position to unwind")
+
+    async def execute_cycle(self, opportunity: CycleOpportunity) -> Optional[Dict]:
+        """
+        Execute a multi-leg cycle found by the currency graph, one leg after another
+        
+        Transfer legs are not executed; they rely on inventory already held on
+        the destination exchange.
+        
+        Args:
+            opportunity: Cycle opportunity with legs and a start amount
+            
+        Returns:
+            Dictionary containing trade results or None if failed
+        """
+        amount = opportunity.start_amount
+        if amount <= 0:
+            self.logger.warning("Cannot size cycle starting in %s", opportunity.start_currency)
+            return None
+
+        orders = []
+        try:
+            for leg in opportunity.legs:
+                if leg.side == 'transfer':
+                    continue
+
+                # Buy legs are sized in base currency, sell legs spend the base we hold
+                order_amount = amount * leg.rate if leg.side == 'buy' else amount
+                order = await self.exchange_manager.place_order(
+                    leg.exchange,
+                    leg.symbol,
+                    'market',
+                    leg.side,
+                    order_amount
+                )
+                if not order:
+                    self.logger.error("Cycle leg failed: %s %s on %s, holding %s %s",
+                                      leg.side, leg.symbol, leg.exchange, amount, leg.from_currency)
+                    return None
+
+                orders.append(order)
+                self._record_fill(leg.exchange, order)
+                if leg.side == 'buy':
+                    amount = order.amount
+                    continue
+                if order.price is None:
+                    self.logger.error("Cycle leg %s %s on %s filled without a price, %s proceeds unknown; stopping",
+                                      leg.side, leg.symbol, leg.exchange, leg.to_currency)
+                    return None
+                # Proceeds of what actually filled, net of the fee charged in the quote currency
+                fee_factor = 1 - self.exchange_manager.get_trading_fee(leg.exchange, leg.symbol) / 100
+                amount = order.amount * order.price * fee_factor
+
+            trade_result = {
+                'id': '_'.join(order.id for order in orders),
+                'type': 'cycle',
+                'legs': [leg.to_dict() for leg in opportunity.legs],
+                'start_currency': opportunity.start_currency,
+                'start_amount': opportunity.start_amount,
+                'end_amount': amount,
+                'expected_profit': opportunity.expected_profit_usdt,
+                'actual_profit': amount - opportunity.start_amount,
+                'timestamp': datetime.utcnow().isoformat(),
+                'status': 'completed'
+            }
+
+            self.logger.info("Cycle trade completed: %s", trade_result)
+            return trade_result
+
+        except Exception as e:
+            self.logger.error("Error executing cycle: %s", e)
             return None
 
     async def _emergency_sell(self, exchange_id: str, symbol: str, amount: float) -> None:
@@ -114,81 +434,65 @@ class Trader:
             symbol: Trading pair symbol
             amount: Amount to sell
         """
+        await self._emergency_order(exchange_id, symbol, 'sell', amount)
+
+    async def _emergency_order(self, exchange_id: str, symbol: str, side: str, amount: float) -> None:
+        """
+        Emergency market order to flatten a position left by a failed arbitrage
+        
+        Args:
+            exchange_id: ID of the exchange
+            symbol: Trading pair symbol
+            side: Order side ('buy' or 'sell')
+            amount: Amount to trade
+        """
         try:
-            self.logger.warning(f"Executing emergency sell for {amount} {symbol} on {exchange_id}")
+            self.logger.warning("Executing emergency %s for %s %s on %s", side, amount, symbol, exchange_id)
             
-            sell_order = await self.exchange_manager.place_order(
+            order = await self.exchange_manager.place_order(
                 exchange_id,
                 symbol,
                 'market',
-                'sell',
+                side,
                 amount
             )
             
-            if sell_order:
-                self.logger.info(f"Emergency sell completed: {sell_order['id']}")
+            if order:
+                self._record_fill(exchange_id, order)
+                self.logger.info("Emergency %s completed: %s", side, order.id)
             else:
-                self.logger.error("Failed to execute emergency sell")
+                self.logger.error("Failed to execute emergency %s", side)
                 
         except Exception as e:
-            self.logger.error(f"Error during emergency sell: {str(e)}")
+            self.logger.error("Error during emergency %s: %s", side, e)
 
-    async def monitor_trade(self, trade_id: str) -> None:
+    async def _on_monitor_trigger(self, trade: Dict, reason: str) -> None:
         """
-        Monitor an active trade for stop loss and take profit
+        Close a monitored position whose stop loss or take profit was crossed
         
         Args:
-            trade_id: ID of the trade to monitor
+            trade: Dictionary containing trade details
+            reason: 'stopped_loss' or 'take_profit'
         """
-        trade = self.active_trades.get(trade_id)
-        if not trade:
-            return
-
         try:
-            while True:
-                # Get current price
-                ticker = await self.exchange_manager.get_ticker(
+            if reason == 'stopped_loss':
+                await self._emergency_sell(
                     trade['buy_exchange'],
-                    trade['symbol']
+                    trade['symbol'],
+                    trade['amount']
                 )
-                
-                if not ticker:
-                    continue
-
-                current_price = ticker['last']
-                entry_price = trade['buy_price']
-
-                # Check stop loss
-                stop_loss_price = entry_price * (1 - STOP_LOSS_PERCENTAGE / 100)
-                if current_price <= stop_loss_price:
-                    await self._emergency_sell(
-                        trade['buy_exchange'],
-                        trade['symbol'],
-                        trade['amount']
-                    )
-                    trade['status'] = 'stopped_loss'
-                    break
-
-                # Check take profit
-                take_profit_price = entry_price * (1 + TAKE_PROFIT_PERCENTAGE / 100)
-                if current_price >= take_profit_price:
-                    await self.exchange_manager.place_order(
-                        trade['buy_exchange'],
-                        trade['symbol'],
-                        'market',
-                        'sell',
-                        trade['amount']
-                    )
-                    trade['status'] = 'take_profit'
-                    break
-
-                await asyncio.sleep(1)  # Check every second
-
-        except Exception as e:
-            self.logger.error(f"Error monitoring trade {trade_id}: {str(e)}")
+            else:
+                order = await self.exchange_manager.place_order(
+                    trade['buy_exchange'],
+                    trade['symbol'],
+                    'market',
+                    'sell',
+                    trade['amount']
+                )
+                self._record_fill(trade['buy_exchange'], order)
+            trade['status'] = reason
         finally:
-            if trade_id in self.active_trades:
-                del self.active_trades[trade_id]
+            self.active_trades.pop(trade['id'], None)
 
     def start_trade_monitor(self, trade: Dict) -> None:
         """
@@ -198,4 +502,4 @@ class Trader:
             trade: Dictionary containing trade details
         """
         self.active_trades[trade['id']] = trade
-        asyncio.create_task(self.monitor_trade(trade['id']))
+        self.monitor.add(trade)